@@ -0,0 +1,126 @@
+"""
+Memory benchmark for compact pathway reference trees.
+
+Parses a synthetic pathwayReferences response with json (as the client does) and
+compares the memory held by the raw dicts with the compact representation, plus
+the time of a typical IndsatsClient.filtrer_indsats_referencer call on both.
+
+Usage:
+    python benchmarks/bench_compact_references.py [--pathways N] [--citizens N]
+"""
+
+import argparse
+import gc
+import json
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from kmd_nexus_client.compact_references import compact_references  # noqa: E402
+from kmd_nexus_client.functionality.indsatser import IndsatsClient  # noqa: E402
+
+BASE = "https://odense.nexus.kmd.dk/api/core/mobile/odense/v2"
+STATES = [
+    {"id": 1, "name": "Bestilt", "color": "#00ff00", "type": "REQUESTED"},
+    {"id": 2, "name": "Bevilliget", "color": "#00aa00", "type": "GRANTED"},
+    {"id": 3, "name": "Afsluttet", "color": "#aaaaaa", "type": "FINISHED"},
+]
+
+
+def _links(kind: str, node_id: str) -> dict:
+    return {
+        "self": {"href": f"{BASE}/patients/1/pathwayReferences/{node_id}"},
+        "referencedObject": {"href": f"{BASE}/{kind}/{node_id}"},
+        "availableActions": {"href": f"{BASE}/{kind}/{node_id}/availableActions"},
+    }
+
+
+def build_response(pathways: int, courses: int = 5, grants: int = 20) -> str:
+    """Build a pathwayReferences response body shaped like Nexus output."""
+    roots = []
+    for p in range(pathways):
+        roots.append(
+            {
+                "id": f"p{p}",
+                "name": f"Forløb {p}",
+                "type": "patientPathwayReference",
+                "pathwayStatus": "ACTIVE",
+                "_links": _links("patientPathways", f"p{p}"),
+                "children": [
+                    {
+                        "id": f"p{p}-c{c}",
+                        "name": "Indsatser",
+                        "type": "folder",
+                        "_links": _links("folders", f"p{p}-c{c}"),
+                        "children": [
+                            {
+                                "id": f"p{p}-c{c}-g{g}",
+                                "name": f"Indsats {g}",
+                                "type": "basketGrantReference",
+                                "date": "2025-01-01T00:00:00.000+0000",
+                                "workflowState": STATES[g % 3],
+                                "additionalInfo": [
+                                    {"key": "Leverandør", "value": "Hjemmeplejen Nord"}
+                                ],
+                                "_links": _links("grants", f"p{p}-c{c}-g{g}"),
+                                "children": [],
+                            }
+                            for g in range(grants)
+                        ],
+                    }
+                    for c in range(courses)
+                ],
+            }
+        )
+    return json.dumps(roots)
+
+
+def measure(build) -> tuple:
+    """Return (result, bytes held) for the object built by build()."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pathways", type=int, default=20)
+    parser.add_argument("--citizens", type=int, default=50)
+    args = parser.parse_args()
+
+    body = build_response(args.pathways)
+
+    raw, raw_bytes = measure(lambda: [json.loads(body) for _ in range(args.citizens)])
+    compact, compact_bytes = measure(
+        lambda: [compact_references(json.loads(body)) for _ in range(args.citizens)]
+    )
+
+    nodes = args.citizens * args.pathways * (1 + 5 * 21)
+    print(f"{args.citizens} citizens, {nodes} reference nodes")
+    print(f"raw dicts        {raw_bytes / 1024 / 1024:8.1f} MiB")
+    print(f"compact          {compact_bytes / 1024 / 1024:8.1f} MiB")
+    print(f"reduction        {1 - compact_bytes / raw_bytes:8.0%}")
+
+    indsatser = IndsatsClient(None)
+    assert len(indsatser.filtrer_indsats_referencer(raw[0])) == len(
+        indsatser.filtrer_indsats_referencer(compact[0])
+    )
+    for name, tree in (("raw dicts", raw[0]), ("compact", compact[0])):
+        seconds = min(
+            timeit.repeat(
+                lambda: indsatser.filtrer_indsats_referencer(tree), number=10, repeat=5
+            )
+        )
+        print(f"filtrer_indsats_referencer ({name}): {seconds / 10 * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
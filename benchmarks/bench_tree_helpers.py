@@ -0,0 +1,275 @@
+"""
+Micro-benchmark for tree_helpers on large pathwayReferences-like trees.
+
+Compares the iterative helpers with the previous recursive implementations,
+which are kept here for reference.
+
+Usage:
+    python benchmarks/bench_tree_helpers.py [--pathways N] [--repeat N]
+"""
+
+import argparse
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from kmd_nexus_client import tree_helpers  # noqa: E402
+
+
+def build_tree(pathways: int, courses: int = 10, grants: int = 25) -> list:
+    """Build a list of pathway references shaped like a Nexus citizen view."""
+    roots = []
+    for p in range(pathways):
+        roots.append(
+            {
+                "id": f"p{p}",
+                "name": f"Forløb {p}" if p else "Sundhedsfagligt grundforløb",
+                "type": "patientPathwayReference",
+                "pathwayStatus": "ACTIVE" if p % 3 else "INACTIVE",
+                "children": [
+                    {
+                        "id": f"p{p}-c{c}",
+                        "name": "FSIII" if c == 0 else f"Kursus {c}",
+                        "type": "course",
+                        "children": [
+                            {
+                                "id": f"p{p}-c{c}-g{g}",
+                                "name": f"Medicin {g}" if g % 5 == 0 else f"Indsats {g}",
+                                "type": "basketGrantReference",
+                                "workflowState": {"name": "Bestilt"},
+                                "children": [],
+                            }
+                            for g in range(grants)
+                        ],
+                    }
+                    for c in range(courses)
+                ],
+            }
+        )
+    return roots
+
+
+# --- Previous recursive implementations -------------------------------------
+
+
+def legacy_traverse_tree(node, visit_fn, children_key="children", path=None):
+    if path is None:
+        path = []
+    current_path = path + [node]
+    visit_fn(node, current_path)
+    children = node.get(children_key, [])
+    if children:
+        for child in children:
+            legacy_traverse_tree(child, visit_fn, children_key, current_path)
+
+
+def legacy_find_nodes(roots, predicate, children_key="children", find_all=True):
+    results = []
+    root_nodes = [roots] if isinstance(roots, dict) else roots
+
+    class FoundFirstMatch(Exception):
+        pass
+
+    def visit_node(node, path):
+        if predicate(node):
+            results.append(node)
+            if not find_all:
+                raise FoundFirstMatch()
+
+    try:
+        for root in root_nodes:
+            legacy_traverse_tree(root, visit_node, children_key)
+            if not find_all and results:
+                break
+    except FoundFirstMatch:
+        pass
+    return results
+
+
+def legacy_filter_by_predicate(roots, predicate, children_key="children"):
+    result = []
+    for node in roots:
+        if predicate(node):
+            result.append(node)
+        children = node.get(children_key, [])
+        if children:
+            result.extend(legacy_filter_by_predicate(children, predicate, children_key))
+    return result
+
+
+def legacy_flatten_tree(node, children_key="children"):
+    nodes = []
+
+    def visit_node(current_node, path):
+        nodes.append({k: v for k, v in current_node.items() if k != children_key})
+
+    legacy_traverse_tree(node, visit_node, children_key)
+    return nodes
+
+
+def legacy_get_node_path(roots, target_node, children_key="children"):
+    found_path = None
+
+    def visit_node(node, path):
+        nonlocal found_path
+        if found_path is None and node is target_node:
+            found_path = path.copy()
+
+    for root in [roots] if isinstance(roots, dict) else roots:
+        legacy_traverse_tree(root, visit_node, children_key)
+        if found_path:
+            break
+    return found_path
+
+
+def legacy_map_tree(node, transform_fn, children_key="children"):
+    transformed = transform_fn(node.copy())
+    children = node.get(children_key, [])
+    if children:
+        transformed[children_key] = [
+            legacy_map_tree(child, transform_fn, children_key) for child in children
+        ]
+    return transformed
+
+
+def legacy_path_matches(current_path, target_path):
+    if len(current_path) != len(target_path):
+        return False
+    for node, pattern in zip(current_path, target_path):
+        if pattern == "*":
+            continue
+        node_name = node.get("name", "")
+        node_type = node.get("type", "")
+        if pattern.endswith("%"):
+            prefix = pattern[:-1]
+            name_match = node_name.startswith(prefix)
+            type_match = node_type.startswith(prefix)
+        else:
+            escaped_pattern = re.escape(pattern).replace(r"\%", ".*")
+            name_match = re.fullmatch(escaped_pattern, node_name) is not None
+            type_match = re.fullmatch(escaped_pattern, node_type) is not None
+        if not (name_match or type_match):
+            return False
+    return True
+
+
+def legacy_filter_by_path(roots, path_pattern, active_pathways_only=False):
+    segments = re.findall(r"/([^/]+)", path_pattern)
+
+    def walk(node, current_path):
+        if (
+            active_pathways_only
+            and node.get("type") == "patientPathwayReference"
+            and node.get("pathwayStatus") != "ACTIVE"
+        ):
+            return []
+        current_path = current_path + [node]
+        if legacy_path_matches(current_path, segments):
+            return [node]
+        result = []
+        if node.get("children") and len(segments) > len(current_path):
+            for child in node["children"]:
+                result.extend(walk(child, current_path))
+        return result
+
+    results = []
+    for root in roots:
+        results.extend(walk(root, []))
+    return results
+
+
+# --- Benchmark ---------------------------------------------------------------
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pathways", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    roots = build_tree(args.pathways)
+    tree = {"id": "visning", "children": roots}
+    last = roots[-1]["children"][-1]["children"][-1]
+    node_count = len(tree_helpers.flatten_tree(tree))
+
+    def is_medicin(node):
+        return node.get("name", "").startswith("Medicin")
+
+    compiled = tree_helpers.compile_path("/*/FSIII/Medicin%")
+
+    cases = [
+        (
+            "find_nodes (all)",
+            lambda: legacy_find_nodes(roots, is_medicin),
+            lambda: tree_helpers.find_nodes(roots, is_medicin),
+        ),
+        (
+            "find_node_by_id (last)",
+            lambda: legacy_find_nodes(roots, lambda n: n.get("id") == last["id"], find_all=False),
+            lambda: tree_helpers.find_node_by_id(roots, last["id"]),
+        ),
+        (
+            "get_node_path (last)",
+            lambda: legacy_get_node_path(roots, last),
+            lambda: tree_helpers.get_node_path(roots, last),
+        ),
+        (
+            "filter_by_predicate",
+            lambda: legacy_filter_by_predicate(roots, is_medicin),
+            lambda: tree_helpers.filter_by_predicate(roots, is_medicin),
+        ),
+        (
+            "flatten_tree",
+            lambda: legacy_flatten_tree(tree),
+            lambda: tree_helpers.flatten_tree(tree),
+        ),
+        (
+            "map_tree",
+            lambda: legacy_map_tree(tree, lambda n: n),
+            lambda: tree_helpers.map_tree(tree, lambda n: n),
+        ),
+        (
+            "filter_by_path",
+            lambda: legacy_filter_by_path(roots, "/Sundhedsfagligt grundforløb/FSIII/Medicin%", True),
+            lambda: tree_helpers.filter_by_path(roots, "/Sundhedsfagligt grundforløb/FSIII/Medicin%", True),
+        ),
+        (
+            "filter_by_path (compiled)",
+            lambda: legacy_filter_by_path(roots, "/*/FSIII/Medicin%"),
+            lambda: tree_helpers.filter_by_path(roots, compiled),
+        ),
+    ]
+
+    print(f"Tree: {node_count} nodes, {len(roots)} pathways, best of {args.repeat} runs")
+    print(f"{'helper':<26}{'recursive ms':>14}{'iterative ms':>14}{'speedup':>10}")
+
+    def size(result) -> int:
+        return len(result) if isinstance(result, list) else int(result is not None)
+
+    for name, legacy, current in cases:
+        assert size(legacy()) == size(current()), name
+        old = min(timeit.repeat(legacy, number=1, repeat=args.repeat)) * 1000
+        new = min(timeit.repeat(current, number=1, repeat=args.repeat)) * 1000
+        print(f"{name:<26}{old:>14.2f}{new:>14.2f}{old / new:>9.2f}x")
+
+    # Depth the recursive helpers cannot handle
+    deep = node = {"id": 0, "children": []}
+    for i in range(1, 20000):
+        child = {"id": i, "children": []}
+        node["children"].append(child)
+        node = child
+
+    try:
+        legacy_find_nodes(deep, lambda n: n["id"] == 19999)
+        legacy_result = "ok"
+    except RecursionError:
+        legacy_result = "RecursionError"
+    found = tree_helpers.find_node_by_id(deep, 19999) is not None
+    print(f"\nChain of 20000 nodes: recursive {legacy_result}, iterative {'ok' if found else 'failed'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,15 @@ Anbefalet brug:
 
 from .client import NexusClient
 from .manager import NexusClientManager
+from .async_client import AsyncNexusClient
+from .async_manager import AsyncNexusClientManager
+from .retry import RetryPolicy, RateLimiter
+from .token_store import TokenStore, MemoryTokenStore, FileTokenStore
+from .http_cache import ResponseCache, MemoryCache, DiskCache
+from .reference_data import ReferenceDataCache
+from .compact_references import CompactReference, compact_references
+from .snapshot import BorgerSnapshot
+from .borger_cache import BorgerCache
 from . import tree_helpers
 from . import hooks
 
@@ -25,6 +34,21 @@ from .functionality.forløb import ForløbClient
 __all__ = [
     "NexusClientManager",
     "NexusClient",
+    "AsyncNexusClientManager",
+    "AsyncNexusClient",
+    "RetryPolicy",
+    "RateLimiter",
+    "TokenStore",
+    "MemoryTokenStore",
+    "FileTokenStore",
+    "ResponseCache",
+    "MemoryCache",
+    "DiskCache",
+    "ReferenceDataCache",
+    "CompactReference",
+    "compact_references",
+    "BorgerSnapshot",
+    "BorgerCache",
     "BorgerClient",
     "OrganisationerClient",
     "IndsatsClient",
@@ -0,0 +1,85 @@
+"""
+Persisted cache of the KMD Nexus API root links.
+
+The API root document rarely changes, so short-lived worker processes can read
+the link map from a local file instead of fetching it on every start.
+"""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+
+def api_cache_file(cache_dir: Union[str, Path], instance: str) -> Path:
+    """
+    Get the cache file used for an instance.
+
+    Args:
+        cache_dir: Directory holding the cache files
+        instance: The name of the Nexus instance
+
+    Returns:
+        Path to the cache file for the instance
+    """
+    return Path(cache_dir) / f"kmd-nexus-api-{instance}.json"
+
+
+def load_api_links(path: Path, base_url: str, ttl: float) -> Optional[dict]:
+    """
+    Load cached API links if the cache file exists, matches the base URL and is fresh.
+
+    Args:
+        path: Cache file
+        base_url: Base URL the links must have been fetched from
+        ttl: Maximum age of the cache in seconds
+
+    Returns:
+        The cached links, or None if the cache is missing, stale or unreadable
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(data, dict) or data.get("base_url") != base_url:
+        return None
+
+    fetched_at = data.get("fetched_at")
+    if not isinstance(fetched_at, (int, float)) or time.time() - fetched_at > ttl:
+        return None
+
+    links = data.get("links")
+    return links if isinstance(links, dict) and links else None
+
+
+def save_api_links(path: Path, base_url: str, links: dict) -> None:
+    """
+    Write API links to the cache file.
+
+    The file is written to a temporary file first and then moved into place, so
+    concurrent workers never read a half-written cache. Failures are ignored,
+    since the cache is only an optimization.
+
+    Args:
+        path: Cache file
+        base_url: Base URL the links were fetched from
+        links: The normalized API links
+    """
+    data = {"base_url": base_url, "fetched_at": time.time(), "links": links}
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
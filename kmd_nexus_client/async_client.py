@@ -0,0 +1,558 @@
+import asyncio
+import httpx
+import logging
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+from authlib.integrations.httpx_client import AsyncOAuth2Client
+from urllib.parse import urljoin
+
+from .api_cache import api_cache_file, load_api_links, save_api_links
+from .borger_cache import forget_after_write
+from .client import (
+    _pool_options,
+    _reference_href,
+    _reference_hrefs,
+    _same_resource,
+)
+from .concurrency import expand_results
+from .http_cache import (
+    ResponseCache,
+    cache_key,
+    conditional_headers,
+    entry_from_response,
+    response_from_entry,
+    revalidated_entry,
+)
+from .json_decoder import JSONArrayParser, JSONLoads, get_decoder, use_decoder
+from .hooks import STREAMING_EXTENSION, create_async_response_logging_hook, _sanitize_url
+from .retry import RateLimiter, RetryPolicy
+from .token_store import TokenStore, token_is_fresh, token_key
+
+
+class AsyncNexusClient:
+    """
+    Asynkron basis klient til KMD Nexus API kommunikation.
+
+    Spejler NexusClient, men alle netværkskald er coroutines, så mange kald kan
+    køre samtidigt fra én event loop.
+
+    VIGTIGT: Brug AsyncNexusClientManager i stedet for direkte instantiering.
+
+    Eksempel:
+        async with AsyncNexusClient(instance="...", client_id="...", client_secret="...") as client:
+            borger = await client.get(...)
+    """
+
+    api: dict
+
+    def __init__(
+        self,
+        instance: str,
+        client_id: str,
+        client_secret: str,
+        timeout: float = 30.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        api_cache_dir: Optional[Union[str, Path]] = None,
+        api_cache_ttl: float = 24 * 60 * 60,
+        token_store: Optional[TokenStore] = None,
+        token_leeway: float = 60.0,
+        http_cache: Optional[ResponseCache] = None,
+        coalesce_requests: bool = True,
+        max_connections: int = 64,
+        max_keepalive_connections: int = 32,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        log_options: Optional[dict] = None,
+        json_decoder: Union[str, JSONLoads] = "auto",
+    ):
+        """
+        Initialize the AsyncNexusClient with an instance name and client credentials.
+
+        No network calls are made here. Call ``initialize()`` (or use the client as an
+        async context manager) to fetch the token and the API links.
+
+        :param instance: The name of the Nexus instance.
+        :param client_id: The OAuth2 client ID.
+        :param client_secret: The OAuth2 client secret.
+        :param timeout: Request timeout in seconds (default: 30.0).
+        :param retry_policy: Policy for retrying failed requests (default: RetryPolicy()).
+                             Use RetryPolicy(max_retries=0) to disable retries.
+        :param rate_limiter: Optional rate limiter shared by all requests from this client.
+        :param api_cache_dir: Optional directory where the API links are persisted between processes.
+        :param api_cache_ttl: Maximum age of persisted API links in seconds (default: 24 hours).
+        :param token_store: Optional store sharing the OAuth2 token with other clients using
+                            the same instance and client ID.
+        :param token_leeway: Seconds before expiry at which the token is refreshed (default: 60).
+        :param http_cache: Optional cache for GET responses; cached bodies are revalidated
+                           with If-None-Match/If-Modified-Since and reused on 304 Not Modified.
+        :param coalesce_requests: Share one request between identical GETs that are in flight
+                                  at the same time (default: True). A GET sent after a
+                                  PUT, POST or DELETE to the same URL never joins an
+                                  earlier request.
+        :param max_connections: Maximum number of open connections to Nexus (default: 64).
+        :param max_keepalive_connections: Maximum number of idle connections kept open for reuse (default: 32).
+        :param keepalive_expiry: Seconds an idle connection is kept open (default: 30).
+        :param http2: Use HTTP/2 if the optional h2 package is installed (default: False).
+        :param log_options: Options for the response logging hook (max_body_bytes, sample_rates,
+                            log_bodies); see hooks.create_response_logging_hook.
+        :param json_decoder: JSON backend used by response.json(): "auto" (orjson or msgspec
+                             if installed, else json), a backend name or a decoding function.
+        """
+        if not instance:
+            raise ValueError("Instance name must be provided.")
+
+        self.instance = instance
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.token_store = token_store
+        self.token_leeway = token_leeway
+        self.http_cache = http_cache
+        self.coalesce_requests = coalesce_requests
+        self.json_loads = get_decoder(json_decoder)
+
+        # Construct the token and base URLs dynamically - note only works on production instances
+        self.token_url = f"https://iam.nexus.kmd.dk/authx/realms/{instance}/protocol/openid-connect/token"
+        self.base_url = (
+            f"https://{instance}.nexus.kmd.dk/api/core/mobile/{instance}/v2/"
+        )
+
+        # Set up logging
+        self.logger = logging.getLogger("kmd.nexus")
+
+        # Set httpx to a higher logging level to avoid clutter
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        logging.getLogger("httpcore").setLevel(logging.WARNING)
+
+        # Create response logging hook (async clients require awaitable hooks)
+        response_hook = create_async_response_logging_hook(
+            logger=self.logger,
+            **{"json_decoder": self.json_loads, **(log_options or {})},
+        )
+        hooks = {"response": [response_hook]}
+
+        # Set up the OAuth2 client with event hooks
+        self.client = AsyncOAuth2Client(
+            client_id=client_id,
+            client_secret=client_secret,
+            token_endpoint=self.token_url,
+            timeout=timeout,
+            event_hooks=hooks,
+            **_pool_options(
+                max_connections,
+                max_keepalive_connections,
+                keepalive_expiry,
+                http2,
+                self.logger,
+            ),
+            grant_type="client_credentials",
+            # The token is refreshed in _ensure_token; authlib's own refresh is only a fallback
+            leeway=token_leeway / 2,
+        )
+
+        self.api = {}
+        self._token_lock = asyncio.Lock()
+        self._token_key = token_key(instance, client_id)
+        self._api_cache_file = (
+            api_cache_file(api_cache_dir, instance) if api_cache_dir else None
+        )
+        self._api_cache_ttl = api_cache_ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def initialize(self) -> "AsyncNexusClient":
+        """
+        Load the API links, from the persisted cache if possible, otherwise from the base URL.
+
+        The OAuth2 token is fetched before the first request that needs it.
+
+        :return: The client itself, to allow chaining.
+        """
+        if self._api_cache_file is not None:
+            links = load_api_links(
+                self._api_cache_file, self.base_url, self._api_cache_ttl
+            )
+            if links is not None:
+                self.api = links
+                return self
+
+        await self.opdater_api()
+        return self
+
+    async def opdater_api(self) -> dict:
+        """
+        Hent API links fra Nexus igen og opdater den gemte cache.
+
+        :return: De nye API links.
+        """
+        links = self.parse_links(await self.get(self.base_url))
+        if self._api_cache_file is not None:
+            save_api_links(self._api_cache_file, self.base_url, links)
+        self.api = links
+        return links
+
+    async def _ensure_token(self) -> None:
+        """
+        Make sure the client holds a token that is valid for at least token_leeway seconds.
+
+        With a token store, the token is shared: the client holding the store's lock
+        fetches a new token and saves it, and everybody else reuses it.
+        """
+        if token_is_fresh(self.client.token, self.token_leeway):
+            return
+
+        async with self._token_lock:
+            if token_is_fresh(self.client.token, self.token_leeway):
+                return
+
+            if self.token_store is None:
+                await self.client.fetch_token()
+                return
+
+            await self._acquire_token_store()
+            try:
+                stored = self.token_store.load(self._token_key)
+                if token_is_fresh(stored, self.token_leeway):
+                    self.client.token = stored
+                else:
+                    self.token_store.save(
+                        self._token_key, await self.client.fetch_token()
+                    )
+            finally:
+                self.token_store.release(self._token_key)
+
+    async def _acquire_token_store(self) -> None:
+        """Wait for the token store's lock in a worker thread, without blocking the event loop."""
+        store, key = self.token_store, self._token_key
+        acquire = asyncio.ensure_future(asyncio.to_thread(store.acquire, key))
+
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # The worker thread may still get the lock - release it when it does
+            acquire.add_done_callback(
+                lambda f: f.cancelled() or f.exception() or store.release(key)
+            )
+            raise
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connections."""
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncNexusClient":
+        return await self.initialize()
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    def _normalize_url(self, endpoint: str) -> str:
+        """Ensure the URL is absolute, handling relative URLs."""
+        if endpoint.startswith("http://") or endpoint.startswith("https://"):
+            return endpoint
+        return urljoin(self.base_url, endpoint)
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        allow_not_modified: bool = False,
+        stream: bool = False,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Send a request, applying rate limiting and the retry policy.
+
+        :param method: HTTP method
+        :param endpoint: API endpoint (relative or absolute URL)
+        :param allow_not_modified: Return 304 Not Modified responses instead of raising
+        :param stream: Return before the body is read; the caller must close the response
+        :param kwargs: Additional arguments passed to httpx
+        :return: HTTP response
+        """
+        url = self._normalize_url(endpoint)
+        attempt = 0
+
+        while True:
+            await self._ensure_token()
+
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+
+            try:
+                if stream:
+                    request = self.client.build_request(
+                        method, url, extensions={STREAMING_EXTENSION: True}, **kwargs
+                    )
+                    response = await self.client.send(
+                        request, auth=self.client.token_auth, stream=True
+                    )
+                else:
+                    response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if not self.retry_policy.should_retry_exception(method, e, attempt):
+                    raise
+                delay = self.retry_policy.backoff(attempt)
+                self.logger.warning(
+                    f"{type(e).__name__} on {method} {_sanitize_url(httpx.URL(url))}, retrying in {delay:.1f}s"
+                )
+            else:
+                if self.rate_limiter is not None:
+                    if response.status_code == 429:
+                        self.rate_limiter.on_throttled()
+                    else:
+                        self.rate_limiter.on_success()
+
+                if not self.retry_policy.should_retry_response(
+                    method, response, attempt
+                ):
+                    if not (allow_not_modified and response.status_code == 304):
+                        if stream and not response.is_success:
+                            # Error bodies are small; read them so callers can inspect them
+                            await response.aread()
+                        response.raise_for_status()
+                    return use_decoder(response, self.json_loads)
+
+                delay = self.retry_policy.backoff(attempt, response)
+                self.logger.warning(
+                    f"HTTP {response.status_code} on {method} {_sanitize_url(httpx.URL(url))}, retrying in {delay:.1f}s"
+                )
+                await response.aclose()
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get(self, endpoint: str, **kwargs) -> httpx.Response:
+        """
+        Perform GET request to the specified endpoint.
+
+        :param endpoint: API endpoint (relative or absolute URL)
+        :param kwargs: Additional arguments passed to httpx
+        :return: HTTP response
+        """
+        if set(kwargs) - {"params"}:
+            return await self._request("GET", endpoint, **kwargs)
+
+        params = kwargs.get("params")
+        if not self.coalesce_requests:
+            return await self._get_once(endpoint, params)
+
+        key = cache_key(self._normalize_url(endpoint), params)
+        future = self._inflight.get(key)
+        if future is not None:
+            # The same GET is already in flight - wait for its response
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Only give up if this task was cancelled, not the one sending the request
+                if asyncio.current_task().cancelling():
+                    raise
+                return await self._get_once(endpoint, params)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await self._get_once(endpoint, params)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Mark the exception as retrieved when nobody else waited for it
+                future.exception()
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            # A write to the URL may already have dropped the entry
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def stream_items(self, endpoint: str, params=None) -> AsyncIterator[Any]:
+        """
+        Iterate over the items of a JSON array response while it is downloaded.
+
+        See NexusClient.stream_items.
+
+        :param endpoint: API endpoint (relative or absolute URL) returning a JSON array
+        :param params: Query parameters
+        :return: Async iterator over the array items
+        """
+        batches = self._stream_batches(endpoint, params)
+        try:
+            async for batch in batches:
+                for item in batch:
+                    yield item
+        finally:
+            await batches.aclose()
+
+    async def _stream_batches(
+        self, endpoint: str, params=None
+    ) -> AsyncIterator[List[Any]]:
+        """Yield the array items completed by each downloaded chunk."""
+        if self.http_cache is not None:
+            yield (await self.get(endpoint, params=params)).json()
+            return
+
+        response = await self._request("GET", endpoint, stream=True, params=params)
+        try:
+            parser = JSONArrayParser(self.json_loads)
+            async for chunk in response.aiter_text():
+                items = parser.feed(chunk)
+                if items:
+                    yield items
+            yield parser.close()
+        finally:
+            await response.aclose()
+
+    async def _get_once(self, endpoint: str, params=None) -> httpx.Response:
+        """Perform a single GET, through the HTTP cache if one is configured."""
+        if self.http_cache is None:
+            return await self._request("GET", endpoint, params=params)
+        return await self._cached_get(endpoint, params)
+
+    async def _cached_get(self, endpoint: str, params=None) -> httpx.Response:
+        """
+        Perform a conditional GET, serving 304 Not Modified responses from the HTTP cache.
+
+        :param endpoint: API endpoint (relative or absolute URL)
+        :param params: Query parameters
+        :return: HTTP response (a 200 built from the cache when Nexus answers 304)
+        """
+        key = cache_key(self._normalize_url(endpoint), params)
+        entry = self.http_cache.get(key)
+
+        response = await self._request(
+            "GET",
+            endpoint,
+            allow_not_modified=entry is not None,
+            params=params,
+            headers=conditional_headers(entry) if entry is not None else None,
+        )
+
+        if response.status_code == 304:
+            entry = revalidated_entry(entry, response)
+            self.http_cache.set(key, entry)
+            return use_decoder(
+                response_from_entry(entry, response.request), self.json_loads
+            )
+
+        new_entry = entry_from_response(response)
+        if new_entry is not None:
+            self.http_cache.set(key, new_entry)
+        elif entry is not None:
+            self.http_cache.delete(key)
+        return response
+
+    async def post(self, endpoint: str, json: dict, **kwargs) -> httpx.Response:
+        """
+        Perform POST request to the specified endpoint.
+
+        :param endpoint: API endpoint (relative or absolute URL)
+        :param json: JSON data to send in request body
+        :param kwargs: Additional arguments passed to httpx
+        :return: HTTP response
+        """
+        try:
+            return await self._request("POST", endpoint, json=json, **kwargs)
+        finally:
+            self._forget_inflight(endpoint)
+            forget_after_write()
+
+    async def put(self, endpoint: str, json: dict, **kwargs) -> httpx.Response:
+        """
+        Perform PUT request to the specified endpoint.
+
+        :param endpoint: API endpoint (relative or absolute URL)
+        :param json: JSON data to send in request body
+        :param kwargs: Additional arguments passed to httpx
+        :return: HTTP response
+        """
+        try:
+            return await self._request("PUT", endpoint, json=json, **kwargs)
+        finally:
+            self._forget_inflight(endpoint)
+            forget_after_write()
+
+    async def delete(self, endpoint: str, **kwargs) -> httpx.Response:
+        """
+        Perform DELETE request to the specified endpoint.
+
+        :param endpoint: API endpoint (relative or absolute URL)
+        :param kwargs: Additional arguments passed to httpx
+        :return: HTTP response
+        """
+        try:
+            return await self._request("DELETE", endpoint, **kwargs)
+        finally:
+            self._forget_inflight(endpoint)
+            forget_after_write()
+
+    def _forget_inflight(self, endpoint: str) -> None:
+        """
+        Stop sharing in-flight GETs of a URL after it has been written to.
+
+        A GET started before the write may return the old state, so later GETs of
+        the same URL must send a new request instead of joining it.
+        """
+        url = str(httpx.URL(self._normalize_url(endpoint)).copy_with(query=None))
+        for key in [k for k in self._inflight if _same_resource(k, url)]:
+            del self._inflight[key]
+
+    def parse_links(self, response: httpx.Response) -> dict:
+        """Extract and normalize links from HATEOAS JSON."""
+        links = response.json().get("_links", {})
+        normalized_links = {
+            rel: self._normalize_url(link["href"]) for rel, link in links.items()
+        }
+        return normalized_links
+
+    async def hent_fra_reference(self, reference: dict) -> dict:
+        """
+        Hent fuldt objekt fra en reference.
+
+        :param reference: Referencen der skal følges til objektet.
+        :return: Det fulde objekt.
+        """
+        response = await self.get(_reference_href(reference))
+        return response.json()
+
+    async def hent_fra_referencer_mange(
+        self,
+        referencer: List[dict],
+        max_samtidige: int = 8,
+        returner_fejl: bool = True,
+    ) -> List[Union[dict, Exception]]:
+        """
+        Hent fulde objekter fra mange referencer samtidigt.
+
+        Identiske links hentes kun én gang, og resultaterne returneres i samme
+        rækkefølge som referencerne.
+
+        :param referencer: Referencerne der skal følges til objekterne.
+        :param max_samtidige: Maksimalt antal samtidige kald (standard: 8).
+        :param returner_fejl: Hvis True returneres fejl på referencens plads i listen,
+                              ellers rejses den første fejl.
+        :return: Liste med det fulde objekt (eller fejlen) for hver reference.
+        """
+        if max_samtidige < 1:
+            raise ValueError("max_samtidige skal være mindst 1")
+
+        hrefs = _reference_hrefs(referencer)
+        unikke = list(dict.fromkeys(h for h in hrefs if isinstance(h, str)))
+        semafor = asyncio.Semaphore(max_samtidige)
+
+        async def hent(href: str) -> dict:
+            async with semafor:
+                response = await self.get(href)
+                return response.json()
+
+        hentede = dict(
+            zip(
+                unikke,
+                await asyncio.gather(
+                    *(hent(href) for href in unikke), return_exceptions=True
+                ),
+            )
+        )
+
+        return expand_results(hrefs, hentede, returner_fejl)
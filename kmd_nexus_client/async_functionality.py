@@ -0,0 +1,144 @@
+"""
+Building blocks for the functionality clients of AsyncNexusClientManager.
+
+The most used clients (borgere, skemaer, indsatser and aktivitetslister) have
+native async versions, defined next to their synchronous counterparts, that
+call AsyncNexusClient directly on the event loop. They derive from
+NativAsyncClient.
+
+Every other method, and every client without a native version, is served by
+TrådFallbackClient: the regular synchronous client runs in a worker thread,
+and each request it makes is handed back to the event loop. The fallback holds
+a worker thread for the whole call, so it is only meant for the less used
+operations.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterator
+
+if TYPE_CHECKING:
+    from kmd_nexus_client.async_client import AsyncNexusClient
+    from kmd_nexus_client.async_manager import AsyncNexusClientManager
+
+# Marks the end of a generator run in the executor
+_SLUT = object()
+
+
+class TrådFallbackClient:
+    """
+    Asynkron udgave af en synkron funktionalitets-klient, kørt i worker tråde.
+
+    Alle offentlige metoder fra den underliggende klient er tilgængelige med samme
+    navn og parametre, men skal afventes med await. Hvert kald optager en worker
+    tråd, mens det kører.
+
+    Generator-metoder giver i stedet en asynkron generator, hvor hvert skridt køres
+    i en worker tråd:
+
+        async for element in nexus.klient.iter_noget(...):
+            ...
+
+    VIGTIGT: Opret ikke denne klasse direkte!
+    Brug AsyncNexusClientManager: await nexus.organisationer.hent_organisationer()
+    """
+
+    def __init__(self, klient: Any, executor: ThreadPoolExecutor):
+        self._klient = klient
+        self._executor = executor
+
+    def __getattr__(self, navn: str) -> Any:
+        attribut = getattr(self._klient, navn)
+
+        if navn.startswith("_") or not callable(attribut):
+            return attribut
+
+        if inspect.isgeneratorfunction(attribut):
+
+            @functools.wraps(attribut)
+            def gennemløb(*args, **kwargs):
+                # Creating the generator runs none of its body, so no Nexus calls yet
+                context = contextvars.copy_context()
+                return self._gennemløb(context.run(attribut, *args, **kwargs), context)
+
+            return gennemløb
+
+        @functools.wraps(attribut)
+        async def kald(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            resultat = await loop.run_in_executor(
+                self._executor,
+                functools.partial(context.run, attribut, *args, **kwargs),
+            )
+
+            if inspect.isgenerator(resultat):
+                # Each step makes Nexus calls, so it must not run on the event loop
+                return self._gennemløb(resultat, context)
+            return resultat
+
+        return kald
+
+    async def _gennemløb(
+        self, generator: Iterator[Any], context: contextvars.Context
+    ) -> AsyncIterator[Any]:
+        """Run a generator from a functionality client one step at a time in the executor."""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                element = await loop.run_in_executor(
+                    self._executor,
+                    functools.partial(context.run, next, generator, _SLUT),
+                )
+                if element is _SLUT:
+                    return
+                yield element
+        finally:
+            # Closing runs the generator's cleanup, which may also call Nexus
+            await loop.run_in_executor(
+                self._executor, functools.partial(context.run, generator.close)
+            )
+
+    def __repr__(self) -> str:
+        return f"TrådFallbackClient({type(self._klient).__name__})"
+
+
+class NativAsyncClient:
+    """
+    Fælles grundlag for de native asynkrone funktionalitets-klienter.
+
+    Metoder med en native udgave kalder AsyncNexusClient direkte fra event loop'en.
+    Alle andre metoder fra den synkrone klient findes stadig med samme navn, men køres
+    af TrådFallbackClient i en worker tråd.
+
+    VIGTIGT: Opret ikke disse klasser direkte!
+    Brug AsyncNexusClientManager: await nexus.borgere.hent_borger(...)
+    """
+
+    def __init__(
+        self,
+        nexus_client: "AsyncNexusClient",
+        synkron: Any,
+        fallback: TrådFallbackClient,
+        manager: "AsyncNexusClientManager",
+    ):
+        """
+        :param nexus_client: Den asynkrone klient alle kald går igennem.
+        :param synkron: Den synkrone klient, hvis rene hjælpemetoder genbruges.
+        :param fallback: Kører metoder uden native udgave i worker tråde.
+        :param manager: Manageren, til opslag i andre funktionalitets-klienter.
+        """
+        self.client = nexus_client
+        self._synkron = synkron
+        self._fallback = fallback
+        self._manager = manager
+
+    def __getattr__(self, navn: str) -> Any:
+        # Only called for names the native client does not define
+        return getattr(self._fallback, navn)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
@@ -0,0 +1,413 @@
+"""
+AsyncNexusClientManager - asynchronous facade for all Nexus functionality clients.
+
+All HTTP traffic goes through a single AsyncNexusClient on the running event loop.
+The most used clients (borgere, skemaer, indsatser and aktivitetslister) have
+native async versions whose hot paths await AsyncNexusClient directly, so any
+number of them can run concurrently without holding threads.
+
+Everything else runs through TrådFallbackClient: the regular (synchronous)
+client runs in a worker thread, and every request it makes is handed back to the
+event loop through a small bridge. A fallback call holds a worker thread for its
+whole run, so at most max_samtidige of them (default 32) run at the same time;
+further fallback calls wait for a free thread.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Awaitable, Iterator, List, Optional, Union
+
+import httpx
+
+from kmd_nexus_client.async_client import AsyncNexusClient
+from kmd_nexus_client.async_functionality import TrådFallbackClient
+from kmd_nexus_client.borger_cache import forget_after_write
+from kmd_nexus_client.manager import NexusClientManager
+from kmd_nexus_client.retry import RateLimiter, RetryPolicy
+from kmd_nexus_client.token_store import TokenStore
+from kmd_nexus_client.http_cache import ResponseCache
+from kmd_nexus_client.json_decoder import JSONLoads
+from kmd_nexus_client.reference_data import ReferenceDataCache
+from kmd_nexus_client.functionality.aktivitetslister import AsyncAktivitetslisteClient
+from kmd_nexus_client.functionality.borgere import AsyncBorgerClient
+from kmd_nexus_client.functionality.indsatser import AsyncIndsatsClient
+from kmd_nexus_client.functionality.skemaer import AsyncSkemaerClient
+
+
+class _SyncNexusBridge:
+    """
+    Synkron NexusClient-grænseflade oven på en AsyncNexusClient.
+
+    Bruges af funktionalitets-klienterne, når de køres af TrådFallbackClient.
+    Metoderne må kun kaldes fra worker tråde - aldrig fra event loop'en selv.
+    """
+
+    def __init__(self, async_client: AsyncNexusClient, loop: asyncio.AbstractEventLoop):
+        self._async_client = async_client
+        self._loop = loop
+        self.instance = async_client.instance
+        self.base_url = async_client.base_url
+        self.logger = async_client.logger
+
+    @property
+    def api(self) -> dict:
+        return self._async_client.api
+
+    def _run(self, coroutine: Awaitable[Any]) -> Any:
+        """Run a coroutine on the event loop and wait for the result."""
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self._loop:
+            coroutine.close()
+            raise RuntimeError(
+                "Synkrone Nexus kald kan ikke foretages fra event loop'en - brug await."
+            )
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def _normalize_url(self, endpoint: str) -> str:
+        return self._async_client._normalize_url(endpoint)
+
+    def get(self, endpoint: str, **kwargs) -> httpx.Response:
+        return self._run(self._async_client.get(endpoint, **kwargs))
+
+    def post(self, endpoint: str, json: dict, **kwargs) -> httpx.Response:
+        # The coroutine runs in the event loop's context, so the caller's
+        # BorgerCache is updated here
+        try:
+            return self._run(self._async_client.post(endpoint, json=json, **kwargs))
+        finally:
+            forget_after_write()
+
+    def put(self, endpoint: str, json: dict, **kwargs) -> httpx.Response:
+        try:
+            return self._run(self._async_client.put(endpoint, json=json, **kwargs))
+        finally:
+            forget_after_write()
+
+    def delete(self, endpoint: str, **kwargs) -> httpx.Response:
+        try:
+            return self._run(self._async_client.delete(endpoint, **kwargs))
+        finally:
+            forget_after_write()
+
+    def stream_items(self, endpoint: str, params=None) -> Iterator[Any]:
+        # Items are handed over one downloaded chunk at a time
+        batches = self._async_client._stream_batches(endpoint, params)
+        try:
+            while True:
+                try:
+                    batch = self._run(batches.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield from batch
+        finally:
+            self._run(batches.aclose())
+
+    def parse_links(self, response: httpx.Response) -> dict:
+        return self._async_client.parse_links(response)
+
+    def hent_fra_reference(self, reference: dict) -> dict:
+        return self._run(self._async_client.hent_fra_reference(reference))
+
+    def hent_fra_referencer_mange(self, referencer: List[dict], **kwargs) -> list:
+        return self._run(
+            self._async_client.hent_fra_referencer_mange(referencer, **kwargs)
+        )
+
+
+# Functionality clients with a native async version
+_NATIVE_KLIENTER = {
+    "aktivitetslister": AsyncAktivitetslisteClient,
+    "borgere": AsyncBorgerClient,
+    "indsatser": AsyncIndsatsClient,
+    "skemaer": AsyncSkemaerClient,
+}
+
+
+class AsyncNexusClientManager:
+    """
+    Asynkron manager til nem adgang til alle Nexus funktionalitets-klienter.
+
+    Giver de samme funktionalitets-klienter som NexusClientManager, men alle
+    metoder skal afventes, og mange kald kan køre samtidigt.
+
+    borgere, skemaer, indsatser og aktivitetslister har native asynkrone udgaver af
+    de mest brugte metoder, som ikke optager tråde. Øvrige metoder køres af
+    TrådFallbackClient i worker tråde, så højst max_samtidige af dem (standard: 32)
+    kører på én gang - resten venter.
+
+    Generator-metoder bruges med async for uden await:
+
+        async for borger in nexus.borgere.iter_søg_borgere("Nancy"):
+            ...
+
+    Eksempel:
+        async with AsyncNexusClientManager(instance="...", client_id="...", client_secret="...") as nexus:
+            borgere = await asyncio.gather(
+                *(nexus.borgere.hent_borger(cpr) for cpr in cpr_numre)
+            )
+    """
+
+    def __init__(
+        self,
+        instance: str,
+        client_id: str,
+        client_secret: str,
+        timeout: float = 30.0,
+        max_samtidige: int = 32,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        api_cache_dir: Optional[Union[str, Path]] = None,
+        api_cache_ttl: float = 24 * 60 * 60,
+        token_store: Optional[TokenStore] = None,
+        token_leeway: float = 60.0,
+        http_cache: Optional[ResponseCache] = None,
+        coalesce_requests: bool = True,
+        max_connections: int = 64,
+        max_keepalive_connections: int = 32,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        log_options: Optional[dict] = None,
+        json_decoder: Union[str, JSONLoads] = "auto",
+        referencedata: Optional[ReferenceDataCache] = None,
+    ):
+        """
+        Initialize the AsyncNexusClientManager.
+
+        Args:
+            instance: The name of the Nexus instance
+            client_id: The OAuth2 client ID
+            client_secret: The OAuth2 client secret
+            timeout: Request timeout in seconds (default: 30.0)
+            max_samtidige: Maximum number of fallback calls running at the same time (default: 32).
+                Methods without a native async version hold a worker thread until they finish;
+                further fallback calls wait for a free one. Native calls are not limited.
+            retry_policy: Policy for retrying failed requests (default: RetryPolicy())
+            rate_limiter: Optional rate limiter shared by all functionality clients
+            api_cache_dir: Optional directory where the API links are persisted between processes
+            api_cache_ttl: Maximum age of persisted API links in seconds (default: 24 hours)
+            token_store: Optional store sharing the OAuth2 token between clients and processes
+            token_leeway: Seconds before expiry at which the token is refreshed (default: 60)
+            http_cache: Optional cache for GET responses, revalidated with ETag/Last-Modified
+            coalesce_requests: Share one request between identical GETs in flight at the same time (default: True)
+            max_connections: Maximum number of open connections to Nexus (default: 64)
+            max_keepalive_connections: Maximum number of idle connections kept open for reuse (default: 32)
+            keepalive_expiry: Seconds an idle connection is kept open (default: 30)
+            http2: Use HTTP/2 if the optional h2 package is installed (default: False)
+            log_options: Options for the response logging hook (max_body_bytes, sample_rates,
+                log_bodies); see hooks.create_response_logging_hook
+            json_decoder: JSON backend used by response.json(): "auto" (orjson or msgspec
+                if installed, else json), a backend name or a decoding function
+            referencedata: Optional cache of organisations, suppliers, professionals and
+                shifts shared by the functionality clients
+        """
+        self._instance = instance
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._max_samtidige = max_samtidige
+        self._referencedata = referencedata
+
+        # Store configuration for the async client
+        self._config = {
+            "timeout": timeout,
+            "retry_policy": retry_policy,
+            "rate_limiter": rate_limiter,
+            "api_cache_dir": api_cache_dir,
+            "api_cache_ttl": api_cache_ttl,
+            "token_store": token_store,
+            "token_leeway": token_leeway,
+            "http_cache": http_cache,
+            "coalesce_requests": coalesce_requests,
+            "max_connections": max_connections,
+            "max_keepalive_connections": max_keepalive_connections,
+            "keepalive_expiry": keepalive_expiry,
+            "http2": http2,
+            "log_options": log_options,
+            "json_decoder": json_decoder,
+        }
+
+        # Created when the manager is opened
+        self._nexus_client: Optional[AsyncNexusClient] = None
+        self._manager: Optional[NexusClientManager] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._clients: dict = {}
+
+    async def open(self) -> "AsyncNexusClientManager":
+        """
+        Create and initialize the AsyncNexusClient and the worker pool.
+
+        :return: The manager itself, to allow chaining.
+        """
+        if self._nexus_client is not None:
+            return self
+
+        nexus_client = AsyncNexusClient(
+            instance=self._instance,
+            client_id=self._client_id,
+            client_secret=self._client_secret,
+            **self._config,
+        )
+        await nexus_client.initialize()
+
+        self._nexus_client = nexus_client
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_samtidige, thread_name_prefix="kmd-nexus"
+        )
+        self._manager = NexusClientManager.fra_klient(
+            _SyncNexusBridge(nexus_client, asyncio.get_running_loop()),
+            referencedata=self._referencedata,
+        )
+        return self
+
+    async def aclose(self) -> None:
+        """Shut down the worker pool and close the HTTP connections."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+        if self._nexus_client is not None:
+            await self._nexus_client.aclose()
+            self._nexus_client = None
+
+        self._manager = None
+        self._clients = {}
+
+    async def __aenter__(self) -> "AsyncNexusClientManager":
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    @property
+    def nexus_client(self) -> AsyncNexusClient:
+        """Get the base AsyncNexusClient."""
+        if self._nexus_client is None:
+            raise RuntimeError(
+                "AsyncNexusClientManager er ikke åbnet - brug 'async with' eller await open()."
+            )
+        return self._nexus_client
+
+    def _funktionalitet(self, navn: str) -> Any:
+        """Get the native async client, or the thread fallback, for a functionality client."""
+        if self._manager is None:
+            raise RuntimeError(
+                "AsyncNexusClientManager er ikke åbnet - brug 'async with' eller await open()."
+            )
+
+        if navn not in self._clients:
+            synkron = getattr(self._manager, navn)
+            fallback = TrådFallbackClient(synkron, self._executor)
+            native = _NATIVE_KLIENTER.get(navn)
+            self._clients[navn] = (
+                fallback
+                if native is None
+                else native(self.nexus_client, synkron, fallback, self)
+            )
+        return self._clients[navn]
+
+    @property
+    def referencedata(self) -> Optional[ReferenceDataCache]:
+        """The reference data cache shared by the functionality clients, if configured."""
+        return self._referencedata
+
+    @property
+    def aktivitetslister(self) -> AsyncAktivitetslisteClient:
+        """Get the async AktivitetslisteClient."""
+        return self._funktionalitet("aktivitetslister")
+
+    @property
+    def borgere(self) -> AsyncBorgerClient:
+        """Get the async BorgerClient."""
+        return self._funktionalitet("borgere")
+
+    @property
+    def brugere(self) -> TrådFallbackClient:
+        """Get the async BrugereClient (thread fallback)."""
+        return self._funktionalitet("brugere")
+
+    @property
+    def organisationer(self) -> TrådFallbackClient:
+        """Get the async OrganisationerClient (thread fallback)."""
+        return self._funktionalitet("organisationer")
+
+    @property
+    def opgaver(self) -> TrådFallbackClient:
+        """Get the async OpgaverClient (thread fallback)."""
+        return self._funktionalitet("opgaver")
+
+    @property
+    def indsatser(self) -> AsyncIndsatsClient:
+        """Get the async IndsatsClient."""
+        return self._funktionalitet("indsatser")
+
+    @property
+    def kalender(self) -> TrådFallbackClient:
+        """Get the async KalenderClient (thread fallback)."""
+        return self._funktionalitet("kalender")
+
+    @property
+    def forløb(self) -> TrådFallbackClient:
+        """Get the async ForløbClient (thread fallback)."""
+        return self._funktionalitet("forløb")
+
+    @property
+    def medcom(self) -> TrådFallbackClient:
+        """Get the async MedComClient (thread fallback)."""
+        return self._funktionalitet("medcom")
+
+    @property
+    def medicin(self) -> TrådFallbackClient:
+        """Get the async MedicinClient (thread fallback)."""
+        return self._funktionalitet("medicin")
+
+    @property
+    def skemaer(self) -> AsyncSkemaerClient:
+        """Get the async SkemaerClient."""
+        return self._funktionalitet("skemaer")
+
+    @property
+    def tilstande(self) -> TrådFallbackClient:
+        """Get the async TilstandeClient (thread fallback)."""
+        return self._funktionalitet("tilstande")
+
+    async def hent_fra_reference(self, reference: dict) -> dict:
+        """
+        Hent fuldt objekt fra en reference.
+
+        Args:
+            reference: Referencen der skal følges til objektet.
+
+        Returns:
+            Det fulde objekt.
+
+        Raises:
+            ValueError: Hvis referencen ikke kan opløses.
+        """
+        return await self.nexus_client.hent_fra_reference(reference)
+
+    async def hent_fra_referencer_mange(
+        self,
+        referencer: List[dict],
+        max_samtidige: int = 8,
+        returner_fejl: bool = True,
+    ) -> List[Union[dict, Exception]]:
+        """
+        Hent fulde objekter fra mange referencer samtidigt.
+
+        Args:
+            referencer: Referencerne der skal følges til objekterne.
+            max_samtidige: Maksimalt antal samtidige kald (standard: 8).
+            returner_fejl: Hvis True returneres fejl på referencens plads i listen,
+                ellers rejses den første fejl.
+
+        Returns:
+            Liste med det fulde objekt (eller fejlen) for hver reference, i samme rækkefølge.
+        """
+        return await self.nexus_client.hent_fra_referencer_mange(
+            referencer, max_samtidige=max_samtidige, returner_fejl=returner_fejl
+        )
@@ -0,0 +1,203 @@
+"""
+Scoped cache of citizen preferences, views and reference trees.
+
+Several functionality clients need the same per-citizen objects: BorgerClient
+and KalenderClient both fetch the citizen's preferences, and SkemaerClient
+resolves the "- Alt" view and its references for every call. Inside a
+BorgerCache block these objects are fetched once and shared by all clients.
+
+The active cache is held in a context variable, so it follows the job step into
+worker threads started by the concurrency helpers and the async manager, and
+separate jobs running at the same time do not see each other's data.
+
+Writes through the Nexus client inside the block drop the cached reference
+trees, since creating or changing a form, grant or pathway changes them.
+"""
+
+import threading
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Kinds of objects that can change when the job writes to Nexus
+WRITE_SENSITIVE_KINDS = ("referencer",)
+
+# The caches entered in the current context, innermost last
+_active: ContextVar[Tuple["BorgerCache", ...]] = ContextVar(
+    "kmd_nexus_borger_cache", default=()
+)
+
+
+class BorgerCache:
+    """
+    Cache of preferences, views and reference trees for the duration of a block.
+
+    Entries are keyed by the link they were fetched from, so one cache can hold
+    several citizens. Cached objects are shared between callers and must not be
+    modified. Reference trees are dropped whenever the Nexus client writes
+    inside the block; preferences and views are kept.
+
+    One instance can be entered from several threads or tasks at once, each
+    block is tracked in its own context, and the cache is emptied when the last
+    block exits.
+
+    Example:
+        with BorgerCache():
+            visning = nexus.borgere.hent_visning(borger)
+            kalender = nexus.kalender.hent_kalender(borger)
+            skemaer = nexus.skemaer.hent_skemareferencer(borger)
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+        # Number of blocks using the cache, across all contexts
+        self._blocks = 0
+
+    def __enter__(self) -> "BorgerCache":
+        _active.set(_active.get() + (self,))
+        with self._lock:
+            self._blocks += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        active = _active.get()
+        if not active or active[-1] is not self:
+            raise RuntimeError(
+                "BorgerCache block exited in another context than it was entered in"
+            )
+
+        _active.set(active[:-1])
+        with self._lock:
+            self._blocks -= 1
+            if not self._blocks:
+                self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_fetch(self, kind: str, href: str, fetch: Callable[[], T]) -> T:
+        """
+        Get a cached object, fetching it on first use.
+
+        Args:
+            kind: Kind of object, e.g. "præferencer"
+            href: Link the object is fetched from
+            fetch: Function fetching the object
+
+        Returns:
+            The cached or newly fetched object
+        """
+        key = (kind, href)
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+
+        # Fetch outside the lock; identical GETs in flight are coalesced by the client
+        value = fetch()
+
+        with self._lock:
+            return self._entries.setdefault(key, value)
+
+    async def get_or_fetch_async(
+        self, kind: str, href: str, fetch: Callable[[], Awaitable[T]]
+    ) -> T:
+        """
+        Get a cached object, awaiting fetch on first use.
+
+        Args:
+            kind: Kind of object, e.g. "præferencer"
+            href: Link the object is fetched from
+            fetch: Coroutine function fetching the object
+
+        Returns:
+            The cached or newly fetched object
+        """
+        key = (kind, href)
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+
+        value = await fetch()
+
+        with self._lock:
+            return self._entries.setdefault(key, value)
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        """
+        Remove cached objects so they are fetched again on next use.
+
+        Args:
+            kind: Only remove objects of this kind (default: all objects)
+        """
+        with self._lock:
+            if kind is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == kind]:
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        """Remove all cached objects."""
+        self.invalidate()
+
+
+def current_cache() -> Optional[BorgerCache]:
+    """
+    Get the cache active in the current context.
+
+    Returns:
+        The innermost active BorgerCache, or None outside a BorgerCache block
+    """
+    active = _active.get()
+    return active[-1] if active else None
+
+
+def forget_after_write() -> None:
+    """
+    Drop the objects a write can change from every cache active in the current context.
+
+    Called by the Nexus clients after each POST, PUT and DELETE.
+    """
+    for cache in _active.get():
+        for kind in WRITE_SENSITIVE_KINDS:
+            cache.invalidate(kind)
+
+
+def cached(kind: str, href: str, fetch: Callable[[], T]) -> T:
+    """
+    Fetch an object through the active cache, or directly if there is none.
+
+    Args:
+        kind: Kind of object, e.g. "præferencer"
+        href: Link the object is fetched from
+        fetch: Function fetching the object
+
+    Returns:
+        The fetched object
+    """
+    cache = current_cache()
+    if cache is None:
+        return fetch()
+    return cache.get_or_fetch(kind, href, fetch)
+
+
+async def cached_async(kind: str, href: str, fetch: Callable[[], Awaitable[T]]) -> T:
+    """
+    Fetch an object through the active cache, or directly if there is none.
+
+    The async counterpart of cached, used by the native async clients.
+
+    Args:
+        kind: Kind of object, e.g. "præferencer"
+        href: Link the object is fetched from
+        fetch: Coroutine function fetching the object
+
+    Returns:
+        The fetched object
+    """
+    cache = current_cache()
+    if cache is None:
+        return await fetch()
+    return await cache.get_or_fetch_async(kind, href, fetch)
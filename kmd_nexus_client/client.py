@@ -1,9 +1,29 @@
 import httpx
+import importlib.util
 import logging
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
 from authlib.integrations.httpx_client import OAuth2Client
 from urllib.parse import urljoin
 
-from .hooks import create_response_logging_hook
+from .api_cache import api_cache_file, load_api_links, save_api_links
+from .borger_cache import forget_after_write
+from .concurrency import expand_results, map_bounded
+from .http_cache import (
+    ResponseCache,
+    cache_key,
+    conditional_headers,
+    entry_from_response,
+    response_from_entry,
+    revalidated_entry,
+)
+from .json_decoder import JSONArrayParser, JSONLoads, get_decoder, use_decoder
+from .hooks import STREAMING_EXTENSION, create_response_logging_hook, _sanitize_url
+from .retry import RateLimiter, RetryPolicy
+from .token_store import TokenStore, token_is_fresh, token_key
 
 
 class NexusClient:
@@ -13,10 +33,26 @@ class NexusClient:
     VIGTIGT: Brug NexusClientManager i stedet for direkte instantiering.
     """
 
-    api: dict
-
     def __init__(
-        self, instance: str, client_id: str, client_secret: str, timeout: float = 30.0
+        self,
+        instance: str,
+        client_id: str,
+        client_secret: str,
+        timeout: float = 30.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        api_cache_dir: Optional[Union[str, Path]] = None,
+        api_cache_ttl: float = 24 * 60 * 60,
+        token_store: Optional[TokenStore] = None,
+        token_leeway: float = 60.0,
+        http_cache: Optional[ResponseCache] = None,
+        coalesce_requests: bool = True,
+        max_connections: int = 64,
+        max_keepalive_connections: int = 32,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        log_options: Optional[dict] = None,
+        json_decoder: Union[str, JSONLoads] = "auto",
     ):
         """
         Initialize the NexusClient with an instance name and client credentials.
@@ -25,10 +61,44 @@ class NexusClient:
         :param client_id: The OAuth2 client ID.
         :param client_secret: The OAuth2 client secret.
         :param timeout: Request timeout in seconds (default: 30.0).
+        :param retry_policy: Policy for retrying failed requests (default: RetryPolicy()).
+                             Use RetryPolicy(max_retries=0) to disable retries.
+        :param rate_limiter: Optional rate limiter shared by all requests from this client.
+        :param api_cache_dir: Optional directory where the API links are persisted between processes.
+        :param api_cache_ttl: Maximum age of persisted API links in seconds (default: 24 hours).
+        :param token_store: Optional store sharing the OAuth2 token with other clients using
+                            the same instance and client ID.
+        :param token_leeway: Seconds before expiry at which the token is refreshed (default: 60).
+        :param http_cache: Optional cache for GET responses; cached bodies are revalidated
+                           with If-None-Match/If-Modified-Since and reused on 304 Not Modified.
+        :param coalesce_requests: Share one request between identical GETs that are in flight
+                                  at the same time (default: True). A GET sent after a
+                                  PUT, POST or DELETE to the same URL never joins an
+                                  earlier request.
+        :param max_connections: Maximum number of open connections to Nexus (default: 64).
+        :param max_keepalive_connections: Maximum number of idle connections kept open for reuse (default: 32).
+        :param keepalive_expiry: Seconds an idle connection is kept open (default: 30).
+        :param http2: Use HTTP/2 if the optional h2 package is installed (default: False).
+        :param log_options: Options for the response logging hook (max_body_bytes, sample_rates,
+                            log_bodies); see hooks.create_response_logging_hook.
+        :param json_decoder: JSON backend used by response.json(): "auto" (orjson or msgspec
+                             if installed, else json), a backend name or a decoding function.
+
+        No network calls are made here - the token is fetched before the first request,
+        and the API links are loaded the first time ``api`` is accessed.
         """
         if not instance:
             raise ValueError("Instance name must be provided.")
 
+        self.instance = instance
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.token_store = token_store
+        self.token_leeway = token_leeway
+        self.http_cache = http_cache
+        self.coalesce_requests = coalesce_requests
+        self.json_loads = get_decoder(json_decoder)
+
         # Construct the token and base URLs dynamically - note only works on production instances
         self.token_url = f"https://iam.nexus.kmd.dk/authx/realms/{instance}/protocol/openid-connect/token"
         self.base_url = (
@@ -43,7 +113,10 @@ class NexusClient:
         logging.getLogger("httpcore").setLevel(logging.WARNING)
 
         # Create response logging hook
-        response_hook = create_response_logging_hook(logger=self.logger)
+        response_hook = create_response_logging_hook(
+            logger=self.logger,
+            **{"json_decoder": self.json_loads, **(log_options or {})},
+        )
         hooks = {"response": [response_hook]}
 
         # Set up the OAuth2 client with event hooks
@@ -53,12 +126,98 @@ class NexusClient:
             token_endpoint=self.token_url,
             timeout=timeout,
             event_hooks=hooks,
+            **_pool_options(
+                max_connections,
+                max_keepalive_connections,
+                keepalive_expiry,
+                http2,
+                self.logger,
+            ),
+            grant_type="client_credentials",
+            # The token is refreshed in _ensure_token; authlib's own refresh is only a fallback
+            leeway=token_leeway / 2,
+        )
+
+        # Token and API links are loaded lazily on first use
+        self._token_lock = threading.Lock()
+        self._token_key = token_key(instance, client_id)
+        self._api: Optional[dict] = None
+        self._api_lock = threading.Lock()
+        self._api_cache_file = (
+            api_cache_file(api_cache_dir, instance) if api_cache_dir else None
         )
+        self._api_cache_ttl = api_cache_ttl
+
+        # Identical GETs in flight, shared between threads
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    @property
+    def api(self) -> dict:
+        """The API links from the base URL (loaded on first access)."""
+        if self._api is None:
+            with self._api_lock:
+                if self._api is None:
+                    self._api = self._load_api()
+        return self._api
+
+    @api.setter
+    def api(self, links: dict) -> None:
+        self._api = links
+
+    def _load_api(self) -> dict:
+        """Load the API links from the persisted cache, or fetch them from Nexus."""
+        if self._api_cache_file is not None:
+            links = load_api_links(
+                self._api_cache_file, self.base_url, self._api_cache_ttl
+            )
+            if links is not None:
+                return links
+
+        links = self.parse_links(self.get(self.base_url))
+
+        if self._api_cache_file is not None:
+            save_api_links(self._api_cache_file, self.base_url, links)
+
+        return links
+
+    def opdater_api(self) -> dict:
+        """
+        Hent API links fra Nexus igen og opdater den gemte cache.
+
+        :return: De nye API links.
+        """
+        with self._api_lock:
+            links = self.parse_links(self.get(self.base_url))
+            if self._api_cache_file is not None:
+                save_api_links(self._api_cache_file, self.base_url, links)
+            self._api = links
+        return links
+
+    def _ensure_token(self) -> None:
+        """
+        Make sure the client holds a token that is valid for at least token_leeway seconds.
+
+        With a token store, the token is shared: the client holding the store's lock
+        fetches a new token and saves it, and everybody else reuses it.
+        """
+        if token_is_fresh(self.client.token, self.token_leeway):
+            return
 
-        # Automatically fetch the token during initialization
-        self.client.fetch_token()
+        with self._token_lock:
+            if token_is_fresh(self.client.token, self.token_leeway):
+                return
 
-        self.api = self.parse_links(self.get(self.base_url))
+            if self.token_store is None:
+                self.client.fetch_token()
+                return
+
+            with self.token_store.lock(self._token_key):
+                stored = self.token_store.load(self._token_key)
+                if token_is_fresh(stored, self.token_leeway):
+                    self.client.token = stored
+                else:
+                    self.token_store.save(self._token_key, self.client.fetch_token())
 
     def _normalize_url(self, endpoint: str) -> str:
         """Ensure the URL is absolute, handling relative URLs."""
@@ -66,6 +225,76 @@ class NexusClient:
             return endpoint
         return urljoin(self.base_url, endpoint)
 
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        allow_not_modified: bool = False,
+        stream: bool = False,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Send a request, applying rate limiting and the retry policy.
+
+        :param method: HTTP method
+        :param endpoint: API endpoint (relative or absolute URL)
+        :param allow_not_modified: Return 304 Not Modified responses instead of raising
+        :param stream: Return before the body is read; the caller must close the response
+        :param kwargs: Additional arguments passed to httpx
+        :return: HTTP response
+        """
+        url = self._normalize_url(endpoint)
+        attempt = 0
+
+        while True:
+            self._ensure_token()
+
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            try:
+                if stream:
+                    request = self.client.build_request(
+                        method, url, extensions={STREAMING_EXTENSION: True}, **kwargs
+                    )
+                    response = self.client.send(
+                        request, auth=self.client.token_auth, stream=True
+                    )
+                else:
+                    response = self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if not self.retry_policy.should_retry_exception(method, e, attempt):
+                    raise
+                delay = self.retry_policy.backoff(attempt)
+                self.logger.warning(
+                    f"{type(e).__name__} on {method} {_sanitize_url(httpx.URL(url))}, retrying in {delay:.1f}s"
+                )
+            else:
+                if self.rate_limiter is not None:
+                    if response.status_code == 429:
+                        self.rate_limiter.on_throttled()
+                    else:
+                        self.rate_limiter.on_success()
+
+                if not self.retry_policy.should_retry_response(
+                    method, response, attempt
+                ):
+                    if not (allow_not_modified and response.status_code == 304):
+                        if stream and not response.is_success:
+                            # Error bodies are small; read them so callers can inspect them
+                            response.read()
+                        response.raise_for_status()
+                    return use_decoder(response, self.json_loads)
+
+                delay = self.retry_policy.backoff(attempt, response)
+                self.logger.warning(
+                    f"HTTP {response.status_code} on {method} {_sanitize_url(httpx.URL(url))}, retrying in {delay:.1f}s"
+                )
+                response.close()
+
+            time.sleep(delay)
+            attempt += 1
+
     def get(self, endpoint: str, **kwargs) -> httpx.Response:
         """
         Perform GET request to the specified endpoint.
@@ -74,9 +303,106 @@ class NexusClient:
         :param kwargs: Additional arguments passed to httpx
         :return: HTTP response
         """
-        url = self._normalize_url(endpoint)
-        response = self.client.get(url, **kwargs)
-        response.raise_for_status()
+        if set(kwargs) - {"params"}:
+            return self._request("GET", endpoint, **kwargs)
+
+        params = kwargs.get("params")
+        if not self.coalesce_requests:
+            return self._get_once(endpoint, params)
+
+        key = cache_key(self._normalize_url(endpoint), params)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            # The same GET is already in flight in another thread - wait for its response
+            return future.result()
+
+        try:
+            response = self._get_once(endpoint, params)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with self._inflight_lock:
+                # A write to the URL may already have dropped the entry
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+    def stream_items(self, endpoint: str, params=None) -> Iterator[Any]:
+        """
+        Iterate over the items of a JSON array response while it is downloaded.
+
+        Items are parsed as they arrive, so memory use does not grow with the size of
+        the array, and breaking out of the loop stops the download. Failed requests are
+        retried like any other GET, but errors after the first item has been yielded
+        are raised to the caller.
+
+        Each item is decoded with the client's configured JSON decoder.
+
+        With an HTTP cache configured the response goes through get instead, so it can
+        be revalidated and reused.
+
+        :param endpoint: API endpoint (relative or absolute URL) returning a JSON array
+        :param params: Query parameters
+        :return: Iterator over the array items
+        """
+        if self.http_cache is not None:
+            yield from self.get(endpoint, params=params).json()
+            return
+
+        response = self._request("GET", endpoint, stream=True, params=params)
+        try:
+            parser = JSONArrayParser(self.json_loads)
+            for chunk in response.iter_text():
+                yield from parser.feed(chunk)
+            yield from parser.close()
+        finally:
+            response.close()
+
+    def _get_once(self, endpoint: str, params=None) -> httpx.Response:
+        """Perform a single GET, through the HTTP cache if one is configured."""
+        if self.http_cache is None:
+            return self._request("GET", endpoint, params=params)
+        return self._cached_get(endpoint, params)
+
+    def _cached_get(self, endpoint: str, params=None) -> httpx.Response:
+        """
+        Perform a conditional GET, serving 304 Not Modified responses from the HTTP cache.
+
+        :param endpoint: API endpoint (relative or absolute URL)
+        :param params: Query parameters
+        :return: HTTP response (a 200 built from the cache when Nexus answers 304)
+        """
+        key = cache_key(self._normalize_url(endpoint), params)
+        entry = self.http_cache.get(key)
+
+        response = self._request(
+            "GET",
+            endpoint,
+            allow_not_modified=entry is not None,
+            params=params,
+            headers=conditional_headers(entry) if entry is not None else None,
+        )
+
+        if response.status_code == 304:
+            entry = revalidated_entry(entry, response)
+            self.http_cache.set(key, entry)
+            return use_decoder(
+                response_from_entry(entry, response.request), self.json_loads
+            )
+
+        new_entry = entry_from_response(response)
+        if new_entry is not None:
+            self.http_cache.set(key, new_entry)
+        elif entry is not None:
+            self.http_cache.delete(key)
         return response
 
     def post(self, endpoint: str, json: dict, **kwargs) -> httpx.Response:
@@ -88,10 +414,11 @@ class NexusClient:
         :param kwargs: Additional arguments passed to httpx
         :return: HTTP response
         """
-        url = self._normalize_url(endpoint)
-        response = self.client.post(url, json=json, **kwargs)
-        response.raise_for_status()
-        return response
+        try:
+            return self._request("POST", endpoint, json=json, **kwargs)
+        finally:
+            self._forget_inflight(endpoint)
+            forget_after_write()
 
     def put(self, endpoint: str, json: dict, **kwargs) -> httpx.Response:
         """
@@ -102,10 +429,11 @@ class NexusClient:
         :param kwargs: Additional arguments passed to httpx
         :return: HTTP response
         """
-        url = self._normalize_url(endpoint)
-        response = self.client.put(url, json=json, **kwargs)
-        response.raise_for_status()
-        return response
+        try:
+            return self._request("PUT", endpoint, json=json, **kwargs)
+        finally:
+            self._forget_inflight(endpoint)
+            forget_after_write()
 
     def delete(self, endpoint: str, **kwargs) -> httpx.Response:
         """
@@ -115,10 +443,23 @@ class NexusClient:
         :param kwargs: Additional arguments passed to httpx
         :return: HTTP response
         """
-        url = self._normalize_url(endpoint)
-        response = self.client.delete(url, **kwargs)
-        response.raise_for_status()
-        return response
+        try:
+            return self._request("DELETE", endpoint, **kwargs)
+        finally:
+            self._forget_inflight(endpoint)
+            forget_after_write()
+
+    def _forget_inflight(self, endpoint: str) -> None:
+        """
+        Stop sharing in-flight GETs of a URL after it has been written to.
+
+        A GET started before the write may return the old state, so later GETs of
+        the same URL must send a new request instead of joining it.
+        """
+        url = str(httpx.URL(self._normalize_url(endpoint)).copy_with(query=None))
+        with self._inflight_lock:
+            for key in [k for k in self._inflight if _same_resource(k, url)]:
+                del self._inflight[key]
 
     def parse_links(self, response: httpx.Response) -> dict:
         """Extract and normalize links from HATEOAS JSON."""
@@ -135,12 +476,84 @@ class NexusClient:
         :param reference: Referencen der skal følges til objektet.
         :return: Det fulde objekt.
         """
-        if "referencedObject" in reference["_links"]:
-            return self.get(reference["_links"]["referencedObject"]["href"]).json()
+        return self.get(_reference_href(reference)).json()
 
-        if "self" in reference["_links"]:
-            return self.get(reference["_links"]["self"]["href"]).json()
+    def hent_fra_referencer_mange(
+        self,
+        referencer: List[dict],
+        max_samtidige: int = 8,
+        returner_fejl: bool = True,
+    ) -> List[Union[dict, Exception]]:
+        """
+        Hent fulde objekter fra mange referencer samtidigt.
+
+        Identiske links hentes kun én gang, og resultaterne returneres i samme
+        rækkefølge som referencerne.
 
-        raise ValueError(
-            "Kan ikke hente fra reference - hverken referencedObject eller self link fundet."
+        :param referencer: Referencerne der skal følges til objekterne.
+        :param max_samtidige: Maksimalt antal samtidige kald (standard: 8).
+        :param returner_fejl: Hvis True returneres fejl på referencens plads i listen,
+                              ellers rejses den første fejl.
+        :return: Liste med det fulde objekt (eller fejlen) for hver reference.
+        """
+        hrefs = _reference_hrefs(referencer)
+        unikke = list(dict.fromkeys(h for h in hrefs if isinstance(h, str)))
+        hentede = dict(
+            zip(
+                unikke,
+                map_bounded(lambda href: self.get(href).json(), unikke, max_samtidige),
+            )
         )
+
+        return expand_results(hrefs, hentede, returner_fejl)
+
+
+def _pool_options(
+    max_connections: int,
+    max_keepalive_connections: int,
+    keepalive_expiry: float,
+    http2: bool,
+    logger: logging.Logger,
+) -> dict:
+    """Build the connection pool arguments for the httpx client."""
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested, but the h2 package is not installed - using HTTP/1.1")
+        http2 = False
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        "http2": http2,
+    }
+
+
+def _reference_href(reference: dict) -> str:
+    """Find the link to follow for a reference (referencedObject before self)."""
+    if "referencedObject" in reference["_links"]:
+        return reference["_links"]["referencedObject"]["href"]
+
+    if "self" in reference["_links"]:
+        return reference["_links"]["self"]["href"]
+
+    raise ValueError(
+        "Kan ikke hente fra reference - hverken referencedObject eller self link fundet."
+    )
+
+
+def _reference_hrefs(referencer: List[dict]) -> List[Union[str, Exception]]:
+    """Find the link for each reference, with the error in place of invalid references."""
+    hrefs = []
+    for reference in referencer:
+        try:
+            hrefs.append(_reference_href(reference))
+        except (KeyError, TypeError, ValueError) as e:
+            hrefs.append(e)
+    return hrefs
+
+
+def _same_resource(key: str, url: str) -> bool:
+    """Check whether an in-flight GET key is for url, with or without query parameters."""
+    return key == url or key.startswith(url + "?")
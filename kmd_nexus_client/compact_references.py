@@ -0,0 +1,224 @@
+"""
+Compact, read-only representation of pathway reference trees.
+
+The pathwayReferences response is a deep tree of dicts, where every node carries
+its own _links map and copies of the same workflowState objects. Holding the trees
+for many citizens at once costs a lot of memory. CompactReference keeps the common
+fields in slots, stores links as interned hrefs and shares identical nested values
+between nodes, while still behaving like a read-only dict, so tree_helpers and the
+functionality clients can use it directly.
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+
+# JSON keys stored in slots, in the order they are listed
+_SLOT_KEYS: Tuple[Tuple[str, str], ...] = (
+    ("id", "id"),
+    ("type", "type"),
+    ("name", "name"),
+    ("date", "date"),
+    ("workflowState", "workflow_state"),
+    ("pathwayStatus", "pathway_status"),
+    ("children", "children"),
+)
+_SLOT_BY_KEY = dict(_SLOT_KEYS)
+
+
+class CompactReference(Mapping):
+    """
+    A single node in a compact reference tree.
+
+    Supports the read-only dict interface (``node["name"]``, ``node.get(...)``,
+    ``in``, iteration), and the common fields are also available as attributes.
+    ``_links`` is rebuilt on access from the stored hrefs.
+
+    Nested values such as workflowState are shared between nodes with the same
+    value and must not be modified. Use to_dict to get a regular, mutable copy.
+    """
+
+    __slots__ = (
+        "id",
+        "type",
+        "name",
+        "date",
+        "workflow_state",
+        "pathway_status",
+        "children",
+        "_links_compact",
+        "_extra",
+    )
+
+    def __getitem__(self, key: str) -> Any:
+        slot = _SLOT_BY_KEY.get(key)
+        try:
+            if slot is not None:
+                return getattr(self, slot)
+            if key == "_links":
+                return _expand_links(self._links_compact)
+            return self._extra[key]
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        for key, slot in _SLOT_KEYS:
+            if hasattr(self, slot):
+                yield key
+        if hasattr(self, "_links_compact"):
+            yield "_links"
+        if hasattr(self, "_extra"):
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return (
+            f"CompactReference(type={self.get('type')!r}, "
+            f"name={self.get('name')!r}, id={self.get('id')!r})"
+        )
+
+    def copy(self) -> Dict[str, Any]:
+        """
+        Get a shallow dict copy of the node.
+
+        Returns:
+            Dict with the node's fields; children stay compact
+        """
+        return dict(self.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the node and its subtree back to regular dicts.
+
+        Returns:
+            A tree of dicts equal to the response the node was built from
+        """
+        return _expand(self)
+
+
+def compact_references(
+    references: Union[Dict[str, Any], List[Dict[str, Any]]],
+) -> List[CompactReference]:
+    """
+    Convert a reference tree to compact nodes.
+
+    Strings are interned, links are reduced to their hrefs, and equal nested values
+    are stored once for the whole tree. The input is not modified.
+
+    Args:
+        references: Single reference or list of references, e.g. the result of
+            BorgerClient.hent_referencer
+
+    Returns:
+        List of compact root nodes
+    """
+    roots = references if isinstance(references, list) else [references]
+    shared: Dict[Any, Any] = {}
+    result: List[CompactReference] = []
+
+    # Each entry is a raw node and the children list its compact node goes into
+    stack: List[Tuple[Dict[str, Any], List[CompactReference]]] = [
+        (root, result) for root in reversed(roots)
+    ]
+
+    while stack:
+        raw, target = stack.pop()
+        node = CompactReference()
+        extra = {}
+
+        for key, value in raw.items():
+            slot = _SLOT_BY_KEY.get(key)
+            if slot == "children":
+                continue
+            if slot is not None:
+                setattr(node, slot, _share(value, shared))
+            elif key == "_links" and isinstance(value, dict):
+                node._links_compact = _compact_links(value, shared)
+            else:
+                extra[sys.intern(key)] = _share(value, shared)
+
+        if extra:
+            node._extra = extra
+
+        target.append(node)
+
+        children = raw.get("children")
+        if children is not None:
+            node.children = []
+            stack.extend((child, node.children) for child in reversed(children))
+
+    return result
+
+
+def _compact_links(
+    links: Dict[str, Any], shared: Dict[Any, Any]
+) -> Tuple[Tuple[str, Any], ...]:
+    """Reduce a _links map to (rel, href) pairs; links with more than an href are shared as-is."""
+    compact = []
+    for rel, link in links.items():
+        if isinstance(link, dict) and len(link) == 1 and isinstance(link.get("href"), str):
+            compact.append((sys.intern(rel), sys.intern(link["href"])))
+        else:
+            compact.append((sys.intern(rel), _share(link, shared)))
+    return tuple(compact)
+
+
+def _expand_links(compact: Tuple[Tuple[str, Any], ...]) -> Dict[str, Any]:
+    """Rebuild a _links map from its compact form."""
+    return {
+        rel: {"href": link} if isinstance(link, str) else link for rel, link in compact
+    }
+
+
+def _share(value: Any, shared: Dict[Any, Any]) -> Any:
+    """Intern strings and return one shared instance for equal nested values."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if not isinstance(value, (dict, list)):
+        return value
+    return shared.setdefault(_freeze(value), value)
+
+
+def _freeze(value: Any) -> Any:
+    """Build a hashable key for a JSON value."""
+    if isinstance(value, dict):
+        return (dict, tuple((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return (list, tuple(_freeze(v) for v in value))
+    # The type keeps True, 1 and 1.0 apart
+    return (value.__class__, value)
+
+
+def _expand(root: CompactReference) -> Dict[str, Any]:
+    """Convert a compact tree back to dicts without recursion."""
+    result: List[Dict[str, Any]] = []
+    stack: List[Tuple[CompactReference, List[Dict[str, Any]]]] = [(root, result)]
+
+    while stack:
+        node, target = stack.pop()
+        converted = {}
+
+        for key in node:
+            if key == "children":
+                converted[key] = children = []
+                stack.extend((child, children) for child in reversed(node.children))
+            else:
+                # Shared values are copied so the result can be modified freely
+                value = node[key]
+                converted[key] = _copy_json(value)
+
+        target.append(converted)
+
+    return result[0]
+
+
+def _copy_json(value: Any) -> Any:
+    """Copy a nested JSON value."""
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    return value
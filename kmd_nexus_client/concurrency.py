@@ -0,0 +1,314 @@
+"""
+Bounded concurrency helpers for running many Nexus calls at once.
+
+The underlying httpx client is thread-safe, so independent requests can be
+spread over a small thread pool. The helpers keep results in input order and
+propagate context variables to the worker threads. imap_bounded_async does the
+same for coroutines on an event loop.
+"""
+
+import asyncio
+import contextvars
+import copy
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_EXHAUSTED = object()
+
+
+def map_bounded(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = 8,
+    return_exceptions: bool = True,
+) -> List[Union[R, Exception]]:
+    """
+    Call fn for every item with at most max_workers calls in flight.
+
+    Args:
+        fn: Function to call for each item
+        items: Items to process
+        max_workers: Maximum number of concurrent calls (default: 8)
+        return_exceptions: If True, exceptions are returned in place of results;
+            if False, the first exception (in input order) is raised
+
+    Returns:
+        Results in the same order as items
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+
+    items = list(items)
+    if not items:
+        return []
+
+    def call(item: T) -> Union[R, Exception]:
+        try:
+            return fn(item)
+        except Exception as e:
+            return e
+
+    if max_workers == 1 or len(items) == 1:
+        results = [call(item) for item in items]
+    else:
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(items)), thread_name_prefix="kmd-nexus"
+        ) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, call, item)
+                for item in items
+            ]
+            results = [future.result() for future in futures]
+
+    if not return_exceptions:
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+    return results
+
+
+def expand_results(
+    keys: Sequence[Union[Hashable, Exception]],
+    results: Dict[Hashable, Any],
+    return_exceptions: bool = True,
+) -> List[Any]:
+    """
+    Map results fetched once per unique key back onto a list with repeated keys.
+
+    Used after deduplicating the keys before a map_bounded call. Repeated keys
+    get their own deep copy of the result, so changing one does not change the
+    others. Exceptions in keys (e.g. invalid input found before fetching) are
+    kept in place.
+
+    Args:
+        keys: Key for every position, or the exception for that position
+        results: Result (or exception) for every unique key
+        return_exceptions: If True, exceptions are returned in place of results;
+            if False, the first exception (in input order) is raised
+
+    Returns:
+        Results in the same order as keys
+    """
+    expanded = []
+    seen = set()
+    for key in keys:
+        if isinstance(key, Exception):
+            expanded.append(key)
+            continue
+
+        result = results[key]
+        if key in seen and not isinstance(result, BaseException):
+            result = copy.deepcopy(result)
+        seen.add(key)
+        expanded.append(result)
+
+    if not return_exceptions:
+        for result in expanded:
+            if isinstance(result, BaseException):
+                raise result
+
+    return expanded
+
+def imap_bounded(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = 8,
+) -> Iterator[R]:
+    """
+    Call fn for every item concurrently and yield the results in input order.
+
+    At most max_workers calls run at once, and new calls are only started as
+    results are consumed, so a slow consumer does not build up a backlog. If the
+    caller stops iterating, calls that have not started are cancelled.
+
+    Args:
+        fn: Function to call for each item
+        items: Items to process (consumed lazily)
+        max_workers: Maximum number of concurrent calls (default: 8)
+
+    Yields:
+        Results in the same order as items
+
+    Raises:
+        Exception: The first exception (in input order) raised by fn
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+
+    items = iter(items)
+
+    if max_workers == 1:
+        for item in items:
+            yield fn(item)
+        return
+
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="kmd-nexus"
+    )
+    pending: Deque[Future] = deque()
+
+    def submit_next() -> None:
+        item = next(items, _EXHAUSTED)
+        if item is not _EXHAUSTED:
+            pending.append(executor.submit(contextvars.copy_context().run, fn, item))
+
+    try:
+        for _ in range(max_workers):
+            submit_next()
+
+        while pending:
+            result = pending.popleft().result()
+            submit_next()
+            yield result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def imap_bounded_async(
+    fn: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    max_concurrent: int = 8,
+) -> AsyncIterator[R]:
+    """
+    Await fn for every item concurrently and yield the results in input order.
+
+    The async counterpart of imap_bounded: at most max_concurrent calls run at
+    once, new calls are only started as results are consumed, and calls still
+    running are cancelled if the caller stops iterating.
+
+    Args:
+        fn: Coroutine function to call for each item
+        items: Items to process (consumed lazily)
+        max_concurrent: Maximum number of concurrent calls (default: 8)
+
+    Yields:
+        Results in the same order as items
+
+    Raises:
+        Exception: The first exception (in input order) raised by fn
+    """
+    if max_concurrent < 1:
+        raise ValueError("max_concurrent must be at least 1")
+
+    items = iter(items)
+    pending: Deque[asyncio.Future] = deque()
+
+    def start_next() -> None:
+        item = next(items, _EXHAUSTED)
+        if item is not _EXHAUSTED:
+            pending.append(asyncio.ensure_future(fn(item)))
+
+    try:
+        for _ in range(max_concurrent):
+            start_next()
+
+        while pending:
+            result = await pending.popleft()
+            start_next()
+            yield result
+    finally:
+        for task in pending:
+            task.cancel()
+        # Collect the cancelled calls so their errors are not reported as unhandled
+        await asyncio.gather(*pending, return_exceptions=True)
+
+def run_graph(
+    tasks: Dict[str, Tuple[Callable[..., Any], Sequence[str]]],
+    max_workers: int = 8,
+) -> Dict[str, Union[Any, Exception]]:
+    """
+    Run a graph of dependent calls, starting each one as soon as its inputs are ready.
+
+    Independent calls run concurrently, so the total time is the longest chain of
+    dependent calls rather than the sum of all calls.
+
+    Args:
+        tasks: Mapping from task name to (fn, dependencies). fn is called with the
+            results of the named dependencies as positional arguments, in order.
+        max_workers: Maximum number of concurrent calls (default: 8)
+
+    Returns:
+        Result (or raised exception) for every task. A task whose dependency failed
+        is not called and gets the dependency's exception.
+
+    Raises:
+        ValueError: If a dependency is unknown or the graph has a cycle
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+
+    for name, (_, dependencies) in tasks.items():
+        for dependency in dependencies:
+            if dependency not in tasks:
+                raise ValueError(f"Task {name!r} depends on unknown task {dependency!r}")
+
+    results: Dict[str, Any] = {}
+    waiting = dict(tasks)
+
+    def ready() -> List[str]:
+        return [
+            name
+            for name, (_, dependencies) in waiting.items()
+            if all(dependency in results for dependency in dependencies)
+        ]
+
+    def arguments(name: str) -> Union[List[Any], Exception]:
+        values = [results[dependency] for dependency in tasks[name][1]]
+        for value in values:
+            if isinstance(value, Exception):
+                return value
+        return values
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="kmd-nexus"
+    ) as executor:
+        running: Dict[Future, str] = {}
+
+        while waiting or running:
+            startable = ready()
+            while startable:
+                for name in startable:
+                    fn, _ = waiting.pop(name)
+                    args = arguments(name)
+                    if isinstance(args, Exception):
+                        # Skipped tasks can make their own dependents ready
+                        results[name] = args
+                        continue
+                    future = executor.submit(contextvars.copy_context().run, fn, *args)
+                    running[future] = name
+                startable = ready()
+
+            if not running:
+                if waiting:
+                    raise ValueError(f"Tasks {sorted(waiting)} have a dependency cycle")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    results[name] = e
+
+    return {name: results[name] for name in tasks}
@@ -1,5 +1,7 @@
-from typing import Optional 
+from typing import AsyncIterator, Iterator, Optional
+from kmd_nexus_client.async_functionality import NativAsyncClient
 from kmd_nexus_client.client import NexusClient
+from kmd_nexus_client.concurrency import imap_bounded, imap_bounded_async
 
 
 class AktivitetslisteClient:
@@ -14,60 +16,254 @@ class AktivitetslisteClient:
         self.client = nexus_client
 
     def hent_aktivitetsliste(
-        self, navn: str, organisation: Optional[dict], medarbejder: Optional[dict], antal_sider: int = 50
+        self,
+        navn: str,
+        organisation: Optional[dict],
+        medarbejder: Optional[dict],
+        antal_sider: int = 50,
+        max_samtidige: int = 8,
     ) -> list[dict] | None:
-        
+        """
+        Hent alle aktiviteter fra en aktivitetsliste.
+
+        Siderne hentes samtidigt, men aktiviteterne returneres i sidernes rækkefølge.
+
+        :param navn: Navnet på aktivitetslisten.
+        :param organisation: Valgfri organisation at filtrere på.
+        :param medarbejder: Valgfri medarbejder at filtrere på.
+        :param antal_sider: Sidestørrelse og maksimalt antal sider (standard: 50).
+        :param max_samtidige: Maksimalt antal sider der hentes samtidigt (standard: 8).
+        :return: Aktiviteterne, eller None hvis aktivitetslisten ikke findes.
+        """
+        sider = self._hent_sider(navn, organisation, medarbejder, antal_sider)
+
+        if sider is None:
+            return None
+
+        return list(self._hent_aktiviteter(sider, max_samtidige))
+
+    def iter_aktivitetsliste(
+        self,
+        navn: str,
+        organisation: Optional[dict],
+        medarbejder: Optional[dict],
+        antal_sider: int = 50,
+        max_samtidige: int = 8,
+    ) -> Iterator[dict]:
+        """
+        Gennemløb aktiviteterne i en aktivitetsliste, efterhånden som siderne hentes.
+
+        Aktiviteterne kommer i sidernes rækkefølge. Stoppes gennemløbet, hentes der
+        ikke flere sider.
+
+        :param navn: Navnet på aktivitetslisten.
+        :param organisation: Valgfri organisation at filtrere på.
+        :param medarbejder: Valgfri medarbejder at filtrere på.
+        :param antal_sider: Sidestørrelse og maksimalt antal sider (standard: 50).
+        :param max_samtidige: Maksimalt antal sider der hentes samtidigt (standard: 8).
+        :return: Iterator over aktiviteterne.
+        """
+        sider = self._hent_sider(navn, organisation, medarbejder, antal_sider)
+
+        if sider is None:
+            raise ValueError(f"Aktivitetslisten '{navn}' findes ikke.")
+
+        return self._hent_aktiviteter(sider, max_samtidige)
+
+    def _hent_sider(
+        self,
+        navn: str,
+        organisation: Optional[dict],
+        medarbejder: Optional[dict],
+        antal_sider: int,
+    ) -> list[str] | None:
+        """Find links til siderne i aktivitetslisten (højst antal_sider)."""
         præferencer = self.client.get("preferences").json()
-        aktivitetsliste = next(
-            (item for item in præferencer.get("ACTIVITY_LIST", []) if item.get("name") == navn),
-            None
-        )
+        aktivitetsliste = _find_aktivitetsliste(præferencer, navn)
         
         if not aktivitetsliste:
             return None
 
         aktivitetsliste = self.client.get(aktivitetsliste["_links"]["self"]["href"]).json()
-        base_content_url = aktivitetsliste["_links"]["content"]["href"]
-
-        # FIXED: correct ordering
-        if organisation and medarbejder:
-            content_url = (base_content_url +
-                        f"&pageSize={antal_sider}"
-                        f"&assignmentOrganizationAssignee={organisation['id']}"
-                        f"&assignmentProfessionalAssignee={medarbejder['id']}")
-        elif organisation:
-            content_url = (base_content_url +
-                        f"&pageSize={antal_sider}"
-                        f"&assignmentOrganizationAssignee={organisation['id']}"
-                        f"&assignmentProfessionalAssignee=NO_PROFESSIONAL_CRITERIA")
-        elif medarbejder:
-            content_url = (base_content_url +
-                        f"&pageSize={antal_sider}"
-                        f"&assignmentOrganizationAssignee=ALL_ORGANIZATIONS"
-                        f"&assignmentProfessionalAssignee={medarbejder['id']}")
-        else:
-            content_url = (base_content_url +
-                        f"&pageSize={antal_sider}"
-                        f"&assignmentOrganizationAssignee=ALL_ORGANIZATIONS"
-                        f"&assignmentProfessionalAssignee=NO_PROFESSIONAL_CRITERIA")
-
-        activities_list = []
-
-        # Removed try/except, unless you want custom error handling
-        response = self.client.get(content_url)
-        activities_data = response.json()
-
-        pages = activities_data.get("pages", [])
-
-        for i, page in enumerate(pages):
-            if i >= antal_sider:
-                break
-
-            temp_activity = self.client.get(page["_links"]["content"]["href"]).json()
-
-            if isinstance(temp_activity, list):
-                for activity in temp_activity:
-                    if isinstance(activity, dict) and "id" in activity:
-                        activities_list.append(activity)
-
-        return activities_list
\ No newline at end of file
+        content_url = _indholds_url(aktivitetsliste, organisation, medarbejder, antal_sider)
+
+        activities_data = self.client.get(content_url).json()
+        return _side_links(activities_data, antal_sider)
+
+    def _hent_aktiviteter(self, sider: list[str], max_samtidige: int) -> Iterator[dict]:
+        """Hent siderne samtidigt og returner aktiviteterne i sidernes rækkefølge."""
+        for temp_activity in imap_bounded(
+            lambda href: self.client.get(href).json(), sider, max_samtidige
+        ):
+            yield from _aktiviteter_på_side(temp_activity)
+
+
+class AsyncAktivitetslisteClient(NativAsyncClient):
+    """
+    Native asynkron udgave af AktivitetslisteClient.
+
+    Siderne hentes samtidigt direkte på event loop'en, uden worker tråde.
+
+    VIGTIGT: Opret ikke denne klasse direkte!
+    Brug AsyncNexusClientManager: await nexus.aktivitetslister.hent_aktivitetsliste(...)
+    """
+
+    async def hent_aktivitetsliste(
+        self,
+        navn: str,
+        organisation: Optional[dict],
+        medarbejder: Optional[dict],
+        antal_sider: int = 50,
+        max_samtidige: int = 8,
+    ) -> list[dict] | None:
+        """
+        Hent alle aktiviteter fra en aktivitetsliste.
+
+        Se AktivitetslisteClient.hent_aktivitetsliste.
+
+        :param navn: Navnet på aktivitetslisten.
+        :param organisation: Valgfri organisation at filtrere på.
+        :param medarbejder: Valgfri medarbejder at filtrere på.
+        :param antal_sider: Sidestørrelse og maksimalt antal sider (standard: 50).
+        :param max_samtidige: Maksimalt antal sider der hentes samtidigt (standard: 8).
+        :return: Aktiviteterne, eller None hvis aktivitetslisten ikke findes.
+        """
+        sider = await self._hent_sider(navn, organisation, medarbejder, antal_sider)
+
+        if sider is None:
+            return None
+
+        return [aktivitet async for aktivitet in self._hent_aktiviteter(sider, max_samtidige)]
+
+    async def iter_aktivitetsliste(
+        self,
+        navn: str,
+        organisation: Optional[dict],
+        medarbejder: Optional[dict],
+        antal_sider: int = 50,
+        max_samtidige: int = 8,
+    ) -> AsyncIterator[dict]:
+        """
+        Gennemløb aktiviteterne i en aktivitetsliste, efterhånden som siderne hentes.
+
+        Se AktivitetslisteClient.iter_aktivitetsliste. Bruges med async for uden await:
+
+            async for aktivitet in nexus.aktivitetslister.iter_aktivitetsliste(...):
+                ...
+
+        Findes aktivitetslisten ikke, rejses ValueError ved første skridt.
+
+        :param navn: Navnet på aktivitetslisten.
+        :param organisation: Valgfri organisation at filtrere på.
+        :param medarbejder: Valgfri medarbejder at filtrere på.
+        :param antal_sider: Sidestørrelse og maksimalt antal sider (standard: 50).
+        :param max_samtidige: Maksimalt antal sider der hentes samtidigt (standard: 8).
+        :return: Asynkron generator over aktiviteterne.
+        """
+        sider = await self._hent_sider(navn, organisation, medarbejder, antal_sider)
+
+        if sider is None:
+            raise ValueError(f"Aktivitetslisten '{navn}' findes ikke.")
+
+        aktiviteter = self._hent_aktiviteter(sider, max_samtidige)
+        try:
+            async for aktivitet in aktiviteter:
+                yield aktivitet
+        finally:
+            # Annuller sider der stadig hentes, hvis kalderen stopper undervejs
+            await aktiviteter.aclose()
+
+    async def _hent_sider(
+        self,
+        navn: str,
+        organisation: Optional[dict],
+        medarbejder: Optional[dict],
+        antal_sider: int,
+    ) -> list[str] | None:
+        """Find links til siderne i aktivitetslisten (højst antal_sider)."""
+        præferencer = (await self.client.get("preferences")).json()
+        aktivitetsliste = _find_aktivitetsliste(præferencer, navn)
+
+        if not aktivitetsliste:
+            return None
+
+        aktivitetsliste = (
+            await self.client.get(aktivitetsliste["_links"]["self"]["href"])
+        ).json()
+        content_url = _indholds_url(aktivitetsliste, organisation, medarbejder, antal_sider)
+
+        activities_data = (await self.client.get(content_url)).json()
+        return _side_links(activities_data, antal_sider)
+
+    async def _hent_aktiviteter(
+        self, sider: list[str], max_samtidige: int
+    ) -> AsyncIterator[dict]:
+        """Hent siderne samtidigt og returner aktiviteterne i sidernes rækkefølge."""
+
+        async def hent(href: str):
+            return (await self.client.get(href)).json()
+
+        sider_iter = imap_bounded_async(hent, sider, max_samtidige)
+        try:
+            async for temp_activity in sider_iter:
+                for aktivitet in _aktiviteter_på_side(temp_activity):
+                    yield aktivitet
+        finally:
+            await sider_iter.aclose()
+
+
+def _find_aktivitetsliste(præferencer: dict, navn: str) -> Optional[dict]:
+    """Find aktivitetslisten med det givne navn i præferencerne."""
+    return next(
+        (item for item in præferencer.get("ACTIVITY_LIST", []) if item.get("name") == navn),
+        None
+    )
+
+
+def _indholds_url(
+    aktivitetsliste: dict,
+    organisation: Optional[dict],
+    medarbejder: Optional[dict],
+    antal_sider: int,
+) -> str:
+    """Byg linket til aktivitetslistens indhold, filtreret på organisation og medarbejder."""
+    base_content_url = aktivitetsliste["_links"]["content"]["href"]
+
+    # FIXED: correct ordering
+    if organisation and medarbejder:
+        content_url = (base_content_url +
+                    f"&pageSize={antal_sider}"
+                    f"&assignmentOrganizationAssignee={organisation['id']}"
+                    f"&assignmentProfessionalAssignee={medarbejder['id']}")
+    elif organisation:
+        content_url = (base_content_url +
+                    f"&pageSize={antal_sider}"
+                    f"&assignmentOrganizationAssignee={organisation['id']}"
+                    f"&assignmentProfessionalAssignee=NO_PROFESSIONAL_CRITERIA")
+    elif medarbejder:
+        content_url = (base_content_url +
+                    f"&pageSize={antal_sider}"
+                    f"&assignmentOrganizationAssignee=ALL_ORGANIZATIONS"
+                    f"&assignmentProfessionalAssignee={medarbejder['id']}")
+    else:
+        content_url = (base_content_url +
+                    f"&pageSize={antal_sider}"
+                    f"&assignmentOrganizationAssignee=ALL_ORGANIZATIONS"
+                    f"&assignmentProfessionalAssignee=NO_PROFESSIONAL_CRITERIA")
+
+    return content_url
+
+
+def _side_links(activities_data: dict, antal_sider: int) -> list[str]:
+    """Links til de første antal_sider sider i aktivitetslistens indhold."""
+    pages = activities_data.get("pages", [])
+
+    return [page["_links"]["content"]["href"] for page in pages[:antal_sider]]
+
+
+def _aktiviteter_på_side(temp_activity) -> Iterator[dict]:
+    """Aktiviteterne på en hentet side."""
+    if isinstance(temp_activity, list):
+        for activity in temp_activity:
+            if isinstance(activity, dict) and "id" in activity:
+                yield activity
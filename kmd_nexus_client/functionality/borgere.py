@@ -1,7 +1,13 @@
-from typing import Optional, List
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, List, Union
 from httpx import HTTPStatusError
 
+from kmd_nexus_client.async_functionality import NativAsyncClient
+from kmd_nexus_client.borger_cache import cached, cached_async
 from kmd_nexus_client.client import NexusClient
+from kmd_nexus_client.concurrency import expand_results, map_bounded
+from kmd_nexus_client.compact_references import CompactReference, compact_references
+from kmd_nexus_client.tree_helpers import PathPattern, filter_by_path, filter_by_predicate
 from kmd_nexus_client.utils import sanitize_cpr
 
 
@@ -23,20 +29,46 @@ class BorgerClient:
         :param borger_cpr: CPR nummeret på borgeren der skal hentes.
         :return: Borgerens detaljer, eller None hvis borgeren ikke blev fundet.
         """
-        cpr = sanitize_cpr(borger_cpr)
+        return self._søg_borger(sanitize_cpr(borger_cpr))
+
+    def hent_borgere(
+        self,
+        cpr_liste: Iterable[str],
+        max_samtidige: int = 8,
+        returner_fejl: bool = True,
+    ) -> Dict[str, Union[dict, None, Exception]]:
+        """
+        Hent mange borgere via CPR nummer samtidigt.
+
+        Alle CPR numre valideres før der kaldes Nexus, og hver borger hentes kun én gang,
+        også når samme CPR nummer optræder flere gange eller i forskellige formater.
+
+        :param cpr_liste: CPR numrene der skal hentes, f.eks. fra en CSV eksport.
+        :param max_samtidige: Maksimalt antal samtidige kald (standard: 8).
+        :param returner_fejl: Hvis True returneres fejl (også ugyldige CPR numre) som værdi,
+                              ellers rejses den første fejl. Ugyldige CPR numre rejses
+                              da før der kaldes Nexus.
+        :return: Dictionary fra CPR nummer (som angivet i cpr_liste) til borgerens detaljer,
+                 None hvis borgeren ikke blev fundet, eller fejlen.
+        """
+        renset = _rens_cpr_numre(cpr_liste, returner_fejl)
+
+        unikke = list(dict.fromkeys(c for c in renset.values() if isinstance(c, str)))
+        hentede = dict(
+            zip(unikke, map_bounded(self._søg_borger, unikke, max_samtidige))
+        )
 
+        resultater = expand_results(list(renset.values()), hentede, returner_fejl)
+        return dict(zip(renset, resultater))
+
+    def _søg_borger(self, cpr: str) -> Optional[dict]:
+        """Slå en borger op via et renset CPR nummer."""
         try:
             response = self.client.post(
                 self.client.api["patientDetailsSearch"],
                 json={"businessKey": cpr, "keyType": "CPR"},
             )
-
-            data = response.json()
-
-            if data["isPatientAccessible"] is False:
-                return None
-
-            return data["patient"]
+            return _borger_fra_søgning(response.json())
 
         except HTTPStatusError as e:
             if e.response.status_code == 404:
@@ -51,8 +83,6 @@ class BorgerClient:
         :param antal: Antal resultater der skal returneres (standard: 10).
         :return: En liste af borgere der matcher søgningen.
         """
-
-
         response = self.client.get(
             self.client.api["searchPatients"],
             params={"query": søgning, "maxResults": antal},
@@ -60,44 +90,106 @@ class BorgerClient:
 
         return response.json()
 
+    def iter_søg_borgere(self, søgning: str, max_antal: int = 1000) -> Iterator[dict]:
+        """
+        Søg efter borgere og returner dem løbende, mens svaret hentes.
+
+        Søgningen i Nexus har ingen offset, så den kan ikke hentes side for side. I stedet
+        hentes ét svar med højst max_antal borgere, og borgerne returneres efterhånden som
+        de modtages. Hukommelsesforbruget afhænger derfor ikke af antallet af borgere, men
+        max_antal er en fast grænse: er der flere borgere, returneres kun de første.
+        Stoppes gennemløbet, afbrydes hentningen.
+
+        :param søgning: Søgestrengen der skal bruges til at finde borgere (f.eks. navn eller del af CPR).
+        :param max_antal: Højeste antal borgere der hentes (standard: 1000).
+        :return: Generator med borgere der matcher søgningen.
+        """
+        if max_antal < 1:
+            raise ValueError("max_antal skal være mindst 1.")
+
+        return self.client.stream_items(
+            self.client.api["searchPatients"],
+            params={"query": søgning, "maxResults": max_antal},
+        )
+
     def hent_præferencer(self, borger: dict) -> dict:
         """
         Hent præferencer for borgeren.
 
+        Inden for en BorgerCache hentes præferencer, visninger og referencer kun én gang.
+
         :param borger: Borgeren der skal hentes præferencer for.
         :return: Borgerens præferencer.
         """
-        response = self.client.get(borger["_links"]["patientPreferences"]["href"])
-        return response.json()
+        href = borger["_links"]["patientPreferences"]["href"]
+        return cached("præferencer", href, lambda: self.client.get(href).json())
 
     def hent_visning(
-        self, borger: dict, visnings_navn: str = "- Alt"
+        self,
+        borger: dict,
+        visnings_navn: str = "- Alt",
+        præferencer: Optional[dict] = None,
     ) -> Optional[dict]:
         """
         Hent en visning for borgeren.
 
         :param borger: Borgeren der skal hentes visning for.
         :param visnings_navn: Navnet på visningen (standard: "- Alt").
+        :param præferencer: Borgerens præferencer, hvis de allerede er hentet.
         :return: Borgerens visning, eller None hvis visningen ikke findes.
         """
-        preferences = self.hent_præferencer(borger=borger)
+        preferences = præferencer or self.hent_præferencer(borger=borger)
+        href = _visnings_href(preferences, visnings_navn)
 
-        for item in preferences["CITIZEN_PATHWAY"]:
-            if item["name"] == visnings_navn:
-                return self.client.get(item["_links"]["self"]["href"]).json()
+        if href is None:
+            return None
 
-        return None
+        return cached("visning", href, lambda: self.client.get(href).json())
 
-    def hent_referencer(self, visning: dict) -> List[dict]:
+    def hent_referencer(
+        self, visning: dict, kompakt: bool = False
+    ) -> Union[List[dict], List[CompactReference]]:
         """
         Hent forløbsreferencer fra en borgervisning.
 
         :param visning: Visningen der skal hentes referencer for.
+        :param kompakt: Hvis True returneres referencerne som skrivebeskyttede
+                        CompactReference noder, der bruger langt mindre hukommelse.
         :return: Forløbsreferencerne.
         """
-        return self.client.get(visning["_links"]["pathwayReferences"]["href"]).json()
+        href = visning["_links"]["pathwayReferences"]["href"]
+        referencer = cached("referencer", href, lambda: self.client.get(href).json())
+
+        if kompakt:
+            return compact_references(referencer)
 
-    # TODO: Overvej en funktion der kan hente en enkelt reference i en visning og resolve den med det samme.
+        return referencer
+
+    def hent_og_opløs_referencer(
+        self,
+        visning: dict,
+        udvælg: Union[str, PathPattern, Callable[[dict], bool]],
+        max_samtidige: int = 8,
+        returner_fejl: bool = True,
+    ) -> List[Union[dict, Exception]]:
+        """
+        Hent de fulde objekter (indsatser, skemaer, tilstande osv.) for udvalgte
+        forløbsreferencer i en borgervisning, hentet samtidigt.
+
+        :param visning: Visningen der skal hentes referencer for.
+        :param udvælg: Stimønster (f.eks. "/Sundhedsfagligt grundforløb/FSIII/Indsatser/%")
+                       eller funktion der udvælger referencer, se tree_helpers.
+        :param max_samtidige: Maksimalt antal samtidige kald (standard: 8).
+        :param returner_fejl: Hvis True returneres fejl på referencens plads i listen,
+                              ellers rejses den første fejl.
+        :return: Det fulde objekt (eller fejlen) for hver matchende reference i træets
+                 rækkefølge.
+        """
+        udvalgte = _udvælg(self.hent_referencer(visning), udvælg)
+
+        return self.client.hent_fra_referencer_mange(
+            udvalgte, max_samtidige=max_samtidige, returner_fejl=returner_fejl
+        )
 
     def hent_aktiviteter(self, visning: dict) -> List[dict]:
         """
@@ -205,4 +297,253 @@ class BorgerClient:
             json=netværksperson_prototype,
         )
 
-        return response.json()
\ No newline at end of file
+        return response.json()
+
+
+class AsyncBorgerClient(NativAsyncClient):
+    """
+    Native asynkron udgave af BorgerClient.
+
+    Opslag, søgning, præferencer, visninger og referencer kaldes direkte på event
+    loop'en. De øvrige metoder køres af BorgerClient i en worker tråd.
+
+    VIGTIGT: Opret ikke denne klasse direkte!
+    Brug AsyncNexusClientManager: await nexus.borgere.hent_borger(...)
+    """
+
+    async def hent_borger(self, borger_cpr: str) -> Optional[dict]:
+        """
+        Hent en borger via CPR nummer.
+
+        :param borger_cpr: CPR nummeret på borgeren der skal hentes.
+        :return: Borgerens detaljer, eller None hvis borgeren ikke blev fundet.
+        """
+        return await self._søg_borger(sanitize_cpr(borger_cpr))
+
+    async def hent_borgere(
+        self,
+        cpr_liste: Iterable[str],
+        max_samtidige: int = 8,
+        returner_fejl: bool = True,
+    ) -> Dict[str, Union[dict, None, Exception]]:
+        """
+        Hent mange borgere via CPR nummer samtidigt.
+
+        Se BorgerClient.hent_borgere.
+
+        :param cpr_liste: CPR numrene der skal hentes, f.eks. fra en CSV eksport.
+        :param max_samtidige: Maksimalt antal samtidige kald (standard: 8).
+        :param returner_fejl: Hvis True returneres fejl (også ugyldige CPR numre) som værdi,
+                              ellers rejses den første fejl.
+        :return: Dictionary fra CPR nummer (som angivet i cpr_liste) til borgerens detaljer,
+                 None hvis borgeren ikke blev fundet, eller fejlen.
+        """
+        if max_samtidige < 1:
+            raise ValueError("max_samtidige skal være mindst 1")
+
+        renset = _rens_cpr_numre(cpr_liste, returner_fejl)
+
+        unikke = list(dict.fromkeys(c for c in renset.values() if isinstance(c, str)))
+        semafor = asyncio.Semaphore(max_samtidige)
+
+        async def søg(cpr: str) -> Optional[dict]:
+            async with semafor:
+                return await self._søg_borger(cpr)
+
+        hentede = dict(
+            zip(
+                unikke,
+                await asyncio.gather(*(søg(cpr) for cpr in unikke), return_exceptions=True),
+            )
+        )
+
+        resultater = expand_results(list(renset.values()), hentede, returner_fejl)
+        return dict(zip(renset, resultater))
+
+    async def _søg_borger(self, cpr: str) -> Optional[dict]:
+        """Slå en borger op via et renset CPR nummer."""
+        try:
+            response = await self.client.post(
+                self.client.api["patientDetailsSearch"],
+                json={"businessKey": cpr, "keyType": "CPR"},
+            )
+            return _borger_fra_søgning(response.json())
+
+        except HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+
+    async def søg_borgere(self, søgning: str, antal: int = 10) -> List[dict]:
+        """
+        Søg efter borgere baseret på en søgestreng.
+
+        :param søgning: Søgestrengen der skal bruges til at finde borgere (f.eks. navn eller del af CPR).
+        :param antal: Antal resultater der skal returneres (standard: 10).
+        :return: En liste af borgere der matcher søgningen.
+        """
+        response = await self.client.get(
+            self.client.api["searchPatients"],
+            params={"query": søgning, "maxResults": antal},
+        )
+        return response.json()
+
+    def iter_søg_borgere(self, søgning: str, max_antal: int = 1000) -> AsyncIterator[dict]:
+        """
+        Søg efter borgere og returner dem løbende, mens svaret hentes.
+
+        Se BorgerClient.iter_søg_borgere. Bruges med async for uden await:
+
+            async for borger in nexus.borgere.iter_søg_borgere("Nancy"):
+                ...
+
+        :param søgning: Søgestrengen der skal bruges til at finde borgere (f.eks. navn eller del af CPR).
+        :param max_antal: Højeste antal borgere der hentes (standard: 1000).
+        :return: Asynkron generator med borgere der matcher søgningen.
+        """
+        if max_antal < 1:
+            raise ValueError("max_antal skal være mindst 1.")
+
+        return self.client.stream_items(
+            self.client.api["searchPatients"],
+            params={"query": søgning, "maxResults": max_antal},
+        )
+
+    async def hent_præferencer(self, borger: dict) -> dict:
+        """
+        Hent præferencer for borgeren.
+
+        :param borger: Borgeren der skal hentes præferencer for.
+        :return: Borgerens præferencer.
+        """
+        href = borger["_links"]["patientPreferences"]["href"]
+        return await cached_async("præferencer", href, lambda: self._hent_json(href))
+
+    async def hent_visning(
+        self,
+        borger: dict,
+        visnings_navn: str = "- Alt",
+        præferencer: Optional[dict] = None,
+    ) -> Optional[dict]:
+        """
+        Hent en visning for borgeren.
+
+        :param borger: Borgeren der skal hentes visning for.
+        :param visnings_navn: Navnet på visningen (standard: "- Alt").
+        :param præferencer: Borgerens præferencer, hvis de allerede er hentet.
+        :return: Borgerens visning, eller None hvis visningen ikke findes.
+        """
+        preferences = præferencer or await self.hent_præferencer(borger=borger)
+        href = _visnings_href(preferences, visnings_navn)
+
+        if href is None:
+            return None
+
+        return await cached_async("visning", href, lambda: self._hent_json(href))
+
+    async def hent_referencer(
+        self, visning: dict, kompakt: bool = False
+    ) -> Union[List[dict], List[CompactReference]]:
+        """
+        Hent forløbsreferencer fra en borgervisning.
+
+        :param visning: Visningen der skal hentes referencer for.
+        :param kompakt: Hvis True returneres referencerne som skrivebeskyttede
+                        CompactReference noder, der bruger langt mindre hukommelse.
+        :return: Forløbsreferencerne.
+        """
+        href = visning["_links"]["pathwayReferences"]["href"]
+        referencer = await cached_async("referencer", href, lambda: self._hent_json(href))
+
+        if kompakt:
+            return compact_references(referencer)
+
+        return referencer
+
+    async def hent_og_opløs_referencer(
+        self,
+        visning: dict,
+        udvælg: Union[str, PathPattern, Callable[[dict], bool]],
+        max_samtidige: int = 8,
+        returner_fejl: bool = True,
+    ) -> List[Union[dict, Exception]]:
+        """
+        Hent de fulde objekter for udvalgte forløbsreferencer i en borgervisning.
+
+        Se BorgerClient.hent_og_opløs_referencer.
+
+        :param visning: Visningen der skal hentes referencer for.
+        :param udvælg: Stimønster eller funktion der udvælger referencer, se tree_helpers.
+        :param max_samtidige: Maksimalt antal samtidige kald (standard: 8).
+        :param returner_fejl: Hvis True returneres fejl på referencens plads i listen,
+                              ellers rejses den første fejl.
+        :return: Det fulde objekt (eller fejlen) for hver matchende reference i træets
+                 rækkefølge.
+        """
+        udvalgte = _udvælg(await self.hent_referencer(visning), udvælg)
+
+        return await self.client.hent_fra_referencer_mange(
+            udvalgte, max_samtidige=max_samtidige, returner_fejl=returner_fejl
+        )
+
+    async def hent_aktiviteter(self, visning: dict) -> List[dict]:
+        """
+        Hent aktiviteter fra en borgervisning (flad liste med tilstande, organisationer, medicinkort osv.).
+
+        :param visning: Visningen der skal hentes aktiviteter for.
+        :return: Patient aktiviteterne som flad liste.
+        """
+        return await self._hent_json(visning["_links"]["patientActivities"]["href"])
+
+    async def _hent_json(self, href: str) -> Any:
+        response = await self.client.get(href)
+        return response.json()
+
+
+def _rens_cpr_numre(
+    cpr_liste: Iterable[str], returner_fejl: bool
+) -> Dict[str, Union[str, Exception]]:
+    """Rens CPR numrene, med fejlen i stedet for ugyldige numre."""
+    renset: Dict[str, Union[str, Exception]] = {}
+    for cpr in cpr_liste:
+        if cpr in renset:
+            continue
+        try:
+            renset[cpr] = sanitize_cpr(cpr)
+        except (AttributeError, ValueError):
+            # CPR nummeret er allerede nøglen, så det gentages ikke i fejlen
+            renset[cpr] = ValueError("Ugyldigt CPR nummer.")
+
+    if not returner_fejl:
+        # Stop før der kaldes Nexus, så en tastefejl ikke koster hele opslaget
+        for rent_cpr in renset.values():
+            if isinstance(rent_cpr, Exception):
+                raise rent_cpr
+
+    return renset
+
+
+def _borger_fra_søgning(data: dict) -> Optional[dict]:
+    """Borgeren fra et svar på patientDetailsSearch, eller None uden adgang."""
+    if data["isPatientAccessible"] is False:
+        return None
+
+    return data["patient"]
+
+
+def _visnings_href(præferencer: dict, visnings_navn: str) -> Optional[str]:
+    """Link til visningen med det givne navn, eller None."""
+    for item in præferencer["CITIZEN_PATHWAY"]:
+        if item["name"] == visnings_navn:
+            return item["_links"]["self"]["href"]
+
+    return None
+
+
+def _udvælg(
+    referencer: List[dict], udvælg: Union[str, PathPattern, Callable[[dict], bool]]
+) -> List[dict]:
+    """Udvælg referencer med et stimønster eller en funktion."""
+    if callable(udvælg):
+        return filter_by_predicate(referencer, udvælg)
+    return filter_by_path(referencer, udvælg)
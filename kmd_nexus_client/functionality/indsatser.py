@@ -1,6 +1,9 @@
+import copy
 from datetime import datetime, timezone
-from typing import Optional, List
+from typing import Optional, List, Mapping
+from kmd_nexus_client.async_functionality import NativAsyncClient
 from kmd_nexus_client.client import NexusClient
+from kmd_nexus_client.reference_data import ReferenceDataCache
 from kmd_nexus_client.tree_helpers import find_nodes
 
 
@@ -12,8 +15,13 @@ class IndsatsClient:
     Brug NexusClientManager: nexus.indsatser.hent_indsats(...)
     """
 
-    def __init__(self, nexus_client: NexusClient):
+    def __init__(
+        self,
+        nexus_client: NexusClient,
+        referencedata: Optional[ReferenceDataCache] = None,
+    ):
         self.client = nexus_client
+        self.referencedata = referencedata
 
     def rediger_indsats(self, indsats: dict, ændringer: dict, overgang: str) -> dict:
         """
@@ -268,12 +276,8 @@ class IndsatsClient:
         if not supplier_element:
             return
 
-        # Get available suppliers and find match
-        suppliers = self.client.get(
-            supplier_element["_links"]["availableSuppliers"]["href"]
-        ).json()
-        matching_supplier = next(
-            (s for s in suppliers if s.get("name") == supplier_name), None
+        matching_supplier = self._find_supplier(
+            supplier_element["_links"]["availableSuppliers"]["href"], supplier_name
         )
 
         if not matching_supplier:
@@ -379,13 +383,8 @@ class IndsatsClient:
                 if not isinstance(field_value, str):
                     raise ValueError(f"Field '{field_name}' expects a supplier name")
 
-                # Get available suppliers and find match
-                suppliers = self.client.get(
-                    element["_links"]["availableSuppliers"]["href"]
-                ).json()
-
-                matching_supplier = next(
-                    (s for s in suppliers if s.get("name") == field_value), None
+                matching_supplier = self._find_supplier(
+                    element["_links"]["availableSuppliers"]["href"], field_value
                 )
 
                 if not matching_supplier:
@@ -414,19 +413,15 @@ class IndsatsClient:
                 shifts_list = field_value.get("shifts", [])
                 shift_obj["visits"] = len(shifts_list)
                 
-                # Get available shift templates from the element
-                shift_templates = self.client.get(self.client.api["shifts"]).json()
+                # Get available shift templates, indexed by title
+                shift_templates = self._shift_templates_by_title()
                 shift_arr = []
                 
                 for shift_row in shifts_list:
-                    # Find matching template by title
-                    matching_template = next(
-                        (template for template in shift_templates 
-                         if template.get("title") == shift_row.get("title")),
-                        None
-                    )
+                    matching_template = shift_templates.get(shift_row.get("title"))
                     if matching_template:
-                        shift_arr.append(matching_template)
+                        # Cached templates are shared, so the grant gets its own copy
+                        shift_arr.append(copy.deepcopy(matching_template))
                 
                 shift_obj["shifts"] = shift_arr
                 
@@ -434,6 +429,31 @@ class IndsatsClient:
 
             raise ValueError(f"Unsupported field type for '{field_name}' in template")
 
+    def _find_supplier(self, suppliers_url: str, supplier_name: str) -> Optional[dict]:
+        """Find an available supplier by name, using the reference data cache if configured."""
+        def load() -> List[dict]:
+            return self.client.get(suppliers_url).json()
+
+        if self.referencedata is not None:
+            return self.referencedata.find(
+                "leverandører", "name", supplier_name, load, key=suppliers_url
+            )
+
+        return next((s for s in load() if s.get("name") == supplier_name), None)
+
+    def _shift_templates_by_title(self) -> Mapping[str, dict]:
+        """Get the shift templates indexed by title, using the reference data cache if configured."""
+        def load() -> List[dict]:
+            return self.client.get(self.client.api["shifts"]).json()
+
+        if self.referencedata is not None:
+            return self.referencedata.index("vagter", "title", load)
+
+        shift_templates = {}
+        for template in load():
+            shift_templates.setdefault(template.get("title"), template)
+        return shift_templates
+
     def _add_grant_note(self, grant: dict, note: str) -> None:
         """Add note to grant."""
         order_grant_id = grant.get("savedGrant", {}).get("currentOrderGrantId")
@@ -532,3 +552,65 @@ class IndsatsClient:
         grant_response = self.client.get(grant_url)
 
         return grant_response.json()
+
+
+class AsyncIndsatsClient(NativAsyncClient):
+    """
+    Native asynkron udgave af IndsatsClient.
+
+    Hentning og filtrering af indsatser kører direkte på event loop'en. Oprettelse,
+    redigering og de øvrige metoder køres af IndsatsClient i en worker tråd.
+
+    VIGTIGT: Opret ikke denne klasse direkte!
+    Brug AsyncNexusClientManager: await nexus.indsatser.hent_indsats(...)
+    """
+
+    async def hent_indsats(self, indsats_reference: dict) -> dict:
+        """
+        Hent fulde indsats detaljer fra en indsats reference.
+
+        :param indsats_reference: Indsats referencen der skal opløses
+        :return: Fuld indsats objekt
+        """
+        if "type" not in indsats_reference:
+            raise ValueError("Input er ikke en gyldig indsats reference")
+
+        if indsats_reference.get("type") == "basketGrantReference":
+            grant_url = indsats_reference["_links"]["referencedObject"]["href"]
+        elif indsats_reference.get("type") == "basketGrantPackageReference":
+            # Indsatspakken peger videre på indsatsen
+            package_response = await self.client.get(
+                indsats_reference["_links"]["self"]["href"]
+            )
+            grant_url = package_response.json()["_links"]["referencedObject"]["href"]
+        else:
+            raise ValueError(f"Ukendt reference type: {indsats_reference.get('type')}")
+
+        grant_response = await self.client.get(grant_url)
+        return grant_response.json()
+
+    async def filtrer_indsats_referencer(
+        self,
+        indsats_referencer: List[dict],
+        kun_aktive: bool = True,
+        leverandør_navn: str = "",
+        inkluder_indsatspakker: bool = False,
+    ) -> List[dict]:
+        """
+        Filtrer indsatsreferencer.
+
+        Kalder ikke Nexus og køres derfor direkte, uden worker tråd.
+        Se IndsatsClient.filtrer_indsats_referencer.
+        """
+        return self._synkron.filtrer_indsats_referencer(
+            indsats_referencer, kun_aktive, leverandør_navn, inkluder_indsatspakker
+        )
+
+    async def hent_indsats_elementer(self, indsats: dict) -> dict:
+        """
+        Hent en indsats' elementer.
+
+        Kalder ikke Nexus og køres derfor direkte, uden worker tråd.
+        Se IndsatsClient.hent_indsats_elementer.
+        """
+        return self._synkron.hent_indsats_elementer(indsats)
@@ -1,5 +1,6 @@
 from datetime import date
 
+from kmd_nexus_client.borger_cache import cached
 from kmd_nexus_client.client import NexusClient
 
 
@@ -92,6 +93,6 @@ class KalenderClient:
         :param borger: Borgeren der skal hentes præferencer for.
         :return: Borgerens præferencer.
         """
-        response = self.nexus_client.get(borger["_links"]["patientPreferences"]["href"])
-        return response.json()
+        href = borger["_links"]["patientPreferences"]["href"]
+        return cached("præferencer", href, lambda: self.nexus_client.get(href).json())
     
\ No newline at end of file
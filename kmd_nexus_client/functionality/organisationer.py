@@ -1,7 +1,9 @@
-from typing import List
+from contextlib import closing
+from typing import List, Optional
 from datetime import date
 from httpx import HTTPStatusError
 from kmd_nexus_client.client import NexusClient
+from kmd_nexus_client.reference_data import ReferenceDataCache
 from kmd_nexus_client.utils import sanitize_cpr
 
 class OrganisationerClient:
@@ -15,6 +17,7 @@ class OrganisationerClient:
     - hent_organisationer() -> List[dict]
     - hent_leverandører() -> List[dict]
     - hent_organisation_ved_navn(navn) -> dict
+    - hent_organisation_ved_id(organisations_id) -> dict
     - hent_organisationer_for_borger(borger, kun_aktive=True) -> List[dict]
     - hent_borgere_for_organisation(organisation) -> List[dict]
     - hent_medarbejder_ved_initialer(initialer) -> dict
@@ -25,8 +28,13 @@ class OrganisationerClient:
     - opdater_leverandør(opdateret_leverandør) -> dict
     """
 
-    def __init__(self, nexus_client: NexusClient):
+    def __init__(
+        self,
+        nexus_client: NexusClient,
+        referencedata: Optional[ReferenceDataCache] = None,
+    ):
         self.nexus_client = nexus_client
+        self.referencedata = referencedata
 
     def hent_organisationer(self) -> List[dict]:
         """
@@ -63,8 +71,35 @@ class OrganisationerClient:
         :param navn: Navnet på organisationen der skal hentes.
         :return: Organisationen.
         """
-        organisationer = self.hent_organisationer()
-        return next((org for org in organisationer if org["name"] == navn), None)
+        if self.referencedata is not None:
+            return self.referencedata.find(
+                "organisationer", "name", navn, self.hent_organisationer
+            )
+
+        # Stop downloading the list as soon as the organisation is found
+        with closing(
+            self.nexus_client.stream_items(self.nexus_client.api["organizations"])
+        ) as organisationer:
+            return next((org for org in organisationer if org["name"] == navn), None)
+
+    def hent_organisation_ved_id(self, organisations_id: int) -> dict | None:
+        """
+        Hent organisation ved id.
+
+        :param organisations_id: Id på organisationen der skal hentes.
+        :return: Organisationen.
+        """
+        if self.referencedata is not None:
+            return self.referencedata.find(
+                "organisationer", "id", organisations_id, self.hent_organisationer
+            )
+
+        with closing(
+            self.nexus_client.stream_items(self.nexus_client.api["organizations"])
+        ) as organisationer:
+            return next(
+                (org for org in organisationer if org["id"] == organisations_id), None
+            )
 
     def hent_organisationer_for_borger(
         self, borger: dict, kun_aktive: bool = True
@@ -107,21 +142,29 @@ class OrganisationerClient:
         :param initialer: Initialerne på medarbejderen der skal hentes.
         :return: Medarbejderens detaljer.
         """
+        if self.referencedata is not None:
+            return self.referencedata.get(
+                "medarbejdere",
+                initialer,
+                lambda: self._søg_medarbejder_ved_initialer(initialer),
+            )
+
+        return self._søg_medarbejder_ved_initialer(initialer)
+
+    def _søg_medarbejder_ved_initialer(self, initialer: str) -> dict | None:
+        """Søg efter en medarbejder med de givne initialer."""
         url = self.nexus_client.api["professionals"]
 
         if url is None:
             raise ValueError("API indeholder ikke professionals endpoint.")
 
-        response = self.nexus_client.get(url, params={"query": initialer})
-
-        if response.status_code == 404:
-            return None
-
-        medarbejder = next(
-            (a for a in response.json() if a.get("primaryIdentifier") == initialer),
-            None,
-        )
-        return medarbejder
+        with closing(
+            self.nexus_client.stream_items(url, params={"query": initialer})
+        ) as medarbejdere:
+            return next(
+                (a for a in medarbejdere if a.get("primaryIdentifier") == initialer),
+                None,
+            )
 
     def hent_medarbejdere_for_organisation(self, organisation: dict) -> List[dict]:
         """
@@ -177,6 +220,7 @@ class OrganisationerClient:
         }
         
         repsone = self.nexus_client.post(medarbejder["_links"]["updateOrganizations"]["href"], body)
+        self._ryd_referencedata("medarbejdere")
         
         return repsone.status_code == 200
     
@@ -199,6 +243,7 @@ class OrganisationerClient:
         }
         
         repsone = self.nexus_client.post(medarbejder["_links"]["updateOrganizations"]["href"], body)
+        self._ryd_referencedata("medarbejdere")
         
         return repsone.status_code == 200
     
@@ -299,6 +344,9 @@ class OrganisationerClient:
                 return None
             raise
 
+        finally:
+            self._ryd_referencedata("leverandører")
+
     def hent_borgere_med_udlåns_bestillinger(self) -> List[str]|None:
         """
         Hent alle borgere med udlånsbestillinger.
@@ -326,4 +374,9 @@ class OrganisationerClient:
                 except ValueError:
                     continue
         
-        return borgere if borgere else None
\ No newline at end of file
+        return borgere if borgere else None
+
+    def _ryd_referencedata(self, datasæt: str) -> None:
+        """Ryd et datasæt i referencedata-cachen efter en ændring i Nexus."""
+        if self.referencedata is not None:
+            self.referencedata.invalidate(datasæt)
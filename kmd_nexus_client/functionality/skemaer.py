@@ -3,8 +3,9 @@ import json
 from typing import Optional, List, Dict, Any, TYPE_CHECKING
 from datetime import datetime
 from httpx import HTTPStatusError
+from kmd_nexus_client.async_functionality import NativAsyncClient
 from kmd_nexus_client.client import NexusClient
-from kmd_nexus_client.tree_helpers import filter_by_predicate
+from kmd_nexus_client.tree_helpers import TreeIndex, filter_by_predicate
 if TYPE_CHECKING:
     from kmd_nexus_client.manager import NexusClientManager
 
@@ -351,16 +352,17 @@ class SkemaerClient:
 
         visning = borgere_client.hent_visning(borger=borger, visnings_navn="- Alt")
         referencer = borgere_client.hent_referencer(visning=visning)
-        
+
+        return self._skemarækker(referencer)
+
+    def _skemarækker(self, referencer: List[dict]) -> List[Dict[str, Any]]:
+        """Byg en række med skema information for hver skemareference i referencetræet."""
         skemaer = []
         
-        # Find alle tokens hvor type er "formDataV2Reference"
-        tokens = self._find_all_tokens(referencer, lambda token: 
-            isinstance(token, dict) and 
-            token.get("type") == "formDataV2Reference"
-        )
+        # Indekser referencetræet én gang; parents holdes uden for noderne
+        index = TreeIndex(referencer)
        
-        for token in tokens:
+        for token in index.by_type("formDataV2Reference"):
             row = {}
             
             # Grundlæggende felter
@@ -383,7 +385,7 @@ class SkemaerClient:
                 row['Status'] = ''
             
             # Find parent pathway references
-            path = self._get_parent_pathway_names(token)
+            path = self._get_parent_pathway_names(token, index)
             
             if len(path) >= 2:
                 row['Grundforløb'] = path[1]
@@ -436,54 +438,19 @@ class SkemaerClient:
 
     # Private/helper methods
 
-    def _find_all_tokens(self, data: Any, condition_func) -> List[Dict]:
-        """
-        Find alle tokens i nested JSON struktur der opfylder en betingelse.
-        
-        :param data: JSON data at søge i
-        :param condition_func: Function der returnerer True for matchende tokens
-        :return: Liste af matchende tokens
+    def _get_parent_pathway_names(self, token: Dict, index: TreeIndex) -> List[str]:
         """
-        results = []
-        
-        def search_recursive(obj, parent=None):
-            if isinstance(obj, dict):
-                # Tilføj parent reference for at kunne navigere op
-                obj['_parent'] = parent
-                
-                if condition_func(obj):
-                    results.append(obj)
-                
-                for key, value in obj.items():
-                    if key != '_parent':  # Undgå cirkular reference
-                        search_recursive(value, obj)
-                        
-            elif isinstance(obj, list):
-                for item in obj:
-                    search_recursive(item, parent)
-        
-        search_recursive(data)
-        return results
-
-    def _get_parent_pathway_names(self, token: Dict) -> List[str]:
-        """
-        Få parent pathway navne ved at navigere op gennem parent struktur.
+        Få parent pathway navne ved at navigere op gennem referencetræet.
         
         :param token: Token at finde parents for
+        :param index: TreeIndex over referencetræet som token er en del af
         :return: Liste af pathway navne (nærmeste først)
         """
-        path = []
-        parent = token.get('_parent')
-        
-        while parent is not None:
-            if (isinstance(parent, dict) and 
-                parent.get('type') == 'patientPathwayReference' and 
-                parent.get('name')):
-                path.append(parent['name'])
-            
-            parent = parent.get('_parent')
-        
-        return path
+        return [
+            parent['name']
+            for parent in index.ancestors(token)
+            if parent.get('type') == 'patientPathwayReference' and parent.get('name')
+        ]
     
     def _find_skematype_by_name(self, skematyper: List[dict], navn: str) -> Optional[dict]:
         """
@@ -565,3 +532,103 @@ class SkemaerClient:
                 item["value"] = value
                 return True
         return False
+
+
+class AsyncSkemaerClient(NativAsyncClient):
+    """
+    Native asynkron udgave af SkemaerClient.
+
+    Hentning af skemareferencer, skemaer, skematyper, prototyper, handlinger, tags og
+    historik kaldes direkte på event loop'en. Oprettelse, redigering og de øvrige
+    metoder køres af SkemaerClient i en worker tråd.
+
+    VIGTIGT: Opret ikke denne klasse direkte!
+    Brug AsyncNexusClientManager: await nexus.skemaer.hent_skemareferencer(...)
+    """
+
+    async def hent_skemareferencer(self, borger: dict) -> List[Dict[str, Any]]:
+        """
+        Hent og parse alle skema referencer for en borger til en liste af dictionaries.
+
+        :param borger: Borger objekt at hente skema referencer for.
+        :return: Liste af dictionaries med skema information
+        """
+        borgere_client = self._manager.borgere
+
+        visning = await borgere_client.hent_visning(borger=borger, visnings_navn="- Alt")
+        referencer = await borgere_client.hent_referencer(visning=visning)
+
+        return self._synkron._skemarækker(referencer)
+
+    async def hent_skemadefinition_uden_forløb(self, borger: dict) -> List[dict]:
+        """
+        Hent alle tilgængelige skematyper (form definitions) for et objekt.
+
+        :param objekt: Objekt at hente skematyper for (borger, forløb/pathway reference, etc.).
+        :return: Liste af tilgængelige skematyper.
+        """
+        return await self._hent_link(
+            borger, "availableFormDefinitions", "Objekt indeholder ikke availableFormDefinitions link."
+        )
+
+    async def hent_skema_fra_reference(self, reference: dict) -> dict:
+        """
+        Hent skemainstans fra en pathway reference.
+
+        :param reference: Reference til skemaet i pathway systemet.
+        :return: Skemainstans med alle felter og data.
+        """
+        return await self._hent_link(
+            reference, "referencedObject", "Reference indeholder ikke referencedObject link."
+        )
+
+    async def hent_skema_prototype(self, skematype: dict) -> dict:
+        """
+        Hent skema prototype for at oprette nyt skema baseret på skematype.
+
+        :param skematype: Skematype (form definition) fra availableFormDefinitions.
+        :return: Skema prototype klar til udfyldelse.
+        """
+        return await self._hent_link(
+            skematype, "formDataPrototype", "Skematype indeholder ikke formDataPrototype link."
+        )
+
+    async def hent_tilgængelige_handlinger(self, prototype: dict) -> List[dict]:
+        """
+        Hent tilgængelige handlinger for et skema prototype.
+
+        :param prototype: Skema prototype fra hent_skema_prototype().
+        :return: Liste af tilgængelige handlinger.
+        """
+        return await self._hent_link(
+            prototype, "availableActions", "Prototype indeholder ikke availableActions link."
+        )
+
+    async def hent_tags(self, prototype: dict) -> List[dict]:
+        """
+        Hent tilgængelige tags for et skema prototype.
+
+        :param prototype: Skema prototype at søge i.
+        :return: Liste af tilgængelige tags.
+        """
+        return await self._hent_link(
+            prototype, "availableTags", "Prototype indeholder ikke availableTags link."
+        )
+
+    async def hent_skema_historik(self, skema: dict) -> List[dict]:
+        """
+        Hent revisionshistorik/audit trail for et skema.
+
+        :param skema: Skema instans at hente historik for.
+        :return: Liste af historiske ændringer og events.
+        """
+        historik = await self._hent_link(skema, "audit", "Skema indeholder ikke audit link.")
+        return historik.get("auditEntries", [])
+
+    async def _hent_link(self, objekt: dict, link: str, fejl: str) -> Any:
+        """Hent det objekt et link peger på, eller rejs ValueError hvis linket mangler."""
+        if link not in objekt.get("_links", {}):
+            raise ValueError(fejl)
+
+        response = await self.client.get(objekt["_links"][link]["href"])
+        return response.json()
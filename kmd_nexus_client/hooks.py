@@ -8,11 +8,14 @@ to the Nexus client.
 
 import json
 import logging
-from typing import Callable, Optional, Any
+import random
+from typing import Any, Awaitable, Callable, Mapping, Optional, Union
 from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
 
 import httpx
 
+from .json_decoder import JSONLoads, get_decoder
+
 
 # Sensitive headers that should be redacted from logs
 SENSITIVE_HEADERS = {
@@ -30,99 +33,218 @@ SENSITIVE_HEADERS = {
 SENSITIVE_QUERY_PARAMS = {"token", "session_id", "access_key", "api_key", "secret"}
 
 
+# Default maximum size of a request or response body included in the log
+DEFAULT_MAX_BODY_BYTES = 64 * 1024
+
+# KMD Nexus specific endpoints to skip logging (reduce noise and avoid sensitive data)
+NON_LOGGING_ENDPOINTS = ("/protocol/openid-connect/token", "/patients/search")
+
+# Request extension marking responses the client streams; their bodies are never read here
+STREAMING_EXTENSION = "kmd_nexus_streaming"
+
+
 def create_response_logging_hook(
     logger: logging.Logger,
+    max_body_bytes: Optional[int] = DEFAULT_MAX_BODY_BYTES,
+    sample_rates: Optional[Mapping[Union[str, int], float]] = None,
+    log_bodies: bool = True,
+    json_decoder: Union[str, JSONLoads] = "auto",
 ) -> Callable[[httpx.Response], None]:
     """
     Create response logging hook for KMD Nexus API that captures HTTP transactions.
 
+    The hook checks whether the logger is enabled for the level first, so
+    responses that would be discarded cost next to nothing.
+
     Args:
         logger: Logger instance to use
+        max_body_bytes: Bodies larger than this are logged as a truncated preview
+            instead of parsed JSON (None for no limit)
+        sample_rates: Fraction of responses to log, keyed by "METHOD STATUS"
+            (e.g. "GET 200"), method (e.g. "GET") or status code (e.g. 200).
+            The most specific key wins; unmatched responses are always logged.
+        log_bodies: If False, only metadata (method, URL, status, headers,
+            duration) is logged and bodies are never read or parsed
+        json_decoder: JSON backend used to parse logged bodies; see
+            json_decoder.get_decoder
 
     Returns:
         Response hook function
     """
-    # KMD Nexus specific endpoints to skip logging (reduce noise and avoid sensitive data)
-    non_logging_endpoints = ["/protocol/openid-connect/token","/patients/search"]
+    should_log = _create_log_filter(logger, sample_rates)
+    loads = get_decoder(json_decoder)
 
     def log_response(response: httpx.Response) -> None:
         """Log complete HTTP transaction from response."""
-        request = response.request
+        level = should_log(response)
+        if level is not None:
+            _log_transaction(logger, level, response, max_body_bytes, log_bodies, loads)
 
-        # Skip logging for certain KMD Nexus endpoints to reduce noise
-        if any(
-            str(request.url).endswith(endpoint) for endpoint in non_logging_endpoints
-        ):
+    return log_response
+
+
+def create_async_response_logging_hook(
+    logger: logging.Logger,
+    max_body_bytes: Optional[int] = DEFAULT_MAX_BODY_BYTES,
+    sample_rates: Optional[Mapping[Union[str, int], float]] = None,
+    log_bodies: bool = True,
+    json_decoder: Union[str, JSONLoads] = "auto",
+) -> Callable[[httpx.Response], Awaitable[None]]:
+    """
+    Create async response logging hook for use with httpx.AsyncClient.
+
+    The async client requires awaitable hooks and cannot read the response body
+    synchronously, so the body is read asynchronously - and only if the
+    transaction is actually logged.
+
+    Args:
+        logger: Logger instance to use
+        max_body_bytes: See create_response_logging_hook
+        sample_rates: See create_response_logging_hook
+        log_bodies: See create_response_logging_hook
+        json_decoder: See create_response_logging_hook
+
+    Returns:
+        Async response hook function
+    """
+    should_log = _create_log_filter(logger, sample_rates)
+    loads = get_decoder(json_decoder)
+
+    async def alog_response(response: httpx.Response) -> None:
+        """Read the response body asynchronously and log the transaction."""
+        level = should_log(response)
+        if level is None:
             return
 
+        if (
+            log_bodies
+            and not _is_streamed(response)
+            and not hasattr(response, "_content")
+        ):
+            await response.aread()
+        _log_transaction(logger, level, response, max_body_bytes, log_bodies, loads)
+
+    return alog_response
+
+
+def _create_log_filter(
+    logger: logging.Logger,
+    sample_rates: Optional[Mapping[Union[str, int], float]],
+) -> Callable[[httpx.Response], Optional[int]]:
+    """Create a function returning the level to log a response at, or None to skip it."""
+    rates = {
+        (k.upper() if isinstance(k, str) else k): v
+        for k, v in (sample_rates or {}).items()
+    }
+
+    def should_log(response: httpx.Response) -> Optional[int]:
+        request = response.request
         method = request.method
-        url = _sanitize_url(request.url)
         status = response.status_code
 
+        # Log with appropriate level
+        if response.is_error:
+            level = logging.ERROR
+        elif method in ("GET", "HEAD", "OPTIONS"):
+            level = logging.DEBUG
+        else:
+            level = logging.INFO
+
+        if not logger.isEnabledFor(level):
+            return None
+
+        # Skip logging for certain KMD Nexus endpoints to reduce noise
+        if request.url.path.endswith(NON_LOGGING_ENDPOINTS):
+            return None
+
+        if rates:
+            rate = rates.get(f"{method} {status}", rates.get(method, rates.get(status)))
+            if rate is not None and random.random() >= rate:
+                return None
+
+        return level
+
+    return should_log
+
+
+def _log_transaction(
+    logger: logging.Logger,
+    level: int,
+    response: httpx.Response,
+    max_body_bytes: Optional[int],
+    log_bodies: bool,
+    loads: JSONLoads = json.loads,
+) -> None:
+    """Build the log entry for a request/response pair and log it."""
+    request = response.request
+    streamed = _is_streamed(response)
+    method = request.method
+    url = _sanitize_url(request.url)
+    status = response.status_code
+
+    http = {
+        "method": method,
+        "url": url,
+        "request_headers": _sanitize_headers(request.headers),
+    }
+
+    if log_bodies:
         # Extract request JSON if available
-        request_json = None
         try:
-            if hasattr(request, "content") and request.content:
-                request_json = _parse_json_content(request.content)
+            http.update(_body_fields("request_body", request.content, max_body_bytes, loads))
         except Exception:
             # Request content not available or not readable
-            request_json = None
+            http["request_body"] = None
 
-        # Always extract response JSON (for debugging API responses)
-        response_json = None
+    http["response_status"] = status
+    http["response_headers"] = _sanitize_headers(response.headers)
+
+    if streamed:
+        http["response_body_streamed"] = True
+    elif log_bodies:
         try:
             # Force read the response if it hasn't been read yet
             if not hasattr(response, "_content"):
                 response.read()
-            response_json = _parse_json_content(response.text)
+            http.update(_body_fields("response_body", response.content, max_body_bytes, loads))
         except Exception:
             # Response content not available or not readable
-            response_json = None
-
-        # Extract and sanitize headers
-        request_headers = (
-            _sanitize_headers(request.headers) if hasattr(request, "headers") else {}
-        )
-        response_headers = (
-            _sanitize_headers(response.headers) if hasattr(response, "headers") else {}
-        )
+            http["response_body"] = None
 
-        # Calculate duration in milliseconds
-        duration_ms = (
-            int(response.elapsed.total_seconds() * 1000)
-            if hasattr(response, "elapsed") and response.elapsed
-            else 0
+    # Calculate duration in milliseconds
+    try:
+        http["duration_ms"] = (
+            int(response.elapsed.total_seconds() * 1000) if response.elapsed else 0
         )
-
-        # Build complete log entry with nested HTTP structure
-        extra = {
-            "http": {
-                "method": method,
-                "url": url,
-                "request_headers": request_headers,
-                "request_body": request_json,
-                "response_status": status,
-                "response_headers": response_headers,
-                "response_body": response_json,
-                "duration_ms": duration_ms,
-            },
+    except (AttributeError, RuntimeError):
+        # Elapsed is only available once the response stream has been closed
+        http["duration_ms"] = 0
+
+    logger.log(level, f"HTTP {status}: {method} {url}", extra={"http": http})
+
+
+def _is_streamed(response: httpx.Response) -> bool:
+    """Check if the client streams the response body to the caller."""
+    return bool(response.request.extensions.get(STREAMING_EXTENSION))
+
+
+def _body_fields(
+    name: str,
+    content: bytes,
+    max_body_bytes: Optional[int],
+    loads: JSONLoads = json.loads,
+) -> dict:
+    """Log fields for a body: parsed JSON, or a truncated preview if it is too large."""
+    if max_body_bytes is not None and len(content) > max_body_bytes:
+        return {
+            name: content[:max_body_bytes].decode("utf-8", errors="replace"),
+            f"{name}_truncated": True,
+            f"{name}_size": len(content),
         }
-
-        # Log with appropriate level
-        if response.is_error:
-            logger.error(f"HTTP {status}: {method} {url}", extra=extra)
-        else:
-            if request.method in ["GET", "HEAD", "OPTIONS"]:
-                logger.debug(f"HTTP {status}: {method} {url}", extra=extra)
-            else:
-                logger.info(f"HTTP {status}: {method} {url}", extra=extra)
-
-        return  # End of log_response function
-
-    return log_response
+    return {name: _parse_json_content(content, loads)}
 
 
-def _parse_json_content(content: Any) -> Optional[Any]:
+def _parse_json_content(content: Any, loads: JSONLoads = json.loads) -> Optional[Any]:
     """
     Parse JSON content from request/response body.
 
@@ -140,8 +262,9 @@ def _parse_json_content(content: Any) -> Optional[Any]:
 
     # Parse JSON
     try:
-        return json.loads(content)
-    except (json.JSONDecodeError, ValueError):
+        return loads(content)
+    except ValueError:
+        # json.JSONDecodeError and the other backends' errors are ValueErrors
         return None
 
 
@@ -0,0 +1,322 @@
+"""
+Conditional-GET response cache for the KMD Nexus clients.
+
+Large, rarely changing resources (organisations, shifts, preferences, form
+definitions, ...) are stored together with their ETag/Last-Modified validators.
+The next GET of the same URL is sent with If-None-Match/If-Modified-Since, and a
+304 Not Modified answer is served from the cache instead of a full download.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Union
+
+import httpx
+
+
+# Response headers kept with a cached body
+CACHED_HEADERS = ("content-type", "etag", "last-modified")
+
+
+class CacheEntry(NamedTuple):
+    """A cached response body with the validators needed to revalidate it."""
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+    headers: Dict[str, str]
+    content: bytes
+    stored_at: float
+
+
+class ResponseCache(ABC):
+    """
+    Basisklasse for svar-cacher.
+
+    Underklasser implementerer get, set, delete og clear.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the cached entry for key, or None."""
+
+    @abstractmethod
+    def set(self, key: str, entry: CacheEntry) -> None:
+        """Store an entry for key."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove the entry for key, if any."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all entries."""
+
+
+class MemoryCache(ResponseCache):
+    """
+    LRU-cache i hukommelsen.
+
+    Eksempel:
+        nexus = NexusClientManager(..., http_cache=MemoryCache(max_entries=500))
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: Optional[int] = None):
+        """
+        Initialize the memory cache.
+
+        :param max_entries: Maximum number of cached responses.
+        :param max_bytes: Optional upper bound for the total size of the cached bodies.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        if self.max_bytes is not None and len(entry.content) > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.content)
+
+            self._entries[key] = entry
+            self._size += len(entry.content)
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._size > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.content)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.content)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class DiskCache(ResponseCache):
+    """
+    Cache på disk med størrelsesbaseret oprydning.
+
+    Hvert svar gemmes i sin egen fil. Når den samlede størrelse overstiger
+    max_bytes, slettes de mindst nyligt brugte filer.
+
+    Eksempel:
+        nexus = NexusClientManager(..., http_cache=DiskCache("C:/robot/cache/http"))
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = 100 * 1024 * 1024):
+        """
+        Initialize the disk cache.
+
+        :param directory: Directory holding the cache files.
+        :param max_bytes: Maximum total size of the cache files (default: 100 MB).
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[Path, list]] = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (hashlib.sha256(key.encode("utf-8")).hexdigest() + ".cache")
+
+    def _load_index(self) -> Dict[Path, list]:
+        """Map every cache file to [size, last use], scanning the directory once."""
+        if self._index is None:
+            self._index = {}
+            if self.directory.is_dir():
+                for path in self.directory.glob("*.cache"):
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    self._index[path] = [stat.st_size, stat.st_mtime]
+        return self._index
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                content = f.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        with self._lock:
+            index = self._load_index()
+            if path in index:
+                index[path][1] = time.time()
+
+        return CacheEntry(
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            headers=meta.get("headers", {}),
+            content=content,
+            stored_at=meta.get("stored_at", 0.0),
+        )
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        meta = json.dumps(
+            {
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+                "headers": entry.headers,
+                "stored_at": entry.stored_at,
+            }
+        ).encode("utf-8")
+        size = len(meta) + 1 + len(entry.content)
+        if size > self.max_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(meta + b"\n")
+                    f.write(entry.content)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            # The cache is only an optimization
+            return
+
+        with self._lock:
+            index = self._load_index()
+            index[path] = [size, time.time()]
+            self._evict(index)
+
+    def _evict(self, index: Dict[Path, list]) -> None:
+        """Delete the least recently used files until the cache fits in max_bytes."""
+        total = sum(size for size, _ in index.values())
+        if total <= self.max_bytes:
+            return
+
+        for path, (size, _) in sorted(index.items(), key=lambda item: item[1][1]):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            del index[path]
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def delete(self, key: str) -> None:
+        path = self._path(key)
+        with self._lock:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            self._load_index().pop(path, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in list(self._load_index()):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            self._index = {}
+
+
+def cache_key(url: str, params: Any = None) -> str:
+    """
+    Build the cache key for a GET request.
+
+    The query parameters are merged into the URL the same way httpx does, so
+    ``get(url, params=...)`` and a pre-built URL share an entry.
+    """
+    return str(httpx.URL(url, params=params) if params else httpx.URL(url))
+
+
+def conditional_headers(entry: CacheEntry) -> Dict[str, str]:
+    """Build the If-None-Match/If-Modified-Since headers for a cached entry."""
+    headers = {}
+    if entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+def entry_from_response(response: httpx.Response) -> Optional[CacheEntry]:
+    """
+    Create a cache entry from a successful response.
+
+    Returns None if the response has no validators or must not be stored.
+    """
+    if response.status_code != 200:
+        return None
+
+    etag = response.headers.get("etag")
+    last_modified = response.headers.get("last-modified")
+    if not etag and not last_modified:
+        return None
+
+    if "no-store" in response.headers.get("cache-control", "").lower():
+        return None
+
+    return CacheEntry(
+        etag=etag,
+        last_modified=last_modified,
+        headers={k: response.headers[k] for k in CACHED_HEADERS if k in response.headers},
+        content=response.content,
+        stored_at=time.time(),
+    )
+
+
+def revalidated_entry(entry: CacheEntry, response: httpx.Response) -> CacheEntry:
+    """Update a cached entry with any new validators sent along with a 304."""
+    headers = dict(entry.headers)
+    for name in CACHED_HEADERS:
+        if name in response.headers:
+            headers[name] = response.headers[name]
+
+    return entry._replace(
+        etag=response.headers.get("etag", entry.etag),
+        last_modified=response.headers.get("last-modified", entry.last_modified),
+        headers=headers,
+        stored_at=time.time(),
+    )
+
+
+def response_from_entry(entry: CacheEntry, request: httpx.Request) -> httpx.Response:
+    """Build a 200 response carrying the cached body."""
+    return httpx.Response(
+        200, headers=entry.headers, content=entry.content, request=request
+    )
+
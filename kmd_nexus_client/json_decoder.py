@@ -0,0 +1,283 @@
+"""
+Pluggable JSON decoding for Nexus responses.
+
+Decoding large grant catalogs, reference trees and activity lists is a noticeable
+part of the CPU time of a robot. When orjson or msgspec is installed it is used
+instead of the standard library json module; responses returned by the clients
+decode with it through the normal ``response.json()`` call.
+
+JSONArrayParser parses large arrays incrementally while they are downloaded.
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Union
+
+import httpx
+
+
+JSONLoads = Callable[[Union[bytes, str]], Any]
+
+BACKENDS = ("orjson", "msgspec", "json")
+
+
+def get_decoder(backend: Union[str, JSONLoads] = "auto") -> JSONLoads:
+    """
+    Get a JSON decoding function.
+
+    Args:
+        backend: "auto" (orjson, then msgspec, then json), the name of a backend,
+            or a function taking bytes or str and returning the decoded value
+
+    Returns:
+        Function decoding JSON from bytes or str. Invalid JSON raises
+        json.JSONDecodeError (or a subclass) for every backend.
+
+    Raises:
+        ImportError: If a named backend is not installed
+        ValueError: If the backend name is unknown
+    """
+    if callable(backend):
+        return backend
+
+    if backend == "auto":
+        for name in BACKENDS:
+            try:
+                return _load_backend(name)
+            except ImportError:
+                continue
+
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown JSON backend {backend!r}, expected 'auto' or one of {BACKENDS}"
+        )
+
+    return _load_backend(backend)
+
+
+@lru_cache(maxsize=None)
+def _load_backend(name: str) -> JSONLoads:
+    """Import a backend and return its decoding function."""
+    if name == "orjson":
+        import orjson
+
+        # orjson.JSONDecodeError already subclasses json.JSONDecodeError
+        return orjson.loads
+
+    if name == "msgspec":
+        import msgspec
+
+        decoder = msgspec.json.Decoder()
+
+        def msgspec_loads(content: Union[bytes, str]) -> Any:
+            try:
+                return decoder.decode(content)
+            except msgspec.DecodeError as e:
+                raise json.JSONDecodeError(str(e), "", 0) from e
+
+        return msgspec_loads
+
+    return json.loads
+
+
+@lru_cache(maxsize=None)
+def _response_class(loads: JSONLoads) -> type:
+    """Response subclass whose json() uses the given decoder."""
+
+    class NexusResponse(httpx.Response):
+        def json(self, **kwargs: Any) -> Any:
+            # Decoder options are specific to the stdlib json module
+            if kwargs:
+                return super().json(**kwargs)
+            return loads(self.content)
+
+    return NexusResponse
+
+
+def use_decoder(response: httpx.Response, loads: JSONLoads) -> httpx.Response:
+    """
+    Make response.json() decode with the given function.
+
+    The response keeps its type (it becomes a subclass of httpx.Response), so
+    nothing else about it changes.
+
+    Args:
+        response: Response to update in place
+        loads: Decoding function from get_decoder
+
+    Returns:
+        The same response
+    """
+    if loads is not json.loads:
+        response.__class__ = _response_class(loads)
+    return response
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Characters that change the nesting or end an item, outside strings
+_STRUCTURAL = re.compile(r'["\[\]{},]')
+# Characters that end a string or escape the next character
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+# Parser states
+_START, _FIRST_ITEM, _ITEM, _IN_ITEM, _DONE = range(5)
+
+
+class JSONArrayParser:
+    """
+    Incremental parser for a JSON array arriving in chunks.
+
+    Each call to feed returns the items completed by that chunk, so a large
+    array can be processed while it is downloaded without holding all of it.
+    Only the top-level array is incremental: the parser finds where each item
+    ends and decodes the item's text whole.
+
+    Every chunk is scanned once, and an item split over many chunks is joined
+    only when it is complete, so large items cost linear time.
+
+    Example:
+        parser = JSONArrayParser()
+        for chunk in response.iter_text():
+            for item in parser.feed(chunk):
+                ...
+        parser.close()
+    """
+
+    def __init__(self, loads: JSONLoads = json.loads):
+        """
+        Args:
+            loads: Function decoding the text of a single item (default: json.loads)
+        """
+        self._loads = loads
+        self._state = _START
+        # Text of the current item from earlier chunks
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[Any]:
+        """
+        Add a chunk of the document.
+
+        Args:
+            text: The next chunk of text
+
+        Returns:
+            The items completed by this chunk
+
+        Raises:
+            json.JSONDecodeError: If the document is not a JSON array
+        """
+        return self._parse(text)
+
+    def close(self) -> List[Any]:
+        """
+        Signal the end of the document.
+
+        Returns:
+            Any items completed by the end of the document
+
+        Raises:
+            json.JSONDecodeError: If the array is incomplete
+        """
+        if self._state != _DONE:
+            raise json.JSONDecodeError(
+                "Unterminated JSON array", "".join(self._parts), 0
+            )
+        return []
+
+    def _parse(self, text: str) -> List[Any]:
+        """Scan a chunk, decoding every item that ends in it."""
+        items = []
+        pos = 0
+        end = len(text)
+
+        while pos < end:
+            if self._state == _IN_ITEM:
+                start = pos
+                pos = self._scan_item(text, pos)
+                if pos is None:
+                    # The item continues in the next chunk
+                    self._parts.append(text[start:])
+                    break
+
+                self._parts.append(text[start:pos])
+                item_text = "".join(self._parts)
+                self._parts = []
+                items.append(self._loads(item_text))
+
+                # pos is at the ',' or ']' that ended the item
+                self._state = _ITEM if text[pos] == "," else _DONE
+                pos += 1
+                continue
+
+            pos = _WHITESPACE.match(text, pos).end()
+            if pos == end:
+                break
+
+            char = text[pos]
+
+            if self._state == _START:
+                if char != "[":
+                    raise json.JSONDecodeError("Expected a JSON array", text, pos)
+                pos += 1
+                self._state = _FIRST_ITEM
+            elif self._state == _DONE:
+                raise json.JSONDecodeError("Extra data", text, pos)
+            elif char == "]" and self._state == _FIRST_ITEM:
+                pos += 1
+                self._state = _DONE
+            elif char in ",]":
+                raise json.JSONDecodeError("Expecting value", text, pos)
+            else:
+                self._state = _IN_ITEM
+                self._depth = 0
+
+        return items
+
+    def _scan_item(self, text: str, pos: int) -> Optional[int]:
+        """
+        Scan the current item from pos.
+
+        Returns:
+            Position of the ',' or ']' ending the item, or None if the chunk ends first
+        """
+        end = len(text)
+
+        while pos < end:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                    pos += 1
+                    continue
+
+                match = _STRING_SPECIAL.search(text, pos)
+                if match is None:
+                    return None
+                pos = match.end()
+                if match.group() == "\\":
+                    self._escaped = True
+                else:
+                    self._in_string = False
+                continue
+
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                return None
+
+            char = match.group()
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+            elif self._depth == 0:
+                if char in ",]":
+                    return match.start()
+                raise json.JSONDecodeError("Unexpected '}'", text, match.start())
+            elif char in "]}":
+                self._depth -= 1
+            pos = match.end()
+
+        return None
@@ -5,8 +5,16 @@ This manager simplifies the instantiation of multiple clients by providing
 a single entry point with lazy-loaded properties for each functionality.
 """
 
-from typing import Optional
+import threading
+from pathlib import Path
+from typing import List, Optional, Union
 from kmd_nexus_client.client import NexusClient
+from kmd_nexus_client.retry import RateLimiter, RetryPolicy
+from kmd_nexus_client.token_store import TokenStore
+from kmd_nexus_client.http_cache import ResponseCache
+from kmd_nexus_client.json_decoder import JSONLoads
+from kmd_nexus_client.reference_data import ReferenceDataCache
+from kmd_nexus_client.snapshot import BorgerSnapshot, load_snapshot
 from kmd_nexus_client.functionality.aktivitetslister import AktivitetslisteClient
 from kmd_nexus_client.functionality.borgere import BorgerClient
 from kmd_nexus_client.functionality.brugere import BrugereClient
@@ -28,6 +36,9 @@ class NexusClientManager:
     VIGTIGT: Brug altid denne manager i stedet for at oprette individuelle klienter.
     Dette sikrer korrekt konfiguration og lazy loading.
 
+    Manageren er trådsikker og kan deles af alle tråde i f.eks. en ThreadPoolExecutor,
+    så alle kald genbruger den samme forbindelses-pulje.
+
     Eksempel:
         nexus = NexusClientManager(instance="...", client_id="...", client_secret="...")
         borger = nexus.borgere.hent_borger("1234567890")
@@ -35,7 +46,26 @@ class NexusClientManager:
     """
 
     def __init__(
-        self, instance: str, client_id: str, client_secret: str, timeout: float = 30.0
+        self,
+        instance: str,
+        client_id: str,
+        client_secret: str,
+        timeout: float = 30.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        api_cache_dir: Optional[Union[str, Path]] = None,
+        api_cache_ttl: float = 24 * 60 * 60,
+        token_store: Optional[TokenStore] = None,
+        token_leeway: float = 60.0,
+        http_cache: Optional[ResponseCache] = None,
+        coalesce_requests: bool = True,
+        max_connections: int = 64,
+        max_keepalive_connections: int = 32,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        log_options: Optional[dict] = None,
+        json_decoder: Union[str, JSONLoads] = "auto",
+        referencedata: Optional[ReferenceDataCache] = None,
     ):
         """
         Initialize the NexusClientManager.
@@ -45,13 +75,52 @@ class NexusClientManager:
             client_id: The OAuth2 client ID
             client_secret: The OAuth2 client secret
             timeout: Request timeout in seconds (default: 30.0)
+            retry_policy: Policy for retrying failed requests (default: RetryPolicy())
+            rate_limiter: Optional rate limiter shared by all functionality clients
+            api_cache_dir: Optional directory where the API links are persisted between processes
+            api_cache_ttl: Maximum age of persisted API links in seconds (default: 24 hours)
+            token_store: Optional store sharing the OAuth2 token between clients and processes
+            token_leeway: Seconds before expiry at which the token is refreshed (default: 60)
+            http_cache: Optional cache for GET responses, revalidated with ETag/Last-Modified
+            coalesce_requests: Share one request between identical GETs in flight at the same time (default: True)
+            max_connections: Maximum number of open connections to Nexus (default: 64)
+            max_keepalive_connections: Maximum number of idle connections kept open for reuse (default: 32)
+            keepalive_expiry: Seconds an idle connection is kept open (default: 30)
+            http2: Use HTTP/2 if the optional h2 package is installed (default: False)
+            log_options: Options for the response logging hook (max_body_bytes, sample_rates,
+                log_bodies); see hooks.create_response_logging_hook
+            json_decoder: JSON backend used by response.json(): "auto" (orjson or msgspec
+                if installed, else json), a backend name or a decoding function
+            referencedata: Optional cache of organisations, suppliers, professionals and
+                shifts shared by the functionality clients
         """
         self._instance = instance
         self._client_id = client_id
         self._client_secret = client_secret
 
         # Store configuration for lazy loading
-        self._config = {"timeout": timeout}
+        self._config = {
+            "timeout": timeout,
+            "retry_policy": retry_policy,
+            "rate_limiter": rate_limiter,
+            "api_cache_dir": api_cache_dir,
+            "api_cache_ttl": api_cache_ttl,
+            "token_store": token_store,
+            "token_leeway": token_leeway,
+            "http_cache": http_cache,
+            "coalesce_requests": coalesce_requests,
+            "max_connections": max_connections,
+            "max_keepalive_connections": max_keepalive_connections,
+            "keepalive_expiry": keepalive_expiry,
+            "http2": http2,
+            "log_options": log_options,
+            "json_decoder": json_decoder,
+        }
+
+        self._referencedata = referencedata
+
+        # Guards the lazy-loaded clients, so the manager can be shared between threads
+        self._lock = threading.RLock()
 
         # Lazy-loaded clients
         self._nexus_client: Optional[NexusClient] = None
@@ -68,100 +137,164 @@ class NexusClientManager:
         self._skemaer_client: Optional[SkemaerClient] = None
         self._tilstande_client: Optional[TilstandeClient] = None
 
+    @classmethod
+    def fra_klient(
+        cls,
+        nexus_client: NexusClient,
+        referencedata: Optional[ReferenceDataCache] = None,
+    ) -> "NexusClientManager":
+        """
+        Create a manager around an already configured NexusClient.
+
+        Used when the base client is created elsewhere, e.g. by the
+        AsyncNexusClientManager, which runs the functionality clients on top of
+        an asynchronous client.
+
+        Args:
+            nexus_client: The client all functionality clients should use
+            referencedata: Optional cache of reference data shared by the functionality clients
+
+        Returns:
+            A NexusClientManager sharing the given client
+        """
+        manager = cls(
+            instance=nexus_client.instance,
+            client_id="",
+            client_secret="",
+            referencedata=referencedata,
+        )
+        manager._nexus_client = nexus_client
+        return manager
+
     @property
     def nexus_client(self) -> NexusClient:
         """Get the base NexusClient (lazy-loaded with configuration)."""
         if self._nexus_client is None:
-            self._nexus_client = NexusClient(
-                instance=self._instance,
-                client_id=self._client_id,
-                client_secret=self._client_secret,
-                **self._config,
-            )
+            with self._lock:
+                if self._nexus_client is None:
+                    self._nexus_client = NexusClient(
+                        instance=self._instance,
+                        client_id=self._client_id,
+                        client_secret=self._client_secret,
+                        **self._config,
+                    )
         return self._nexus_client
 
+    @property
+    def referencedata(self) -> Optional[ReferenceDataCache]:
+        """The reference data cache shared by the functionality clients, if configured."""
+        return self._referencedata
+
     @property
     def aktivitetslister(self) -> AktivitetslisteClient:
         """Get the AktivitetslisteClient (lazy-loaded)."""
         if self._aktivitetsliste_client is None:
-            self._aktivitetsliste_client = AktivitetslisteClient(self.nexus_client)
+            with self._lock:
+                if self._aktivitetsliste_client is None:
+                    self._aktivitetsliste_client = AktivitetslisteClient(self.nexus_client)
         return self._aktivitetsliste_client
 
     @property
     def borgere(self) -> "BorgerClient":
         """Get the BorgerClient (lazy-loaded)."""
         if self._borgere_client is None:
-            self._borgere_client = BorgerClient(self.nexus_client)
+            with self._lock:
+                if self._borgere_client is None:
+                    self._borgere_client = BorgerClient(self.nexus_client)
         return self._borgere_client
 
     @property
     def brugere(self) -> BrugereClient:
         """Get the BrugereClient (lazy-loaded)."""
         if self._brugere_client is None:
-            self._brugere_client = BrugereClient(self.nexus_client)
+            with self._lock:
+                if self._brugere_client is None:
+                    self._brugere_client = BrugereClient(self.nexus_client)
         return self._brugere_client
 
     @property
     def organisationer(self) -> OrganisationerClient:
         """Get the OrganisationerClient (lazy-loaded)."""
         if self._organisationer_client is None:
-            self._organisationer_client = OrganisationerClient(self.nexus_client)
+            with self._lock:
+                if self._organisationer_client is None:
+                    self._organisationer_client = OrganisationerClient(
+                        self.nexus_client, referencedata=self._referencedata
+                    )
         return self._organisationer_client
 
     @property
     def opgaver(self) -> OpgaverClient:
         """Get the OpgaverClient (lazy-loaded)."""
         if self._opgaver_client is None:
-            self._opgaver_client = OpgaverClient(self.nexus_client)
+            with self._lock:
+                if self._opgaver_client is None:
+                    self._opgaver_client = OpgaverClient(self.nexus_client)
         return self._opgaver_client
 
     @property
     def indsatser(self) -> IndsatsClient:
         """Get the IndsatsClient (lazy-loaded)."""
         if self._indsats_client is None:
-            self._indsats_client = IndsatsClient(self.nexus_client)
+            with self._lock:
+                if self._indsats_client is None:
+                    self._indsats_client = IndsatsClient(
+                        self.nexus_client, referencedata=self._referencedata
+                    )
         return self._indsats_client
 
     @property
     def kalender(self) -> KalenderClient:
         """Get the KalenderClient (lazy-loaded)."""
         if self._kalender_client is None:
-            self._kalender_client = KalenderClient(self.nexus_client)
+            with self._lock:
+                if self._kalender_client is None:
+                    self._kalender_client = KalenderClient(self.nexus_client)
         return self._kalender_client
 
     @property
     def forløb(self) -> ForløbClient:
         """Get the ForløbClient (lazy-loaded)."""
         if self._forløb_client is None:
-            self._forløb_client = ForløbClient(self.nexus_client)
+            with self._lock:
+                if self._forløb_client is None:
+                    self._forløb_client = ForløbClient(self.nexus_client)
         return self._forløb_client
 
     @property
     def medcom(self) -> MedComClient:
         """Get the MedComClient (lazy-loaded)."""
         if self._medcom_client is None:
-            self._medcom_client = MedComClient(self.nexus_client)
+            with self._lock:
+                if self._medcom_client is None:
+                    self._medcom_client = MedComClient(self.nexus_client)
         return self._medcom_client
 
     @property
     def medicin(self) -> MedicinClient:
         """Get the MedicinClient (lazy-loaded)."""
         if self._medicin_client is None:
-            self._medicin_client = MedicinClient(self.nexus_client)
+            with self._lock:
+                if self._medicin_client is None:
+                    self._medicin_client = MedicinClient(self.nexus_client)
         return self._medicin_client
 
     @property
     def skemaer(self) -> SkemaerClient:
         """Get the SkemaerClient (lazy-loaded)."""
         if self._skemaer_client is None:
-            self._skemaer_client = SkemaerClient(self.nexus_client, manager=self)
+            with self._lock:
+                if self._skemaer_client is None:
+                    self._skemaer_client = SkemaerClient(self.nexus_client, manager=self)
         return self._skemaer_client
 
     @property
     def tilstande(self) -> TilstandeClient:
         """Get the TilstandeClient (lazy-loaded)."""
         if self._tilstande_client is None:
-            self._tilstande_client = TilstandeClient(self.nexus_client)
+            with self._lock:
+                if self._tilstande_client is None:
+                    self._tilstande_client = TilstandeClient(self.nexus_client)
         return self._tilstande_client
 
     def hent_fra_reference(self, reference: dict) -> dict:
@@ -182,3 +315,59 @@ class NexusClientManager:
             ValueError: Hvis referencen ikke kan opløses.
         """
         return self.nexus_client.hent_fra_reference(reference)
+
+    def hent_fra_referencer_mange(
+        self,
+        referencer: List[dict],
+        max_samtidige: int = 8,
+        returner_fejl: bool = True,
+    ) -> List[Union[dict, Exception]]:
+        """
+        Hent fulde objekter fra mange referencer samtidigt.
+
+        Identiske links hentes kun én gang, og rækkefølgen bevares.
+
+        Args:
+            referencer: Referencerne der skal følges til objekterne.
+            max_samtidige: Maksimalt antal samtidige kald (standard: 8).
+            returner_fejl: Hvis True returneres fejl på referencens plads i listen,
+                ellers rejses den første fejl.
+
+        Returns:
+            Liste med det fulde objekt (eller fejlen) for hver reference, i samme rækkefølge.
+        """
+        return self.nexus_client.hent_fra_referencer_mange(
+            referencer, max_samtidige=max_samtidige, returner_fejl=returner_fejl
+        )
+
+    def hent_borger_snapshot(
+        self,
+        borger: Union[str, dict],
+        visnings_navn: str = "- Alt",
+        kompakt: bool = False,
+        max_samtidige: int = 8,
+    ) -> Optional[BorgerSnapshot]:
+        """
+        Hent en borgers samlede arbejdsdata i ét kald.
+
+        Præferencer, visning, referencer, aktiviteter, tilstande, organisationer,
+        medicinkort og opgaver hentes samtidigt, så kun kald der afhænger af hinanden
+        venter på hinanden. En fejl i én del stopper ikke resten, men gemmes i
+        snapshot.fejl.
+
+        Args:
+            borger: CPR nummer eller en allerede hentet borger.
+            visnings_navn: Navnet på visningen (standard: "- Alt").
+            kompakt: Hvis True returneres referencerne som CompactReference noder.
+            max_samtidige: Maksimalt antal samtidige kald (standard: 8).
+
+        Returns:
+            Borgerens snapshot, eller None hvis borgeren ikke blev fundet.
+        """
+        return load_snapshot(
+            self,
+            borger,
+            visnings_navn=visnings_navn,
+            kompakt=kompakt,
+            max_workers=max_samtidige,
+        )
@@ -0,0 +1,186 @@
+"""
+Cache of reference data shared by the functionality clients of a manager.
+
+Organisations, suppliers, professionals and shift templates change rarely, but
+are looked up again and again when a robot processes many citizens. The cache
+keeps each dataset for a configurable time and builds dictionary indexes on
+top of the lists, so repeated lookups by name or ID are dictionary hits.
+
+Lookups return copies, so callers can modify the result (e.g. put a supplier
+into a grant template) without changing the cached data.
+"""
+
+import copy
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Iterable, Mapping, Optional, Tuple
+
+
+# Default time to keep each dataset, in seconds
+DEFAULT_TTLS = {
+    "organisationer": 60 * 60,
+    "leverandører": 60 * 60,
+    "medarbejdere": 15 * 60,
+    "vagter": 60 * 60,
+}
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "indexes")
+
+    def __init__(self, value: Any, expires_at: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.indexes: Dict[str, Mapping[Hashable, dict]] = {}
+
+
+class ReferenceDataCache:
+    """
+    Cache med udløbstid for referencedata (organisationer, leverandører, medarbejdere, vagter).
+
+    Deles af funktionalitets-klienterne gennem NexusClientManager. Opslag returnerer
+    kopier, og klienternes skrivemetoder (f.eks. opdater_leverandør) rydder de
+    berørte data. Tomme opslag (None) gemmes ikke.
+
+    Eksempel:
+        nexus = NexusClientManager(..., referencedata=ReferenceDataCache())
+        nexus.organisationer.hent_organisation_ved_navn("Sygeplejen")  # henter listen
+        nexus.organisationer.hent_organisation_ved_navn("Hjemmeplejen")  # opslag i cachen
+        nexus.referencedata.invalidate("organisationer")  # efter ændringer i Nexus
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 60 * 60,
+    ):
+        """
+        Initialize the reference data cache.
+
+        :param ttls: Time to keep each dataset in seconds, overriding DEFAULT_TTLS.
+        :param default_ttl: Time to keep datasets without their own TTL (default: 1 hour).
+        """
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self._entries: Dict[Tuple[str, Hashable], _Entry] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple[str, Hashable], threading.Lock] = {}
+
+    def _ttl(self, dataset: str) -> float:
+        return self.ttls.get(dataset, self.default_ttl)
+
+    def _fresh_entry(self, cache_key: Tuple[str, Hashable]) -> Optional[_Entry]:
+        entry = self._entries.get(cache_key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            return entry
+        return None
+
+    def _entry(
+        self, dataset: str, key: Hashable, loader: Callable[[], Any]
+    ) -> _Entry:
+        cache_key = (dataset, key)
+
+        entry = self._fresh_entry(cache_key)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(cache_key, threading.Lock())
+
+        # Only one thread loads a dataset; the others wait and reuse the result
+        try:
+            with load_lock:
+                entry = self._fresh_entry(cache_key)
+                if entry is None:
+                    entry = _Entry(loader(), time.monotonic() + self._ttl(dataset))
+                    # A missing value is looked up again next time
+                    if entry.value is not None:
+                        with self._lock:
+                            self._entries[cache_key] = entry
+                return entry
+        finally:
+            # Drop the lock once loaded, so one lock is not kept per key ever used
+            with self._lock:
+                if self._load_locks.get(cache_key) is load_lock:
+                    del self._load_locks[cache_key]
+
+    def get(self, dataset: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Get a cached value, calling loader to fetch it if it is missing or expired.
+
+        :param dataset: Name of the dataset, used for the TTL and for invalidation.
+        :param key: Key within the dataset (e.g. a URL or initials; None for the whole dataset).
+        :param loader: Function fetching the value from Nexus.
+        :return: A copy of the cached value.
+        """
+        return copy.deepcopy(self._entry(dataset, key, loader).value)
+
+    def find(
+        self,
+        dataset: str,
+        field: str,
+        value: Hashable,
+        loader: Callable[[], Iterable[dict]],
+        key: Hashable = None,
+    ) -> Optional[dict]:
+        """
+        Find the first item in a cached list with a given field value.
+
+        :param dataset: Name of the dataset.
+        :param field: Field to look up on, e.g. "name" or "id".
+        :param value: Value of the field.
+        :param loader: Function fetching the list from Nexus.
+        :param key: Key within the dataset (None for the whole dataset).
+        :return: A copy of the item, or None if no item has the value.
+        """
+        item = self.index(dataset, field, loader, key).get(value)
+        return None if item is None else copy.deepcopy(item)
+
+    def index(
+        self,
+        dataset: str,
+        field: str,
+        loader: Callable[[], Iterable[dict]],
+        key: Hashable = None,
+    ) -> Mapping[Hashable, dict]:
+        """
+        Get a dictionary index of a cached list, mapping a field's value to the first item having it.
+
+        The index is built once per loaded list and dropped together with it. The index
+        is read-only and its items are the cached objects, so they must not be modified;
+        use find to get a copy of an item.
+
+        :param dataset: Name of the dataset.
+        :param field: Field to index on, e.g. "name" or "id".
+        :param loader: Function fetching the list from Nexus.
+        :param key: Key within the dataset (None for the whole dataset).
+        :return: Read-only mapping from field value to item.
+        """
+        entry = self._entry(dataset, key, loader)
+
+        index = entry.indexes.get(field)
+        if index is None:
+            items: Dict[Hashable, dict] = {}
+            for item in entry.value or []:
+                value = item.get(field)
+                if value is not None:
+                    items.setdefault(value, item)
+            index = entry.indexes[field] = MappingProxyType(items)
+        return index
+
+    def invalidate(self, dataset: Optional[str] = None, key: Hashable = ...) -> None:
+        """
+        Drop cached data so it is fetched again on next use.
+
+        :param dataset: Dataset to drop (default: all datasets).
+        :param key: Only drop this key within the dataset (default: the whole dataset).
+        """
+        with self._lock:
+            if dataset is None:
+                self._entries.clear()
+            elif key is ...:
+                for cache_key in [k for k in self._entries if k[0] == dataset]:
+                    del self._entries[cache_key]
+            else:
+                self._entries.pop((dataset, key), None)
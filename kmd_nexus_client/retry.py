@@ -0,0 +1,232 @@
+"""
+Retry policy and client-side rate limiting for the KMD Nexus clients.
+
+RetryPolicy decides whether a failed request should be sent again and how long
+to wait before doing so. RateLimiter is a token bucket that is shared by every
+request a client makes, and which backs off when Nexus starts throttling.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Optional
+
+import httpx
+
+
+# Methods that can safely be sent more than once
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Status codes that indicate a temporary problem on the server side
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Transport errors where the request never reached the server
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class RetryPolicy:
+    """
+    Politik for gentagelse af fejlede kald med eksponentiel backoff og jitter.
+
+    Idempotente kald (GET, PUT, DELETE, ...) gentages ved midlertidige fejl.
+    POST gentages kun når Nexus med sikkerhed ikke har behandlet kaldet, dvs.
+    ved 429 eller hvis forbindelsen aldrig blev oprettet.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        retry_statuses: Iterable[int] = RETRY_STATUSES,
+        idempotent_methods: Iterable[str] = IDEMPOTENT_METHODS,
+        respect_retry_after: bool = True,
+        max_retry_after: float = 120.0,
+    ):
+        """
+        Initialize the retry policy.
+
+        :param max_retries: Maximum number of retries per request (0 disables retries).
+        :param backoff_factor: Base delay in seconds; attempt n waits up to factor * 2**n.
+        :param max_backoff: Upper bound for the computed backoff in seconds.
+        :param retry_statuses: HTTP status codes that may be retried.
+        :param idempotent_methods: Methods that may be retried on any temporary error.
+        :param respect_retry_after: Use the Retry-After header when Nexus sends one.
+        :param max_retry_after: Upper bound for delays taken from Retry-After in seconds.
+        """
+        if max_retries < 0:
+            raise ValueError("max_retries must not be negative")
+
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = set(retry_statuses)
+        self.idempotent_methods = {m.upper() for m in idempotent_methods}
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+
+    def should_retry_response(
+        self, method: str, response: httpx.Response, attempt: int
+    ) -> bool:
+        """
+        Decide whether a request should be retried after receiving a response.
+
+        :param method: HTTP method of the request.
+        :param response: The response received.
+        :param attempt: Number of retries already made for this request.
+        :return: True if the request should be sent again.
+        """
+        if attempt >= self.max_retries:
+            return False
+
+        if response.status_code not in self.retry_statuses:
+            return False
+
+        # 429 means the request was rejected before being processed
+        return method.upper() in self.idempotent_methods or response.status_code == 429
+
+    def should_retry_exception(
+        self, method: str, exception: Exception, attempt: int
+    ) -> bool:
+        """
+        Decide whether a request should be retried after a transport error.
+
+        :param method: HTTP method of the request.
+        :param exception: The error raised by httpx.
+        :param attempt: Number of retries already made for this request.
+        :return: True if the request should be sent again.
+        """
+        if attempt >= self.max_retries:
+            return False
+
+        if isinstance(exception, NOT_SENT_ERRORS):
+            return True
+
+        return method.upper() in self.idempotent_methods and isinstance(
+            exception, httpx.TransportError
+        )
+
+    def backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """
+        Compute how long to wait before the next attempt.
+
+        :param attempt: Number of retries already made for this request.
+        :param response: The response that triggered the retry, if any.
+        :return: Delay in seconds.
+        """
+        if self.respect_retry_after and response is not None:
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_after)
+
+        # Full jitter spreads retries from many workers over the whole window
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2**attempt))
+
+
+class RateLimiter:
+    """
+    Token bucket der begrænser antallet af kald per sekund.
+
+    Deles af alle funktionalitets-klienter gennem NexusClient. Når Nexus svarer
+    med 429 halveres hastigheden, hvorefter den langsomt øges igen op til det
+    konfigurerede maksimum.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        burst: Optional[int] = None,
+        min_requests_per_second: Optional[float] = None,
+        recovery_step: Optional[float] = None,
+    ):
+        """
+        Initialize the rate limiter.
+
+        :param requests_per_second: Maximum sustained request rate.
+        :param burst: Maximum number of requests that may be sent at once (default: one second's worth).
+        :param min_requests_per_second: Lowest rate to back off to (default: 10% of the maximum).
+        :param recovery_step: Rate added after each successful response (default: 1% of the maximum).
+        """
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+
+        self.max_rate = float(requests_per_second)
+        self.rate = self.max_rate
+        self.capacity = float(burst if burst is not None else max(1, int(self.max_rate)))
+        self.min_rate = (
+            min_requests_per_second
+            if min_requests_per_second is not None
+            else self.max_rate / 10
+        )
+        self.recovery_step = (
+            recovery_step if recovery_step is not None else self.max_rate / 100
+        )
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Reserve a token and return how long the caller must wait before using it.
+
+        :return: Delay in seconds (0 if a token is available now).
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Wait without blocking the event loop until a request may be sent."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_throttled(self) -> None:
+        """Halve the request rate after Nexus has throttled a request."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def on_success(self) -> None:
+        """Slowly raise the request rate again after a successful request."""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.recovery_step)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
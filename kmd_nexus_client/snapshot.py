@@ -0,0 +1,107 @@
+"""
+Parallel loading of a citizen's full working set.
+
+A typical case-handling run fetches the citizen and then a handful of objects
+linked from it. Only the pathway view chain (preferences, view, references and
+activities) depends on earlier results; everything else only needs the citizen.
+load_snapshot describes the fetches as a dependency graph and runs independent
+ones concurrently, so the latency per citizen is the longest chain instead of
+the sum of all calls.
+"""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+from kmd_nexus_client.concurrency import run_graph
+
+if TYPE_CHECKING:
+    from kmd_nexus_client.manager import NexusClientManager
+
+
+@dataclass
+class BorgerSnapshot:
+    """
+    En borgers samlede arbejdsdata, hentet samtidigt.
+
+    Dele der ikke kunne hentes er None, og fejlen ligger i ``fejl`` under feltets navn.
+    Referencer og aktiviteter er None, hvis visningen ikke findes.
+
+    Eksempel:
+        snapshot = nexus.hent_borger_snapshot("1234567890")
+        if snapshot.fejl:
+            ...
+        indsatser = nexus.indsatser.filtrer_indsats_referencer(snapshot.referencer)
+    """
+
+    borger: dict
+    præferencer: Optional[dict] = None
+    visning: Optional[dict] = None
+    referencer: Optional[List[dict]] = None
+    aktiviteter: Optional[List[dict]] = None
+    tilstande: Optional[List[dict]] = None
+    organisationer: Optional[List[dict]] = None
+    medicinkort: Optional[dict] = None
+    opgaver: Optional[List[dict]] = None
+    fejl: Dict[str, Exception] = field(default_factory=dict)
+
+
+def load_snapshot(
+    manager: "NexusClientManager",
+    borger: Union[str, dict],
+    visnings_navn: str = "- Alt",
+    kompakt: bool = False,
+    max_workers: int = 8,
+) -> Optional[BorgerSnapshot]:
+    """
+    Load a citizen's working set with independent fetches running concurrently.
+
+    Args:
+        manager: Manager providing the functionality clients
+        borger: CPR number or an already fetched citizen
+        visnings_navn: Name of the pathway view (default: "- Alt")
+        kompakt: Return the references as CompactReference nodes
+        max_workers: Maximum number of concurrent calls (default: 8)
+
+    Returns:
+        The snapshot, or None if no citizen was found for the CPR number
+    """
+    if isinstance(borger, str):
+        borger = manager.borgere.hent_borger(borger)
+        if borger is None:
+            return None
+
+    borgere = manager.borgere
+
+    def visning(præferencer: dict) -> Optional[dict]:
+        return borgere.hent_visning(borger, visnings_navn, præferencer=præferencer)
+
+    def referencer(visning: Optional[dict]) -> Any:
+        return None if visning is None else borgere.hent_referencer(visning, kompakt)
+
+    def aktiviteter(visning: Optional[dict]) -> Optional[List[dict]]:
+        return None if visning is None else borgere.hent_aktiviteter(visning)
+
+    results = run_graph(
+        {
+            "præferencer": (lambda: borgere.hent_præferencer(borger), ()),
+            "visning": (visning, ("præferencer",)),
+            "referencer": (referencer, ("visning",)),
+            "aktiviteter": (aktiviteter, ("visning",)),
+            "tilstande": (lambda: manager.tilstande.hent_tilstande(borger), ()),
+            "organisationer": (
+                lambda: manager.organisationer.hent_organisationer_for_borger(borger),
+                (),
+            ),
+            "medicinkort": (lambda: manager.medicin.hent_medicinkort(borger), ()),
+            "opgaver": (lambda: manager.opgaver.hent_opgaver(borger), ()),
+        },
+        max_workers=max_workers,
+    )
+
+    snapshot = BorgerSnapshot(borger=borger)
+    for name, result in results.items():
+        if isinstance(result, Exception):
+            snapshot.fejl[name] = result
+        else:
+            setattr(snapshot, name, result)
+    return snapshot
@@ -0,0 +1,215 @@
+"""
+Shared OAuth2 token storage for KMD Nexus clients.
+
+A token store lets many NexusClient instances - in the same process or across
+processes - reuse one valid access token instead of each fetching their own.
+The client holding the store's lock is the only one that fetches a new token;
+everybody else waits and then reads the fresh token from the store.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+
+def token_key(instance: str, client_id: str) -> str:
+    """
+    Build the store key for an instance and client ID.
+
+    The client ID is hashed so it never ends up in file names.
+    """
+    digest = hashlib.sha256(f"{instance}:{client_id}".encode("utf-8")).hexdigest()
+    return f"{instance}-{digest[:16]}"
+
+
+def token_is_fresh(token: Optional[dict], leeway: float) -> bool:
+    """
+    Check whether a token can be used for at least another leeway seconds.
+
+    Tokens without an expiry time are treated as fresh, like authlib does.
+    """
+    if not token or not token.get("access_token"):
+        return False
+
+    expires_at = token.get("expires_at")
+    if expires_at is None:
+        return True
+    return float(expires_at) - leeway > time.time()
+
+
+class TokenStore(ABC):
+    """
+    Basisklasse for delte token-lagre.
+
+    Underklasser implementerer load, save, acquire og release.
+    """
+
+    @abstractmethod
+    def load(self, key: str) -> Optional[dict]:
+        """Return the stored token for key, or None."""
+
+    @abstractmethod
+    def save(self, key: str, token: dict) -> None:
+        """Store a token for key."""
+
+    @abstractmethod
+    def acquire(self, key: str) -> None:
+        """Block until this caller holds the lock for key."""
+
+    @abstractmethod
+    def release(self, key: str) -> None:
+        """Release the lock for key."""
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """Hold the lock for key while the block runs."""
+        self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+
+class MemoryTokenStore(TokenStore):
+    """
+    Token-lager i hukommelsen, der kan deles mellem tråde i samme proces.
+
+    Eksempel:
+        store = MemoryTokenStore()
+        nexus_a = NexusClientManager(..., token_store=store)
+        nexus_b = NexusClientManager(..., token_store=store)
+    """
+
+    def __init__(self):
+        self._tokens: Dict[str, dict] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def load(self, key: str) -> Optional[dict]:
+        token = self._tokens.get(key)
+        return dict(token) if token is not None else None
+
+    def save(self, key: str, token: dict) -> None:
+        self._tokens[key] = dict(token)
+
+    def acquire(self, key: str) -> None:
+        self._key_lock(key).acquire()
+
+    def release(self, key: str) -> None:
+        self._key_lock(key).release()
+
+
+class FileTokenStore(TokenStore):
+    """
+    Token-lager på disk, der kan deles mellem processer på samme maskine.
+
+    Tokens gemmes som JSON-filer, som kun den aktuelle bruger kan læse. Adgang
+    styres med en låsefil, så kun én proces henter et nyt token ad gangen.
+
+    Eksempel:
+        store = FileTokenStore("C:/robot/cache/tokens")
+        nexus = NexusClientManager(..., token_store=store)
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        lock_timeout: float = 60.0,
+        stale_lock_after: float = 120.0,
+    ):
+        """
+        Initialize the file token store.
+
+        :param directory: Directory holding the token and lock files.
+        :param lock_timeout: Maximum time in seconds to wait for the lock.
+        :param stale_lock_after: Age in seconds after which a lock file left behind
+                                 by a crashed process is removed.
+        """
+        self.directory = Path(directory)
+        self.lock_timeout = lock_timeout
+        self.stale_lock_after = stale_lock_after
+        self._thread_locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.token.json"
+
+    def _lock_path(self, key: str) -> Path:
+        return self.directory / f"{key}.lock"
+
+    def _thread_lock(self, key: str) -> threading.Lock:
+        with self._guard:
+            return self._thread_locks.setdefault(key, threading.Lock())
+
+    def load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                token = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return token if isinstance(token, dict) else None
+
+    def save(self, key: str, token: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            os.chmod(tmp_path, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(dict(token), f)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def acquire(self, key: str) -> None:
+        # Threads in this process queue on a regular lock, processes on the lock file
+        thread_lock = self._thread_lock(key)
+        thread_lock.acquire()
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            lock_path = self._lock_path(key)
+            deadline = time.monotonic() + self.lock_timeout
+
+            while True:
+                try:
+                    fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    os.close(fd)
+                    return
+                except FileExistsError:
+                    self._remove_stale_lock(lock_path)
+
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Kunne ikke få token-låsen {lock_path}")
+                time.sleep(0.05)
+        except BaseException:
+            thread_lock.release()
+            raise
+
+    def release(self, key: str) -> None:
+        try:
+            os.unlink(self._lock_path(key))
+        except FileNotFoundError:
+            pass
+        finally:
+            self._thread_lock(key).release()
+
+    def _remove_stale_lock(self, lock_path: Path) -> None:
+        """Remove a lock file left behind by a process that crashed while holding it."""
+        try:
+            if time.time() - lock_path.stat().st_mtime > self.stale_lock_after:
+                os.unlink(lock_path)
+        except FileNotFoundError:
+            pass
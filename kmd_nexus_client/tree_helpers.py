@@ -6,7 +6,75 @@ that have children arrays, commonly found in KMD Nexus API responses.
 """
 
 import re
-from typing import List, Dict, Any, Callable, Optional, Union
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple, Union
+
+
+Node = Dict[str, Any]
+
+
+def _walk(
+    roots: Union[Node, List[Node]],
+    children_key: str = "children",
+    descend: Optional[Callable[[Node, List[Node]], bool]] = None,
+    track_path: bool = True,
+) -> Iterator[Tuple[Node, Optional[List[Node]]]]:
+    """
+    Iterate over all nodes depth-first (pre-order) without recursion.
+
+    The path from the root to the current node is a single list that is updated
+    in place as the walk moves through the tree. It is only valid until the
+    walk continues - copy it (``list(path)``) to keep it.
+
+    Args:
+        roots: Single node or list of root nodes
+        children_key: Key name for children array (default: "children")
+        descend: Optional function deciding whether to visit a node's children.
+            It is called with (node, path) after the node has been yielded.
+        track_path: If False, the path is not maintained and None is yielded instead
+
+    Yields:
+        (node, path) for every visited node
+    """
+    root_nodes = roots if isinstance(roots, list) else [roots]
+
+    # One iterator per level; the for loop runs over the siblings at the current
+    # level and breaks out to descend, resuming where it left off afterwards
+    iterators = [iter(root_nodes)]
+    push, pop = iterators.append, iterators.pop
+
+    if not track_path:
+        while iterators:
+            for node in iterators[-1]:
+                yield node, None
+
+                children = node.get(children_key)
+                if children and (descend is None or descend(node, None)):
+                    push(iter(children))
+                    break
+            else:
+                pop()
+        return
+
+    # The path holds the ancestors of the current level plus the current node
+    path: List[Node] = []
+    append, remove_last = path.append, path.pop
+
+    while iterators:
+        for node in iterators[-1]:
+            append(node)
+            yield node, path
+
+            children = node.get(children_key)
+            if children and (descend is None or descend(node, path)):
+                push(iter(children))
+                break
+            remove_last()
+        else:
+            pop()
+            if path:
+                remove_last()
 
 
 def traverse_tree(
@@ -22,22 +90,13 @@ def traverse_tree(
         node: The current node to visit
         visit_fn: Function to call for each node, receives (node, path)
         children_key: Key name for children array (default: "children")
-        path: Current path from root (used internally for recursion)
+        path: Path from the root to the parent of node, if node is not the root
     """
-    if path is None:
-        path = []
-
-    # Create a copy of path for this node
-    current_path = path + [node]
-
-    # Visit current node
-    visit_fn(node, current_path)
+    prefix = path or []
 
-    # Recursively visit children
-    children = node.get(children_key, [])
-    if children:
-        for child in children:
-            traverse_tree(child, visit_fn, children_key, current_path)
+    # visit_fn may keep the path, so it gets its own list
+    for current_node, current_path in _walk(node, children_key):
+        visit_fn(current_node, prefix + current_path)
 
 
 def find_nodes(
@@ -58,33 +117,38 @@ def find_nodes(
     Returns:
         List of matching nodes
     """
-    results = []
+    if not find_all:
+        return list(islice(iter_find_nodes(roots, predicate, children_key), 1))
 
-    # Normalize input to list
-    if isinstance(roots, dict):
-        root_nodes = [roots]
-    else:
-        root_nodes = roots
+    return [
+        node
+        for node, _ in _walk(roots, children_key, track_path=False)
+        if predicate(node)
+    ]
 
-    # Use exception to break out of deep recursion when find_all=False
-    class FoundFirstMatch(Exception):
-        pass
 
-    def visit_node(node: Dict[str, Any], path: List[Dict[str, Any]]) -> None:
-        if predicate(node):
-            results.append(node)
-            if not find_all:
-                raise FoundFirstMatch()
-
-    try:
-        for root in root_nodes:
-            traverse_tree(root, visit_node, children_key)
-            if not find_all and results:
-                break
-    except FoundFirstMatch:
-        pass
+def iter_find_nodes(
+    roots: Union[Dict[str, Any], List[Dict[str, Any]]],
+    predicate: Callable[[Dict[str, Any]], bool],
+    children_key: str = "children",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over nodes in tree structure(s) that match a predicate.
 
-    return results
+    Matches are yielded as they are found, so the search stops as soon as the
+    caller stops iterating.
+
+    Args:
+        roots: Single node or list of root nodes to search
+        predicate: Function that returns True for matching nodes
+        children_key: Key name for children array (default: "children")
+
+    Yields:
+        Matching nodes in depth-first order
+    """
+    for node, _ in _walk(roots, children_key, track_path=False):
+        if predicate(node):
+            yield node
 
 
 def find_first_node(
@@ -130,9 +194,113 @@ def find_node_by_id(
     )
 
 
+class PathPattern:
+    """
+    A path pattern compiled for repeated use with filter_by_path.
+
+    Each segment is turned into a matcher once, so applying the same pattern to
+    many reference trees does not parse or compile it again. Create instances
+    with compile_path.
+
+    Supports wildcards:
+    - "*" matches any single segment
+    - "%" as suffix matches any string starting with prefix
+    - "%" inside a segment matches any run of characters
+
+    A segment matches a node if it matches the node's name or type.
+    """
+
+    __slots__ = ("pattern", "segments", "_matchers")
+
+    def __init__(self, pattern: str):
+        segments = re.findall(r"/([^/]+)", pattern)
+
+        if not segments:
+            raise ValueError("Can't match empty path")
+
+        self.pattern = pattern
+        self.segments = tuple(segments)
+        self._matchers = tuple(_compile_segment(segment) for segment in segments)
+
+    def __len__(self) -> int:
+        return len(self._matchers)
+
+    def __repr__(self) -> str:
+        return f"PathPattern({self.pattern!r})"
+
+    def matches_segment(self, index: int, node: Dict[str, Any]) -> bool:
+        """
+        Check if a node matches the segment at the given depth.
+
+        Args:
+            index: Zero-based segment index (the node's depth in the path)
+            node: Node to check
+
+        Returns:
+            True if the node's name or type matches the segment
+        """
+        matcher = self._matchers[index]
+        return (
+            matcher is None
+            or matcher(node.get("name", ""))
+            or matcher(node.get("type", ""))
+        )
+
+    def matches(self, path: List[Dict[str, Any]]) -> bool:
+        """
+        Check if a complete path from the root matches the pattern.
+
+        Args:
+            path: List of nodes from the root
+
+        Returns:
+            True if every node in the path matches its segment
+        """
+        return len(path) == len(self._matchers) and all(
+            self.matches_segment(index, node) for index, node in enumerate(path)
+        )
+
+
+def _compile_segment(segment: str) -> Optional[Callable[[Any], bool]]:
+    """Build the matcher for a single path segment; None matches anything."""
+    if segment == "*":
+        return None
+
+    # Prefix match (pattern ends with %)
+    if segment.endswith("%"):
+        prefix = segment[:-1]
+        return lambda value: isinstance(value, str) and value.startswith(prefix)
+
+    if "%" in segment:
+        regex = re.compile(".*".join(re.escape(part) for part in segment.split("%")))
+        return lambda value: isinstance(value, str) and regex.fullmatch(value) is not None
+
+    return lambda value: value == segment
+
+
+@lru_cache(maxsize=256)
+def compile_path(path_pattern: str) -> PathPattern:
+    """
+    Compile a path pattern for filter_by_path.
+
+    Compiled patterns are cached, so calling this repeatedly with the same
+    pattern is cheap.
+
+    Args:
+        path_pattern: Path pattern like "/parent/child/*" or "/parent/child/name%"
+
+    Returns:
+        Compiled PathPattern
+
+    Raises:
+        ValueError: If the pattern has no segments
+    """
+    return PathPattern(path_pattern)
+
+
 def filter_by_path(
     roots: List[Dict[str, Any]],
-    path_pattern: str,
+    path_pattern: Union[str, PathPattern],
     active_pathways_only: bool = False,
     children_key: str = "children",
 ) -> List[Dict[str, Any]]:
@@ -144,110 +312,154 @@ def filter_by_path(
 
     Args:
         roots: List of root nodes to search
-        path_pattern: Path pattern like "/parent/child/*" or "/parent/child/name%"
+        path_pattern: Path pattern like "/parent/child/*" or "/parent/child/name%",
+            or a pattern compiled with compile_path
         active_pathways_only: If True, skip inactive pathways
         children_key: Key name for children array (default: "children")
 
     Returns:
         List of nodes matching the path pattern
     """
-    # Parse path pattern
-    path_segments = re.findall(r"/([^/]+)", path_pattern)
-
-    if not path_segments:
-        raise ValueError("Can't match empty path")
+    return list(
+        iter_filter_by_path(roots, path_pattern, active_pathways_only, children_key)
+    )
 
-    results = []
 
-    for root in roots:
-        results.extend(
-            _filter_tree_by_path(
-                root, [], path_segments, active_pathways_only, children_key
-            )
-        )
+def iter_filter_by_path(
+    roots: List[Dict[str, Any]],
+    path_pattern: Union[str, PathPattern],
+    active_pathways_only: bool = False,
+    children_key: str = "children",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over nodes matching a path pattern with wildcard support.
 
-    return results
+    Generator counterpart of filter_by_path. The pattern is validated when the
+    function is called, not when iteration starts.
 
+    Args:
+        roots: List of root nodes to search
+        path_pattern: Path pattern like "/parent/child/*" or "/parent/child/name%",
+            or a pattern compiled with compile_path
+        active_pathways_only: If True, skip inactive pathways
+        children_key: Key name for children array (default: "children")
 
-def _filter_tree_by_path(
-    node: Dict[str, Any],
-    current_path: List[Dict[str, Any]],
-    target_path: List[str],
-    active_pathways_only: bool,
-    children_key: str,
-) -> List[Dict[str, Any]]:
-    """
-    Internal recursive function for path-based filtering.
+    Returns:
+        Iterator over the nodes matching the path pattern
     """
-    result = []
+    pattern = (
+        path_pattern
+        if isinstance(path_pattern, PathPattern)
+        else compile_path(path_pattern)
+    )
+    depth = len(pattern)
+    matches_segment = pattern.matches_segment
+
+    def is_inactive(node: Dict[str, Any]) -> bool:
+        return (
+            active_pathways_only
+            and node.get("type") == "patientPathwayReference"
+            and node.get("pathwayStatus") != "ACTIVE"
+        )
 
-    # Check for inactive pathways if filtering is enabled
-    if (
-        active_pathways_only
-        and node.get("type") == "patientPathwayReference"
-        and node.get("pathwayStatus") != "ACTIVE"
-    ):
-        return result
-
-    # Add current node to path
-    current_path = current_path + [node]
-
-    # Check if current path matches target path
-    if _path_matches(current_path, target_path):
-        result.append(node)
-    else:
-        # Continue searching in children if we haven't exceeded target depth
-        children = node.get(children_key, [])
-        if children and len(target_path) > len(current_path):
-            for child in children:
-                result.extend(
-                    _filter_tree_by_path(
-                        child,
-                        current_path,
-                        target_path,
-                        active_pathways_only,
-                        children_key,
-                    )
-                )
+    def descend(node: Dict[str, Any], path: List[Dict[str, Any]]) -> bool:
+        # Only descend below nodes matching their own segment; deeper nodes can
+        # never match, and inactive pathways are skipped entirely
+        index = len(path) - 1
+        return (
+            index + 1 < depth
+            and not is_inactive(node)
+            and matches_segment(index, node)
+        )
 
-    return result
+    def matches() -> Iterator[Dict[str, Any]]:
+        # Every ancestor has matched its segment, so only the node itself is left
+        for node, path in _walk(roots, children_key, descend):
+            if (
+                len(path) == depth
+                and not is_inactive(node)
+                and matches_segment(depth - 1, node)
+            ):
+                yield node
+
+    return matches()
 
 
-def _path_matches(current_path: List[Dict[str, Any]], target_path: List[str]) -> bool:
+def filter_by_queries(
+    roots: List[Dict[str, Any]],
+    queries: Dict[str, Union[str, PathPattern, Callable[[Dict[str, Any]], bool]]],
+    active_pathways_only: bool = False,
+    children_key: str = "children",
+) -> Dict[str, List[Dict[str, Any]]]:
     """
-    Check if current path matches target path pattern.
+    Run several path patterns and predicates over the same tree in one pass.
 
-    Supports wildcards:
-    - "*" matches any single segment
-    - "%" as suffix matches any string starting with prefix
+    Each bucket holds the same nodes, in the same order, as filter_by_path or
+    filter_by_predicate would return for that query on its own. Subtrees are
+    only visited while a path pattern can still match below them, or when a
+    predicate query needs the whole tree.
+
+    Args:
+        roots: List of root nodes to search
+        queries: Mapping from bucket name to a path pattern (string or compiled
+            with compile_path) or a predicate function
+        active_pathways_only: If True, skip inactive pathways for all queries
+        children_key: Key name for children array (default: "children")
+
+    Returns:
+        Dict with a list of matching nodes for every query name
     """
-    if len(current_path) != len(target_path):
-        return False
+    results: Dict[str, List[Dict[str, Any]]] = {name: [] for name in queries}
+    patterns: List[Tuple[List[Dict[str, Any]], PathPattern]] = []
+    predicates: List[Tuple[List[Dict[str, Any]], Callable[[Dict[str, Any]], bool]]] = []
+
+    for name, query in queries.items():
+        if isinstance(query, PathPattern):
+            patterns.append((results[name], query))
+        elif isinstance(query, str):
+            patterns.append((results[name], compile_path(query)))
+        else:
+            predicates.append((results[name], query))
+
+    def is_inactive(node: Dict[str, Any]) -> bool:
+        return (
+            active_pathways_only
+            and node.get("type") == "patientPathwayReference"
+            and node.get("pathwayStatus") != "ACTIVE"
+        )
 
-    for i, (node, pattern) in enumerate(zip(current_path, target_path)):
-        # Wildcard matches anything
-        if pattern == "*":
+    # For each depth of the current path, the patterns that matched every node
+    # so far and are deeper than that node
+    pending: List[List[Tuple[List[Dict[str, Any]], PathPattern]]] = []
+
+    def descend(node: Dict[str, Any], path: List[Dict[str, Any]]) -> bool:
+        return not is_inactive(node) and (bool(predicates) or bool(pending[-1]))
+
+    for node, path in _walk(roots, children_key, descend):
+        index = len(path) - 1
+        del pending[index:]
+
+        if is_inactive(node):
+            pending.append([])
             continue
 
-        # Get node name or type for matching
-        node_name = node.get("name", "")
-        node_type = node.get("type", "")
+        candidates = pending[index - 1] if index else patterns
+        deeper = []
 
-        # Check for prefix match (pattern ends with %)
-        if pattern.endswith("%"):
-            prefix = pattern[:-1]
-            name_match = node_name.startswith(prefix)
-            type_match = node_type.startswith(prefix)
-        else:
-            # Exact match with regex support - escape special chars then handle % wildcards
-            escaped_pattern = re.escape(pattern).replace(r"\%", ".*")
-            name_match = re.fullmatch(escaped_pattern, node_name) is not None
-            type_match = re.fullmatch(escaped_pattern, node_type) is not None
+        for bucket, pattern in candidates:
+            if pattern.matches_segment(index, node):
+                if len(pattern) == index + 1:
+                    bucket.append(node)
+                else:
+                    deeper.append((bucket, pattern))
+
+        pending.append(deeper)
 
-        if not (name_match or type_match):
-            return False
+        for bucket, predicate in predicates:
+            if predicate(node):
+                bucket.append(node)
 
-    return True
+    return results
 
 
 def filter_by_predicate(
@@ -269,19 +481,28 @@ def filter_by_predicate(
     Returns:
         List of nodes that match the predicate
     """
-    result = []
+    return find_nodes(roots, predicate, children_key)
 
-    for node in roots:
-        # Check current node
-        if predicate(node):
-            result.append(node)
 
-        # Recursively check children
-        children = node.get(children_key, [])
-        if children:
-            result.extend(filter_by_predicate(children, predicate, children_key))
+def iter_filter_by_predicate(
+    roots: List[Dict[str, Any]],
+    predicate: Callable[[Dict[str, Any]], bool],
+    children_key: str = "children",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over nodes matching a predicate function.
+
+    Generator counterpart of filter_by_predicate.
 
-    return result
+    Args:
+        roots: List of root nodes to search
+        predicate: Function that returns True for nodes to include
+        children_key: Key name for children array (default: "children")
+
+    Returns:
+        Iterator over the nodes that match the predicate in depth-first order
+    """
+    return iter_find_nodes(roots, predicate, children_key)
 
 
 def map_tree(
@@ -300,17 +521,27 @@ def map_tree(
     Returns:
         New tree with transformed nodes
     """
-    # Transform current node
-    transformed = transform_fn(node.copy())
+    # Transformed copy of the last node visited at each depth; when a node is
+    # visited, the entry one level up is its parent's copy
+    copies: List[Dict[str, Any]] = []
 
-    # Recursively transform children
-    children = node.get(children_key, [])
-    if children:
-        transformed[children_key] = [
-            map_tree(child, transform_fn, children_key) for child in children
-        ]
+    for current, path in _walk(node, children_key):
+        depth = len(path) - 1
 
-    return transformed
+        transformed = transform_fn(current.copy())
+        if depth:
+            copies[depth - 1][children_key].append(transformed)
+        else:
+            result = transformed
+
+        if current.get(children_key):
+            transformed[children_key] = []
+            if depth < len(copies):
+                copies[depth] = transformed
+            else:
+                copies.append(transformed)
+
+    return result
 
 
 def get_node_path(
@@ -331,32 +562,11 @@ def get_node_path(
     Returns:
         List representing path from root to target, or None if not found
     """
-    if compare_fn is None:
-
-        def default_compare_fn(a, b):
-            return a is b
-
-        compare_fn = default_compare_fn
+    for node, path in _walk(roots, children_key):
+        if node is target_node if compare_fn is None else compare_fn(node, target_node):
+            return list(path)
 
-    found_path = None
-
-    def visit_node(node: Dict[str, Any], path: List[Dict[str, Any]]) -> None:
-        nonlocal found_path
-        if found_path is None and compare_fn(node, target_node):
-            found_path = path.copy()
-
-    # Normalize input to list
-    if isinstance(roots, dict):
-        root_nodes = [roots]
-    else:
-        root_nodes = roots
-
-    for root in root_nodes:
-        traverse_tree(root, visit_node, children_key)
-        if found_path:
-            break
-
-    return found_path
+    return None
 
 
 def flatten_tree(
@@ -375,15 +585,183 @@ def flatten_tree(
     Returns:
         Flat list of all nodes in the tree
     """
-    nodes = []
+    return list(
+        iter_flatten_tree(node, children_key, copy_nodes=not include_children_key)
+    )
+
+
+def iter_flatten_tree(
+    node: Union[Dict[str, Any], List[Dict[str, Any]]],
+    children_key: str = "children",
+    copy_nodes: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over all nodes in a tree structure.
+
+    Unlike flatten_tree, the nodes themselves are yielded unless copy_nodes is set.
 
-    def visit_node(current_node: Dict[str, Any], path: List[Dict[str, Any]]) -> None:
-        if include_children_key:
-            nodes.append(current_node)
+    Args:
+        node: Root node or list of root nodes to flatten
+        children_key: Key name for children array (default: "children")
+        copy_nodes: If True, yield copies of the nodes without the children key
+
+    Yields:
+        All nodes in the tree in depth-first order
+    """
+    for current_node, _ in _walk(node, children_key, track_path=False):
+        if copy_nodes:
+            yield {k: v for k, v in current_node.items() if k != children_key}
         else:
-            # Create copy without children key
-            node_copy = {k: v for k, v in current_node.items() if k != children_key}
-            nodes.append(node_copy)
+            yield current_node
+
+
+class TreeIndex:
+    """
+    Index over a tree for repeated lookups without scanning it again.
+
+    The tree is walked once when the index is built. Nodes are indexed by id,
+    type and name, and each node's parent is kept in a side table keyed by the
+    node's identity, so the nodes themselves are left untouched.
+
+    The index reflects the tree at the time it was built. Build a new index if
+    nodes are added or removed.
+
+    Building the index walks the whole tree, so it only pays off when the same
+    tree is queried several times, e.g. a parent lookup for every form in
+    SkemaerClient. A single search is cheaper with find_nodes or filter_by_path,
+    which stop early or skip subtrees.
+    """
+
+    def __init__(
+        self,
+        roots: Union[Dict[str, Any], List[Dict[str, Any]]],
+        children_key: str = "children",
+        id_key: str = "id",
+    ):
+        """
+        Build the index.
+
+        Args:
+            roots: Single node or list of root nodes to index
+            children_key: Key name for children array (default: "children")
+            id_key: Key name for the ID field (default: "id")
+        """
+        self.children_key = children_key
+        self.id_key = id_key
+
+        self._nodes: List[Dict[str, Any]] = []
+        self._parents: Dict[int, Optional[Dict[str, Any]]] = {}
+        self._by_id: Dict[Any, Dict[str, Any]] = {}
+        self._by_type: Dict[Any, List[Dict[str, Any]]] = {}
+        self._by_name: Dict[Any, List[Dict[str, Any]]] = {}
+
+        for node, path in _walk(roots, children_key):
+            self._nodes.append(node)
+            self._parents[id(node)] = path[-2] if len(path) > 1 else None
+
+            node_id = node.get(id_key)
+            if node_id is not None:
+                # First node in depth-first order wins, like find_node_by_id
+                self._by_id.setdefault(node_id, node)
+
+            self._by_type.setdefault(node.get("type"), []).append(node)
+            self._by_name.setdefault(node.get("name"), []).append(node)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._nodes)
+
+    def __contains__(self, node: object) -> bool:
+        return id(node) in self._parents
+
+    def by_id(self, node_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Get a node by its ID.
+
+        Args:
+            node_id: The ID to look up
+
+        Returns:
+            The first node with the ID in depth-first order, or None
+        """
+        return self._by_id.get(node_id)
+
+    def by_type(self, node_type: str) -> List[Dict[str, Any]]:
+        """
+        Get all nodes of a type.
+
+        Args:
+            node_type: Value of the node's type field
+
+        Returns:
+            Matching nodes in depth-first order
+        """
+        return list(self._by_type.get(node_type, ()))
+
+    def by_name(self, name: str) -> List[Dict[str, Any]]:
+        """
+        Get all nodes with a name.
+
+        Args:
+            name: Value of the node's name field
+
+        Returns:
+            Matching nodes in depth-first order
+        """
+        return list(self._by_name.get(name, ()))
+
+    def parent(self, node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Get the parent of a node.
+
+        Args:
+            node: A node in the indexed tree
+
+        Returns:
+            The parent node, or None for root nodes
+
+        Raises:
+            KeyError: If the node is not part of the index
+        """
+        try:
+            return self._parents[id(node)]
+        except KeyError:
+            raise KeyError("Node is not part of the index") from None
+
+    def ancestors(self, node: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Get the ancestors of a node.
+
+        Args:
+            node: A node in the indexed tree
+
+        Returns:
+            Ancestors from the parent up to the root (nearest first)
+        """
+        ancestors = []
+        parent = self.parent(node)
+
+        while parent is not None:
+            ancestors.append(parent)
+            parent = self._parents[id(parent)]
+
+        return ancestors
+
+    def path(self, node: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Get the path from the root to a node.
+
+        Same result as get_node_path, in O(depth) time.
+
+        Args:
+            node: A node in the indexed tree
 
-    traverse_tree(node, visit_node, children_key)
-    return nodes
+        Returns:
+            List of nodes from the root to and including the node
+        """
+        path = self.ancestors(node)
+        path.reverse()
+        path.append(node)
+        return path
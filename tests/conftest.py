@@ -2,8 +2,12 @@ import pytest
 import os
 import json
 from pathlib import Path
+from unittest.mock import patch
 
+import httpx
+from authlib.integrations.httpx_client import OAuth2Client
 from dotenv import load_dotenv
+from kmd_nexus_client.client import NexusClient
 from kmd_nexus_client.manager import NexusClientManager
 from kmd_nexus_client.tree_helpers import filter_by_path
 
@@ -78,3 +82,49 @@ def grant_prototype_data():
 
     with open(grant_file, "r", encoding="utf-8") as f:
         return json.load(f)
+
+
+MOCK_BASE_URL = "https://test.nexus.kmd.dk/api/core/mobile/test/v2/"
+
+
+@pytest.fixture
+def mock_nexus_client():
+    """
+    Factory for an offline NexusClient backed by an httpx.MockTransport.
+
+    The handler receives every API request. Token and API root requests are
+    answered automatically, so the handler only needs to serve the endpoints
+    used by the test. All requested URLs are recorded in ``factory.kald``.
+    """
+
+    def factory(handler, **kwargs) -> NexusClient:
+        def transport_handler(request: httpx.Request) -> httpx.Response:
+            url = str(request.url)
+            factory.kald.append(url)
+            if url.endswith("/protocol/openid-connect/token"):
+                return httpx.Response(
+                    200,
+                    json={
+                        "access_token": "token",
+                        "token_type": "Bearer",
+                        "expires_in": 300,
+                    },
+                )
+            if url == MOCK_BASE_URL:
+                return httpx.Response(
+                    200, json={"_links": {"self": {"href": MOCK_BASE_URL}}}
+                )
+            return handler(request)
+
+        def oauth_client(**client_kwargs):
+            return OAuth2Client(
+                transport=httpx.MockTransport(transport_handler), **client_kwargs
+            )
+
+        with patch("kmd_nexus_client.client.OAuth2Client", oauth_client):
+            return NexusClient(
+                instance="test", client_id="id", client_secret="secret", **kwargs
+            )
+
+    factory.kald = []
+    return factory
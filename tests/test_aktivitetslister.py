@@ -1,6 +1,12 @@
+import threading
+import time
+
+import httpx
 import pytest
 
+from kmd_nexus_client.functionality.aktivitetslister import AktivitetslisteClient
 from kmd_nexus_client.manager import NexusClientManager
+from tests.conftest import MOCK_BASE_URL
 
 def test_hent_aktivitetsliste_elementer(nexus_manager: NexusClientManager):
     aktivitetsliste = nexus_manager.aktivitetslister.hent_aktivitetsliste(
@@ -13,3 +19,76 @@ def test_hent_aktivitetsliste_elementer(nexus_manager: NexusClientManager):
     assert aktivitetsliste is not None
     assert isinstance(aktivitetsliste, list)
     assert len(aktivitetsliste) > 0
+
+
+def _aktivitetsliste_handler(sider: int, forsinkelse: float, samtidige: list):
+    """Mock Nexus serving an activity list with slow pages, tracking concurrent page calls."""
+    aktive = []
+    lås = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sti = request.url.path
+        if sti.endswith("/preferences"):
+            return httpx.Response(
+                200,
+                json={
+                    "ACTIVITY_LIST": [
+                        {"name": "Liste", "_links": {"self": {"href": MOCK_BASE_URL + "liste"}}}
+                    ]
+                },
+            )
+        if sti.endswith("/liste"):
+            return httpx.Response(
+                200, json={"_links": {"content": {"href": MOCK_BASE_URL + "indhold?x=1"}}}
+            )
+        if sti.endswith("/indhold"):
+            return httpx.Response(
+                200,
+                json={
+                    "pages": [
+                        {"_links": {"content": {"href": MOCK_BASE_URL + f"side/{i}"}}}
+                        for i in range(sider)
+                    ]
+                },
+            )
+        if "/side/" in sti:
+            side = int(sti.rsplit("/", 1)[1])
+            with lås:
+                aktive.append(side)
+                samtidige.append(len(aktive))
+            time.sleep(forsinkelse * (sider - side) / sider)
+            with lås:
+                aktive.remove(side)
+            return httpx.Response(200, json=[{"id": side * 10 + j} for j in range(3)])
+        return httpx.Response(404, json={})
+
+    return handler
+
+
+def test_sider_hentes_samtidigt_i_rækkefølge(mock_nexus_client):
+    samtidige = []
+    klient = AktivitetslisteClient(
+        mock_nexus_client(_aktivitetsliste_handler(12, 0.05, samtidige))
+    )
+
+    aktiviteter = klient.hent_aktivitetsliste("Liste", None, None, max_samtidige=4)
+
+    assert [a["id"] for a in aktiviteter] == [s * 10 + j for s in range(12) for j in range(3)]
+    assert 1 < max(samtidige) <= 4
+    assert klient.hent_aktivitetsliste("Findes ikke", None, None) is None
+
+
+def test_iter_aktivitetsliste_stopper_tidligt(mock_nexus_client):
+    samtidige = []
+    klient = AktivitetslisteClient(
+        mock_nexus_client(_aktivitetsliste_handler(40, 0.01, samtidige))
+    )
+
+    aktiviteter = klient.iter_aktivitetsliste("Liste", None, None, max_samtidige=2)
+
+    assert [next(aktiviteter)["id"] for _ in range(4)] == [0, 1, 2, 10]
+    aktiviteter.close()
+    assert len(samtidige) < 40
+
+    with pytest.raises(ValueError):
+        klient.iter_aktivitetsliste("Findes ikke", None, None)
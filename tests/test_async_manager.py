@@ -0,0 +1,336 @@
+"""
+Tests for AsyncNexusClient and AsyncNexusClientManager.
+
+These tests run offline against an httpx.MockTransport.
+"""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import httpx
+import pytest
+from authlib.integrations.httpx_client import AsyncOAuth2Client
+
+
+from kmd_nexus_client.async_functionality import TrådFallbackClient
+from kmd_nexus_client.async_manager import AsyncNexusClientManager
+from kmd_nexus_client.functionality.borgere import AsyncBorgerClient
+
+
+BASE_URL = "https://test.nexus.kmd.dk/api/core/mobile/test/v2/"
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    url = str(request.url)
+
+    if url.endswith("/protocol/openid-connect/token"):
+        return httpx.Response(
+            200,
+            json={"access_token": "token", "token_type": "Bearer", "expires_in": 300},
+        )
+
+    if url == BASE_URL:
+        return httpx.Response(
+            200,
+            json={
+                "_links": {
+                    "patientDetailsSearch": {"href": "patient/details/search"},
+                    "organizations": {"href": BASE_URL + "organizations"},
+                    "searchPatients": {"href": BASE_URL + "patients/search"},
+                }
+            },
+        )
+
+    if url == BASE_URL + "organizations":
+        return httpx.Response(
+            200, json=[{"id": i, "name": f"Organisation {i}"} for i in range(100)]
+        )
+
+    if url == BASE_URL + "patient/details/search":
+        return httpx.Response(
+            200,
+            json={
+                "isPatientAccessible": True,
+                "patient": {"id": 1, "fullName": "Nancy Berggren"},
+            },
+        )
+
+    if url == BASE_URL + "objekt/1":
+        return httpx.Response(200, json={"id": 1})
+
+    if request.url.path.endswith("/patients/search"):
+        antal = int(request.url.params["maxResults"])
+        return httpx.Response(200, json=[{"id": i} for i in range(min(antal, 25))])
+
+    if url == BASE_URL + "preferences":
+        return httpx.Response(
+            200,
+            json={"ACTIVITY_LIST": [{"name": "Liste", "_links": {"self": {"href": BASE_URL + "liste"}}}]},
+        )
+
+    if url == BASE_URL + "liste":
+        return httpx.Response(
+            200, json={"_links": {"content": {"href": BASE_URL + "indhold?x=1"}}}
+        )
+
+    if request.url.path.endswith("/indhold"):
+        return httpx.Response(
+            200,
+            json={
+                "pages": [
+                    {"_links": {"content": {"href": BASE_URL + f"side/{i}"}}}
+                    for i in range(5)
+                ]
+            },
+        )
+
+    if "/side/" in url:
+        side = int(url.rsplit("/", 1)[1])
+        return httpx.Response(200, json=[{"id": side * 10 + j} for j in range(2)])
+
+    return httpx.Response(404, json={})
+
+
+def _mock_oauth_client(**kwargs):
+    return AsyncOAuth2Client(transport=httpx.MockTransport(_handler), **kwargs)
+
+
+@patch("kmd_nexus_client.async_client.AsyncOAuth2Client", _mock_oauth_client)
+def test_async_manager_kalder_funktionalitet():
+    async def kør():
+        async with AsyncNexusClientManager(
+            instance="test", client_id="id", client_secret="secret"
+        ) as nexus:
+            assert "patientDetailsSearch" in nexus.nexus_client.api
+
+            borgere = await asyncio.gather(
+                *(nexus.borgere.hent_borger("0104909989") for _ in range(5))
+            )
+            assert all(b["fullName"] == "Nancy Berggren" for b in borgere)
+
+            objekt = await nexus.hent_fra_reference(
+                {"_links": {"self": {"href": BASE_URL + "objekt/1"}}}
+            )
+            assert objekt == {"id": 1}
+
+    asyncio.run(kør())
+
+
+def test_async_manager_kræver_open():
+    nexus = AsyncNexusClientManager(
+        instance="test", client_id="id", client_secret="secret"
+    )
+
+    with pytest.raises(RuntimeError):
+        nexus.borgere
+
+
+def test_async_klienter_deler_token(tmp_path):
+    from kmd_nexus_client.async_client import AsyncNexusClient
+    from kmd_nexus_client.token_store import FileTokenStore
+
+    token_kald = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if str(request.url).endswith("/protocol/openid-connect/token"):
+            token_kald.append(request.url)
+        return _handler(request)
+
+    def oauth_client(**kwargs):
+        return AsyncOAuth2Client(transport=httpx.MockTransport(handler), **kwargs)
+
+    store = FileTokenStore(tmp_path)
+
+    async def kør():
+        with patch("kmd_nexus_client.async_client.AsyncOAuth2Client", oauth_client):
+            klienter = [
+                AsyncNexusClient(
+                    instance="test",
+                    client_id="id",
+                    client_secret="secret",
+                    token_store=store,
+                )
+                for _ in range(3)
+            ]
+        await asyncio.gather(*(k.get("objekt/1") for k in klienter))
+        for k in klienter:
+            await k.aclose()
+
+    asyncio.run(kør())
+    assert len(token_kald) == 1
+
+
+@patch("kmd_nexus_client.async_client.AsyncOAuth2Client", _mock_oauth_client)
+def test_async_samtidige_ens_get_deler_kald():
+    from kmd_nexus_client.async_client import AsyncNexusClient
+
+    async def kør():
+        klient = AsyncNexusClient(instance="test", client_id="id", client_secret="secret")
+        sendt = []
+        original = klient._request
+
+        async def tæl(method, endpoint, **kwargs):
+            sendt.append(endpoint)
+            await asyncio.sleep(0.05)
+            return await original(method, endpoint, **kwargs)
+
+        klient._request = tæl
+        svar = await asyncio.gather(*(klient.get("objekt/1") for _ in range(5)))
+        await klient.aclose()
+        return sendt, svar
+
+    sendt, svar = asyncio.run(kør())
+    assert sendt == ["objekt/1"]
+    assert [s.json() for s in svar] == [{"id": 1}] * 5
+
+
+@patch("kmd_nexus_client.async_client.AsyncOAuth2Client", _mock_oauth_client)
+def test_async_get_efter_skrivning_deler_ikke_ældre_kald():
+    from kmd_nexus_client.async_client import AsyncNexusClient
+
+    async def kør():
+        klient = AsyncNexusClient(instance="test", client_id="id", client_secret="secret")
+        sendt = []
+        original = klient._request
+
+        async def tæl(method, endpoint, **kwargs):
+            sendt.append((method, endpoint))
+            if method == "GET":
+                await asyncio.sleep(0.1)
+            return await original(method, endpoint, **kwargs)
+
+        klient._request = tæl
+        ældre = asyncio.create_task(klient.get("objekt/1"))
+        await asyncio.sleep(0)
+        await klient.put("objekt/1", {"id": 1})
+        await klient.get("objekt/1")
+        await ældre
+        await klient.aclose()
+        return sendt
+
+    sendt = asyncio.run(kør())
+    assert sendt.count(("GET", "objekt/1")) == 2
+
+
+@patch("kmd_nexus_client.async_client.AsyncOAuth2Client", _mock_oauth_client)
+def test_async_iter_aktivitetsliste_giver_asynkron_generator():
+    async def kør():
+        async with AsyncNexusClientManager(
+            instance="test", client_id="id", client_secret="secret"
+        ) as nexus:
+            aktiviteter = nexus.aktivitetslister.iter_aktivitetsliste(
+                "Liste", None, None, max_samtidige=2
+            )
+            alle = [aktivitet["id"] async for aktivitet in aktiviteter]
+
+            # Et afbrudt gennemløb lukkes uden at blokere event loop'en
+            første = nexus.aktivitetslister.iter_aktivitetsliste("Liste", None, None)
+            async for aktivitet in første:
+                break
+            await første.aclose()
+            return alle
+
+    alle = asyncio.run(asyncio.wait_for(kør(), timeout=5))
+    assert alle == [side * 10 + j for side in range(5) for j in range(2)]
+
+
+@patch("kmd_nexus_client.async_client.AsyncOAuth2Client", _mock_oauth_client)
+def test_async_iter_søg_borgere():
+    async def kør():
+        async with AsyncNexusClientManager(
+            instance="test", client_id="id", client_secret="secret"
+        ) as nexus:
+            søgning = nexus.borgere.iter_søg_borgere("Nancy", max_antal=10)
+            return [borger["id"] async for borger in søgning]
+
+    assert asyncio.run(asyncio.wait_for(kør(), timeout=5)) == list(range(10))
+
+
+@patch("kmd_nexus_client.async_client.AsyncOAuth2Client", _mock_oauth_client)
+def test_async_native_metoder_bruger_ikke_worker_tråde():
+    async def kør():
+        async with AsyncNexusClientManager(
+            instance="test", client_id="id", client_secret="secret", max_samtidige=1
+        ) as nexus:
+            assert isinstance(nexus.borgere, AsyncBorgerClient)
+            assert isinstance(nexus.organisationer, TrådFallbackClient)
+
+            # Optag den eneste worker tråd; native kald må ikke vente på den
+            frigiv = threading.Event()
+            loop = asyncio.get_running_loop()
+            optaget = loop.run_in_executor(nexus._executor, frigiv.wait)
+            try:
+                borger = await nexus.borgere.hent_borger("0104909989")
+                søgning = [
+                    b["id"] async for b in nexus.borgere.iter_søg_borgere("Nancy", max_antal=3)
+                ]
+                aktiviteter = await nexus.aktivitetslister.hent_aktivitetsliste(
+                    "Liste", None, None
+                )
+            finally:
+                frigiv.set()
+                await optaget
+
+            # Metoder uden native udgave køres stadig af fallback'en
+            forløb = await nexus.borgere.hent_aktive_forløb(
+                {"_links": {"activePrograms": {"href": BASE_URL + "objekt/1"}}}
+            )
+            return borger, søgning, aktiviteter, forløb
+
+    borger, søgning, aktiviteter, forløb = asyncio.run(asyncio.wait_for(kør(), timeout=5))
+    assert borger["fullName"] == "Nancy Berggren"
+    assert søgning == [0, 1, 2]
+    assert len(aktiviteter) == 10
+    assert forløb == {"id": 1}
+
+
+@patch("kmd_nexus_client.async_client.AsyncOAuth2Client", _mock_oauth_client)
+def test_async_native_skemaer_og_indsatser():
+    async def kør():
+        async with AsyncNexusClientManager(
+            instance="test", client_id="id", client_secret="secret"
+        ) as nexus:
+            reference = {"_links": {"referencedObject": {"href": BASE_URL + "objekt/1"}}}
+            skema = await nexus.skemaer.hent_skema_fra_reference(reference)
+            indsats = await nexus.indsatser.hent_indsats(
+                {"type": "basketGrantReference", **reference}
+            )
+            with pytest.raises(ValueError):
+                await nexus.skemaer.hent_skema_fra_reference({"_links": {}})
+            return skema, indsats
+
+    assert asyncio.run(asyncio.wait_for(kør(), timeout=5)) == ({"id": 1}, {"id": 1})
+
+
+@patch("kmd_nexus_client.async_client.AsyncOAuth2Client", _mock_oauth_client)
+def test_async_iter_aktivitetsliste_ukendt_liste():
+    async def kør():
+        async with AsyncNexusClientManager(
+            instance="test", client_id="id", client_secret="secret"
+        ) as nexus:
+            assert await nexus.aktivitetslister.hent_aktivitetsliste("Ukendt", None, None) is None
+            with pytest.raises(ValueError):
+                async for _ in nexus.aktivitetslister.iter_aktivitetsliste("Ukendt", None, None):
+                    pass
+
+    asyncio.run(asyncio.wait_for(kør(), timeout=5))
+
+
+@patch("kmd_nexus_client.async_client.AsyncOAuth2Client", _mock_oauth_client)
+def test_async_stream_items():
+    async def kør():
+        async with AsyncNexusClientManager(
+            instance="test", client_id="id", client_secret="secret"
+        ) as nexus:
+            organisation = await nexus.organisationer.hent_organisation_ved_navn(
+                "Organisation 42"
+            )
+            alle = [
+                item async for item in nexus.nexus_client.stream_items("organizations")
+            ]
+            return organisation, alle
+
+    organisation, alle = asyncio.run(kør())
+    assert organisation == {"id": 42, "name": "Organisation 42"}
+    assert len(alle) == 100
@@ -0,0 +1,137 @@
+"""
+Tests for the scoped per-citizen cache.
+"""
+
+import contextvars
+import threading
+
+import httpx
+import pytest
+
+from kmd_nexus_client.borger_cache import BorgerCache, current_cache
+from kmd_nexus_client.concurrency import map_bounded
+from kmd_nexus_client.manager import NexusClientManager
+from tests.conftest import MOCK_BASE_URL
+
+BORGER = {
+    "_links": {"patientPreferences": {"href": f"{MOCK_BASE_URL}preferences"}},
+}
+
+SVAR = {
+    "preferences": {
+        "CITIZEN_PATHWAY": [
+            {"name": "- Alt", "_links": {"self": {"href": f"{MOCK_BASE_URL}visning"}}}
+        ],
+        "CITIZEN_CALENDAR": [
+            {"name": "Borgerkalender", "_links": {"self": {"href": f"{MOCK_BASE_URL}kalender"}}}
+        ],
+    },
+    "visning": {
+        "_links": {"pathwayReferences": {"href": f"{MOCK_BASE_URL}referencer"}}
+    },
+    "referencer": [
+        {
+            "id": 1,
+            "name": "Sundhedsfagligt grundforløb",
+            "type": "patientPathwayReference",
+            "children": [],
+        }
+    ],
+    "kalender": {"id": 2},
+}
+
+
+def _manager(mock_nexus_client) -> NexusClientManager:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=SVAR[request.url.path.rsplit("/", 1)[-1]])
+
+    manager = NexusClientManager(instance="test", client_id="id", client_secret="secret")
+    manager._nexus_client = mock_nexus_client(handler)
+    return manager
+
+
+def _antal_kald(mock_nexus_client, navn: str) -> int:
+    return mock_nexus_client.kald.count(f"{MOCK_BASE_URL}{navn}")
+
+
+def test_klienter_deler_præferencer_visning_og_referencer(mock_nexus_client):
+    nexus = _manager(mock_nexus_client)
+
+    with BorgerCache() as cache:
+        visning = nexus.borgere.hent_visning(BORGER)
+        nexus.borgere.hent_referencer(visning)
+        nexus.kalender.hent_kalender(BORGER)
+        nexus.skemaer.hent_skemareferencer(BORGER)
+        nexus.skemaer.hent_skemareferencer(BORGER)
+        assert len(cache) == 3
+
+    assert len(cache) == 0
+    assert current_cache() is None
+    assert _antal_kald(mock_nexus_client, "preferences") == 1
+    assert _antal_kald(mock_nexus_client, "visning") == 1
+    assert _antal_kald(mock_nexus_client, "referencer") == 1
+
+
+def test_uden_cache_hentes_hver_gang(mock_nexus_client):
+    nexus = _manager(mock_nexus_client)
+
+    nexus.borgere.hent_visning(BORGER)
+    nexus.kalender.hent_kalender(BORGER)
+
+    assert _antal_kald(mock_nexus_client, "preferences") == 2
+
+
+def test_cache_følger_med_til_tråde(mock_nexus_client):
+    nexus = _manager(mock_nexus_client)
+
+    with BorgerCache() as cache:
+        resultater = map_bounded(
+            lambda _: nexus.borgere.hent_præferencer(BORGER), range(4), max_workers=4
+        )
+        assert len(cache) == 1
+
+    assert all(resultat == SVAR["preferences"] for resultat in resultater)
+
+
+def test_skrivning_rydder_referencer(mock_nexus_client):
+    nexus = _manager(mock_nexus_client)
+
+    with BorgerCache() as cache:
+        visning = nexus.borgere.hent_visning(BORGER)
+        nexus.borgere.hent_referencer(visning)
+        nexus.nexus_client.post(f"{MOCK_BASE_URL}kalender", json={})
+        assert len(cache) == 2
+        nexus.borgere.hent_referencer(visning)
+        nexus.borgere.hent_visning(BORGER)
+
+    assert _antal_kald(mock_nexus_client, "referencer") == 2
+    assert _antal_kald(mock_nexus_client, "visning") == 1
+
+
+def test_delt_cache_i_flere_tråde(mock_nexus_client):
+    nexus = _manager(mock_nexus_client)
+    cache = BorgerCache()
+    start = threading.Barrier(4)
+
+    def job(_):
+        with cache:
+            start.wait()
+            nexus.borgere.hent_præferencer(BORGER)
+            start.wait()
+            return current_cache() is cache, len(cache)
+
+    # No thread's block empties the cache while the others still use it
+    assert map_bounded(job, range(4), max_workers=4) == [(True, 1)] * 4
+    assert len(cache) == 0
+    assert current_cache() is None
+
+
+def test_afslutning_i_anden_kontekst_afvises():
+    cache = BorgerCache()
+    cache.__enter__()
+
+    with pytest.raises(RuntimeError):
+        contextvars.Context().run(cache.__exit__, None, None, None)
+
+    cache.__exit__(None, None, None)
+    assert current_cache() is None
@@ -1,6 +1,16 @@
 # Fixtures are automatically loaded from conftest.py
 
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from kmd_nexus_client.functionality.borgere import BorgerClient
 from kmd_nexus_client.manager import NexusClientManager
+from kmd_nexus_client.retry import RetryPolicy
+from tests.conftest import MOCK_BASE_URL
 
 
 def test_hent_borger(nexus_manager: NexusClientManager):
@@ -83,4 +93,135 @@ def test_opret_netværksperson_på_borger(nexus_manager: NexusClientManager, tes
         }
     )
 
-    assert len(response_json) > 0
\ No newline at end of file
+    assert len(response_json) > 0
+
+def test_hent_borgere_validerer_og_fjerner_dubletter(mock_nexus_client):
+    """Test bulk opslag: ugyldige CPR numre, dubletter og borgere der ikke findes."""
+    opslag = []
+    lås = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        cpr = json.loads(request.content)["businessKey"]
+        with lås:
+            opslag.append(cpr)
+        time.sleep(0.02)
+        if cpr == "0202021234":
+            return httpx.Response(404, json={})
+        if cpr == "0303031234":
+            return httpx.Response(500, json={})
+        return httpx.Response(
+            200, json={"isPatientAccessible": True, "patient": {"cpr": cpr}}
+        )
+
+    klient = mock_nexus_client(handler, retry_policy=RetryPolicy(max_retries=0))
+    klient.api = {"patientDetailsSearch": MOCK_BASE_URL + "patient/details/search"}
+    borgere = BorgerClient(klient)
+
+    start = time.monotonic()
+    resultat = borgere.hent_borgere(
+        ["0101011234", "010101-1234", "0202021234", "0303031234", "ikke et cpr"]
+        + [f"{dag:02d}0101{dag:04d}" for dag in range(4, 20)],
+        max_samtidige=8,
+    )
+
+    assert time.monotonic() - start < 0.02 * 19
+    assert sorted(opslag) == sorted(set(opslag))
+    assert resultat["0101011234"] == {"cpr": "0101011234"}
+    assert resultat["010101-1234"] == resultat["0101011234"]
+    assert resultat["010101-1234"] is not resultat["0101011234"]
+    assert resultat["0202021234"] is None
+    assert isinstance(resultat["0303031234"], httpx.HTTPStatusError)
+    assert isinstance(resultat["ikke et cpr"], ValueError)
+    assert "ikke et cpr" not in opslag
+    assert len(resultat) == 21
+
+    opslag.clear()
+    with pytest.raises(ValueError):
+        borgere.hent_borgere(["0101011234", "ikke et cpr"], returner_fejl=False)
+    assert opslag == []
+
+
+def test_hent_og_opløs_referencer_henter_fulde_objekter(mock_nexus_client):
+    """Test at referencer der matcher et filter opløses til fulde objekter."""
+
+    def indsats(indsats_id: int) -> dict:
+        return {
+            "id": indsats_id,
+            "name": f"Indsats {indsats_id}",
+            "type": "basketGrantReference",
+            "_links": {
+                "referencedObject": {"href": f"{MOCK_BASE_URL}grants/{indsats_id}"}
+            },
+            "children": [],
+        }
+
+    referencer = [
+        {
+            "id": 1,
+            "name": "Sundhedsfagligt grundforløb",
+            "type": "patientPathwayReference",
+            "children": [
+                {
+                    "id": 2,
+                    "name": "FSIII",
+                    "type": "patientPathwayReference",
+                    "children": [indsats(3), indsats(4)],
+                },
+                indsats(5),
+            ],
+        }
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/referencer"):
+            return httpx.Response(200, json=referencer)
+        if request.url.path.endswith("/grants/4"):
+            return httpx.Response(404, json={})
+        return httpx.Response(200, json={"grant": request.url.path.rsplit("/", 1)[-1]})
+
+    klient = mock_nexus_client(handler)
+    klient.api = {}
+    borgere = BorgerClient(klient)
+    visning = {"_links": {"pathwayReferences": {"href": f"{MOCK_BASE_URL}referencer"}}}
+
+    fra_sti = borgere.hent_og_opløs_referencer(
+        visning, "/Sundhedsfagligt grundforløb/FSIII/Indsats%"
+    )
+
+    # Én fejlende reference koster ikke de andre resultater
+    assert fra_sti[0] == {"grant": "3"}
+    assert isinstance(fra_sti[1], httpx.HTTPStatusError)
+    assert borgere.hent_og_opløs_referencer(
+        visning,
+        lambda node: node.get("type") == "basketGrantReference" and node["id"] != 4,
+    ) == [{"grant": "3"}, {"grant": "5"}]
+    with pytest.raises(httpx.HTTPStatusError):
+        borgere.hent_og_opløs_referencer(visning, "/*/FSIII/*", returner_fejl=False)
+    assert borgere.hent_referencer(visning) == referencer
+
+
+def test_iter_søg_borgere_henter_ét_svar_op_til_max_antal(mock_nexus_client):
+    """Test at søgningen hentes med ét kald, begrænset af max_antal, og kan stoppes undervejs."""
+    alle = [{"id": i, "fullName": f"Borger {i}"} for i in range(230)]
+    antal = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        antal.append(int(request.url.params["maxResults"]))
+        return httpx.Response(
+            200, json=alle[: int(request.url.params["maxResults"])]
+        )
+
+    klient = mock_nexus_client(handler)
+    klient.api = {"searchPatients": MOCK_BASE_URL + "patients/search"}
+    borgere = BorgerClient(klient)
+
+    assert list(borgere.iter_søg_borgere("Borger")) == alle
+    assert list(borgere.iter_søg_borgere("Borger", max_antal=120)) == alle[:120]
+    assert antal == [1000, 120]
+
+    søgning = borgere.iter_søg_borgere("Borger", max_antal=10)
+    assert next(søgning) == alle[0]
+    søgning.close()
+
+    with pytest.raises(ValueError):
+        borgere.iter_søg_borgere("Borger", max_antal=0)
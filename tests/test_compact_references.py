@@ -0,0 +1,98 @@
+"""
+Tests for the compact reference representation.
+"""
+
+import copy
+
+import pytest
+
+from kmd_nexus_client.compact_references import CompactReference, compact_references
+from kmd_nexus_client.functionality.indsatser import IndsatsClient
+from kmd_nexus_client.tree_helpers import TreeIndex, filter_by_path
+
+
+def _indsats(node_id, tilstand):
+    return {
+        "id": node_id,
+        "name": f"Indsats {node_id}",
+        "type": "basketGrantReference",
+        "workflowState": {"id": 1, "name": tilstand},
+        "additionalInfo": [{"key": "Leverandør", "value": "Hjemmeplejen"}],
+        "_links": {
+            "self": {"href": f"https://nexus/refs/{node_id}"},
+            "referencedObject": {"href": f"https://nexus/grants/{node_id}"},
+        },
+        "children": [],
+    }
+
+
+@pytest.fixture
+def referencer():
+    return [
+        {
+            "id": 1,
+            "name": "Sundhedsfagligt grundforløb",
+            "type": "patientPathwayReference",
+            "pathwayStatus": "ACTIVE",
+            "_links": {"self": {"href": "https://nexus/refs/1", "templated": False}},
+            "children": [
+                {
+                    "id": 2,
+                    "name": "FSIII",
+                    "type": "patientPathwayReference",
+                    "children": [_indsats(3, "Bestilt"), _indsats(4, "Afsluttet")],
+                }
+            ],
+        }
+    ]
+
+
+def test_opfører_sig_som_dict(referencer):
+    original = copy.deepcopy(referencer)
+    (rod,) = compact_references(referencer)
+    indsats = rod["children"][0]["children"][0]
+
+    assert referencer == original
+    assert isinstance(rod, CompactReference)
+    assert rod == referencer[0]
+    assert rod.name == "Sundhedsfagligt grundforløb"
+    assert indsats["_links"]["referencedObject"]["href"] == "https://nexus/grants/3"
+    assert rod["_links"] == {"self": {"href": "https://nexus/refs/1", "templated": False}}
+    assert indsats.get("workflowState", {}).get("name") == "Bestilt"
+    assert indsats.get("pathwayStatus") is None
+    assert "date" not in indsats
+    with pytest.raises(KeyError):
+        indsats["date"]
+
+
+def test_ens_værdier_deles(referencer):
+    (rod,) = compact_references(referencer)
+    første, anden = rod["children"][0]["children"]
+
+    assert første["additionalInfo"] is anden["additionalInfo"]
+    assert første["workflowState"] is not anden["workflowState"]
+
+
+def test_to_dict_giver_uafhængig_kopi(referencer):
+    (rod,) = compact_references(referencer)
+    kopi = rod.to_dict()
+
+    assert kopi == referencer[0]
+    kopi["children"][0]["children"][0]["additionalInfo"].clear()
+    assert rod["children"][0]["children"][1]["additionalInfo"]
+
+
+def test_virker_med_tree_helpers_og_indsatser(referencer):
+    kompakte = compact_references(referencer)
+
+    assert filter_by_path(kompakte, "/*/FSIII/Indsats%") == filter_by_path(
+        referencer, "/*/FSIII/Indsats%"
+    )
+    assert TreeIndex(kompakte).path(kompakte[0]["children"][0]) == [
+        kompakte[0],
+        kompakte[0]["children"][0],
+    ]
+    aktive = IndsatsClient(None).filtrer_indsats_referencer(
+        kompakte, leverandør_navn="Hjemmeplejen"
+    )
+    assert [indsats.id for indsats in aktive] == [3]
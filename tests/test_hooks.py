@@ -0,0 +1,139 @@
+"""
+Tests for the response logging hooks.
+"""
+
+import asyncio
+import json
+import logging
+
+import httpx
+import pytest
+
+from kmd_nexus_client.hooks import (
+    create_async_response_logging_hook,
+    create_response_logging_hook,
+)
+
+
+URL = "https://test.nexus.kmd.dk/api/core/mobile/test/v2/organizations"
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger("kmd.nexus.test_hooks")
+    handler = _Records()
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    logger.records = handler.records
+    yield logger
+    logger.removeHandler(handler)
+
+
+def _streamed_response(method: str = "GET", status: int = 200, body: bytes = b"[]"):
+    """A response whose body has not been read yet."""
+    return httpx.Response(
+        status,
+        stream=httpx.ByteStream(body),
+        request=httpx.Request(method, URL, json={"a": 1} if method == "POST" else None),
+    )
+
+
+def test_deaktiveret_niveau_læser_ikke_body(logger):
+    logger.setLevel(logging.INFO)
+    response = _streamed_response()
+
+    create_response_logging_hook(logger)(response)
+
+    assert logger.records == []
+    assert not hasattr(response, "_content")
+
+
+def test_body_logges_som_json(logger):
+    body = json.dumps([{"id": 1}]).encode()
+
+    create_response_logging_hook(logger)(_streamed_response(body=body))
+
+    http = logger.records[0].http
+    assert logger.records[0].levelno == logging.DEBUG
+    assert http["response_body"] == [{"id": 1}]
+    assert http["response_status"] == 200
+
+
+def test_store_bodies_afkortes(logger):
+    body = json.dumps([{"id": i} for i in range(1000)]).encode()
+
+    create_response_logging_hook(logger, max_body_bytes=100)(_streamed_response(body=body))
+
+    http = logger.records[0].http
+    assert http["response_body_truncated"] is True
+    assert http["response_body_size"] == len(body)
+    assert http["response_body"] == body[:100].decode()
+
+
+def test_kun_metadata(logger):
+    response = _streamed_response(method="POST", status=201)
+
+    create_response_logging_hook(logger, log_bodies=False)(response)
+
+    http = logger.records[0].http
+    assert logger.records[0].levelno == logging.INFO
+    assert "response_body" not in http
+    assert "request_body" not in http
+    assert http["method"] == "POST"
+    assert not hasattr(response, "_content")
+
+
+def test_sampling_per_metode_og_status(logger):
+    hook = create_response_logging_hook(
+        logger, sample_rates={"GET": 0, "GET 404": 1}
+    )
+
+    hook(_streamed_response())
+    hook(_streamed_response(status=404))
+    hook(_streamed_response(method="POST"))
+
+    assert [(r.http["method"], r.http["response_status"]) for r in logger.records] == [
+        ("GET", 404),
+        ("POST", 200),
+    ]
+
+
+def test_token_kald_logges_ikke(logger):
+    response = httpx.Response(
+        200,
+        json={"access_token": "hemmelig"},
+        request=httpx.Request(
+            "POST", "https://iam.nexus.kmd.dk/authx/realms/test/protocol/openid-connect/token"
+        ),
+    )
+
+    create_response_logging_hook(logger)(response)
+
+    assert logger.records == []
+
+
+def test_async_hook_læser_kun_ved_logning(logger):
+    hook = create_async_response_logging_hook(logger)
+
+    logger.setLevel(logging.WARNING)
+    skipped = _streamed_response()
+    asyncio.run(hook(skipped))
+    assert not hasattr(skipped, "_content")
+
+    logger.setLevel(logging.DEBUG)
+    response = httpx.Response(
+        200,
+        stream=httpx.ByteStream(b'{"id": 1}'),
+        request=httpx.Request("GET", URL),
+    )
+    asyncio.run(hook(response))
+    assert logger.records[0].http["response_body"] == {"id": 1}
@@ -0,0 +1,140 @@
+"""
+Tests for the conditional-GET response cache.
+"""
+
+import time
+
+import httpx
+import pytest
+
+from kmd_nexus_client.http_cache import CacheEntry, DiskCache, MemoryCache, ResponseCache
+
+
+def _entry(content: bytes, etag: str = '"1"') -> CacheEntry:
+    return CacheEntry(
+        etag=etag,
+        last_modified=None,
+        headers={"content-type": "application/json", "etag": etag},
+        content=content,
+        stored_at=time.time(),
+    )
+
+
+class _Organisationer:
+    """Handler serving a resource with an ETag, answering 304 when it still matches."""
+
+    def __init__(self):
+        self.etag = '"v1"'
+        self.conditional = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if_none_match = request.headers.get("if-none-match")
+        self.conditional.append(if_none_match)
+
+        if if_none_match == self.etag:
+            return httpx.Response(304, headers={"ETag": self.etag})
+
+        return httpx.Response(
+            200,
+            headers={"ETag": self.etag},
+            json=[{"id": 1, "name": "Afdeling", "version": self.etag}],
+        )
+
+
+class TestCaches:
+    """Test the cache backends on their own."""
+
+    def test_memory_cache_lru(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", _entry(b"a"))
+        cache.set("b", _entry(b"b"))
+        cache.get("a")
+        cache.set("c", _entry(b"c"))
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+    def test_memory_cache_max_bytes(self):
+        cache = MemoryCache(max_bytes=10)
+        cache.set("a", _entry(b"123456"))
+        cache.set("b", _entry(b"123456"))
+
+        assert cache.get("a") is None
+        assert cache.get("b").content == b"123456"
+
+    def test_disk_cache_gemmer_og_rydder_op(self, tmp_path):
+        cache = DiskCache(tmp_path, max_bytes=600)
+        cache.set("a", _entry(b"x" * 100))
+        assert cache.get("a").content == b"x" * 100
+        assert cache.get("a").etag == '"1"'
+
+        time.sleep(0.01)
+        cache.set("b", _entry(b"y" * 100))
+        time.sleep(0.01)
+        cache.set("c", _entry(b"z" * 100))
+
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
+        assert len(list(tmp_path.glob("*.cache"))) == 2
+
+    def test_disk_cache_deles_mellem_instanser(self, tmp_path):
+        DiskCache(tmp_path).set("a", _entry(b"data"))
+
+        assert DiskCache(tmp_path).get("a").content == b"data"
+
+    def test_ufuldstændig_cache_kan_ikke_oprettes(self):
+        class UdenSletning(ResponseCache):
+            def get(self, key):
+                return None
+
+            def set(self, key, entry):
+                pass
+
+        with pytest.raises(TypeError):
+            UdenSletning()
+
+
+class TestConditionalGet:
+    """Test conditional GETs through NexusClient."""
+
+    def test_304_serveres_fra_cache(self, mock_nexus_client):
+        handler = _Organisationer()
+        client = mock_nexus_client(handler, http_cache=MemoryCache())
+
+        first = client.get("organizations")
+        second = client.get("organizations")
+
+        assert handler.conditional == [None, '"v1"']
+        assert second.status_code == 200
+        assert second.json() == first.json()
+
+    def test_ny_version_erstatter_cache(self, mock_nexus_client):
+        handler = _Organisationer()
+        client = mock_nexus_client(handler, http_cache=MemoryCache())
+
+        client.get("organizations")
+        handler.etag = '"v2"'
+
+        assert client.get("organizations").json()[0]["version"] == '"v2"'
+        assert client.get("organizations").json()[0]["version"] == '"v2"'
+        assert handler.conditional == [None, '"v1"', '"v2"']
+
+    def test_params_indgaar_i_noeglen(self, mock_nexus_client):
+        handler = _Organisationer()
+        client = mock_nexus_client(handler, http_cache=MemoryCache())
+
+        client.get("organizations", params={"a": "1"})
+        client.get("organizations", params={"a": "2"})
+        client.get("organizations?a=1")
+
+        assert handler.conditional == [None, None, '"v1"']
+
+    def test_uden_cache_sendes_ingen_betingelser(self, mock_nexus_client):
+        handler = _Organisationer()
+        client = mock_nexus_client(handler)
+
+        client.get("organizations")
+        client.get("organizations")
+
+        assert handler.conditional == [None, None]
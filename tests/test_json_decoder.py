@@ -0,0 +1,125 @@
+"""
+Tests for the pluggable JSON decoder.
+"""
+
+import json
+import logging
+
+import httpx
+import pytest
+
+from kmd_nexus_client.hooks import create_response_logging_hook
+from kmd_nexus_client.json_decoder import JSONArrayParser, get_decoder, use_decoder
+from tests.conftest import MOCK_BASE_URL
+
+
+def _tællende_loads(kald):
+    def loads(content):
+        kald.append(content)
+        return json.loads(content)
+
+    return loads
+
+
+def test_auto_falder_tilbage_til_json():
+    loads = get_decoder()
+
+    assert loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+    with pytest.raises(json.JSONDecodeError):
+        loads(b"{")
+
+
+def test_ukendt_backend():
+    with pytest.raises(ValueError):
+        get_decoder("yaml")
+
+
+def test_use_decoder_bevarer_response():
+    kald = []
+    response = httpx.Response(200, json={"id": 1})
+
+    use_decoder(response, _tællende_loads(kald))
+
+    assert isinstance(response, httpx.Response)
+    assert response.json() == {"id": 1}
+    assert len(kald) == 1
+    # Options for the stdlib decoder still work
+    assert response.json(parse_int=str) == {"id": "1"}
+    assert use_decoder(httpx.Response(200), json.loads).__class__ is httpx.Response
+
+
+def test_klient_bruger_decoder(mock_nexus_client):
+    kald = []
+
+    def handler(request):
+        return httpx.Response(200, json=[{"id": 1}])
+
+    klient = mock_nexus_client(handler, json_decoder=_tællende_loads(kald))
+
+    assert klient.get(MOCK_BASE_URL + "organizations").json() == [{"id": 1}]
+    assert kald[-1] == b'[{"id":1}]'
+
+
+def test_stream_items_bruger_decoder(mock_nexus_client):
+    kald = []
+
+    def handler(request):
+        return httpx.Response(200, json=[{"id": 1}, {"id": 2}])
+
+    klient = mock_nexus_client(handler, json_decoder=_tællende_loads(kald))
+
+    assert list(klient.stream_items("organizations")) == [{"id": 1}, {"id": 2}]
+    assert kald == ['{"id":1}', '{"id":2}']
+
+def test_hook_bruger_decoder():
+    kald = []
+    logger = logging.getLogger("kmd.nexus.test_json_decoder")
+    logger.setLevel(logging.DEBUG)
+    response = httpx.Response(
+        200, json={"id": 1}, request=httpx.Request("GET", MOCK_BASE_URL + "x")
+    )
+
+    create_response_logging_hook(logger, json_decoder=_tællende_loads(kald))(response)
+
+    assert kald == ['{"id":1}']
+
+
+def _fød(parser, tekst, størrelse):
+    items = []
+    for i in range(0, len(tekst), størrelse):
+        items += parser.feed(tekst[i : i + størrelse])
+    return items + parser.close()
+
+
+def test_array_parser_alle_opdelinger():
+    dokument = [
+        {"a": 'x\\"],{y', "b": [1, 2, {"c": None}]},
+        12345,
+        "str,]",
+        -1.5e3,
+        True,
+        None,
+        [],
+        {},
+        "\\",
+    ]
+    tekst = json.dumps(dokument)
+
+    for størrelse in range(1, len(tekst) + 1):
+        assert _fød(JSONArrayParser(), tekst, størrelse) == dokument
+
+
+def test_array_parser_stort_element_i_mange_bidder():
+    kald = []
+    element = {"tekst": "æ" * 100_000, "liste": list(range(1000))}
+    tekst = json.dumps([element, 1])
+
+    assert _fød(JSONArrayParser(_tællende_loads(kald)), tekst, 64) == [element, 1]
+    # Each item is decoded once, not retried on every chunk
+    assert len(kald) == 2
+
+
+@pytest.mark.parametrize("tekst", ["{}", "[1,]", "[1 2]", "[1]x", "[1", "[}]"])
+def test_array_parser_ugyldigt_dokument(tekst):
+    with pytest.raises(json.JSONDecodeError):
+        _fød(JSONArrayParser(), tekst, 1)
@@ -2,7 +2,14 @@
 Tests for NexusClientManager functionality.
 """
 
+import threading
+import time
 from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+
+from kmd_nexus_client.concurrency import expand_results, map_bounded, run_graph
 from kmd_nexus_client.manager import NexusClientManager
 from kmd_nexus_client.client import NexusClient
 from kmd_nexus_client.functionality.borgere import BorgerClient
@@ -11,6 +18,7 @@ from kmd_nexus_client.functionality.opgaver import OpgaverClient
 from kmd_nexus_client.functionality.indsatser import IndsatsClient
 from kmd_nexus_client.functionality.kalender import KalenderClient
 from kmd_nexus_client.functionality.forløb import ForløbClient
+from tests.conftest import MOCK_BASE_URL
 
 
 class TestNexusClientManager:
@@ -159,6 +167,62 @@ class TestNexusClientManager:
         assert manager.kalender is kalender_client
         assert manager.forløb is forløb_client
 
+    def test_samtidig_adgang_opretter_en_klient(self):
+        """Test that threads racing for a lazy property get the same instance."""
+        oprettet = []
+
+        def langsom_klient(**kwargs):
+            time.sleep(0.05)
+            oprettet.append(kwargs)
+            return Mock()
+
+        manager = NexusClientManager(
+            instance="test-instance",
+            client_id="test-client-id",
+            client_secret="test-client-secret",
+        )
+        start = threading.Barrier(16)
+
+        def hent_borgere(_):
+            start.wait()
+            return manager.borgere
+
+        with patch("kmd_nexus_client.manager.NexusClient", langsom_klient):
+            klienter = map_bounded(hent_borgere, range(16), max_workers=16)
+
+        assert len(oprettet) == 1
+        assert all(klient is klienter[0] for klient in klienter)
+
+    def test_forbindelses_pulje_konfigureres(self):
+        """Test that pool settings reach the underlying httpx client."""
+        manager = NexusClientManager(
+            instance="test-instance",
+            client_id="test-client-id",
+            client_secret="test-client-secret",
+            max_connections=40,
+            max_keepalive_connections=40,
+            keepalive_expiry=15,
+        )
+
+        pool = manager.nexus_client.client._transport._pool
+        assert pool._max_connections == 40
+        assert pool._max_keepalive_connections == 40
+        assert pool._keepalive_expiry == 15
+
+    def test_http2_uden_h2_falder_tilbage(self):
+        """Test that http2 falls back to HTTP/1.1 when h2 is missing."""
+        with patch("importlib.util.find_spec", return_value=None):
+            manager = NexusClientManager(
+                instance="test-instance",
+                client_id="test-client-id",
+                client_secret="test-client-secret",
+                http2=True,
+            )
+            client = manager.nexus_client
+
+        assert client.client._transport._pool._http2 is False
+        assert isinstance(client.client, httpx.Client)
+
 
 class TestNexusClientManagerMethods:
     """Test methods added directly to NexusClientManager."""
@@ -199,3 +263,119 @@ class TestNexusClientManagerMethods:
 
         assert hasattr(manager, "hent_fra_reference")
         assert callable(manager.hent_fra_reference)
+
+
+def test_hent_borger_snapshot_henter_uafhængige_dele_samtidigt(mock_nexus_client):
+    """Test that the snapshot fetches each link once and keeps per-part errors."""
+    borger = {
+        "id": 1,
+        "_links": {
+            rel: {"href": f"{MOCK_BASE_URL}{rel}"}
+            for rel in (
+                "patientPreferences",
+                "patientConditions",
+                "patientOrganizations",
+                "medicationCard",
+            )
+        },
+    }
+    svar = {
+        "patientPreferences": {
+            "CITIZEN_PATHWAY": [
+                {"name": "- Alt", "_links": {"self": {"href": f"{MOCK_BASE_URL}visning"}}}
+            ]
+        },
+        "visning": {
+            "_links": {
+                "pathwayReferences": {"href": f"{MOCK_BASE_URL}referencer"},
+                "patientActivities": {"href": f"{MOCK_BASE_URL}aktiviteter"},
+            }
+        },
+        "referencer": [{"id": 2, "name": "Forløb", "children": []}],
+        "aktiviteter": [{"id": 3}],
+        "patientConditions": [{"id": 4}],
+        "patientOrganizations": [
+            {"id": 5, "effectiveAtPresent": True},
+            {"id": 6, "effectiveAtPresent": False},
+        ],
+        "medicationCard": {"id": 7},
+    }
+    samtidige = 0
+    max_samtidige = 0
+    lås = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal samtidige, max_samtidige
+        with lås:
+            samtidige += 1
+            max_samtidige = max(max_samtidige, samtidige)
+        time.sleep(0.05)
+        with lås:
+            samtidige -= 1
+        return httpx.Response(200, json=svar[request.url.path.rsplit("/", 1)[-1]])
+
+    manager = NexusClientManager(
+        instance="test", client_id="id", client_secret="secret"
+    )
+    manager._nexus_client = mock_nexus_client(handler)
+
+    snapshot = manager.hent_borger_snapshot(borger)
+
+    assert snapshot.borger is borger
+    assert snapshot.visning == svar["visning"]
+    assert snapshot.referencer == svar["referencer"]
+    assert snapshot.aktiviteter == svar["aktiviteter"]
+    assert snapshot.tilstande == svar["patientConditions"]
+    assert [org["id"] for org in snapshot.organisationer] == [5]
+    assert snapshot.medicinkort == {"id": 7}
+    # Borgeren har ingen opgave-links
+    assert snapshot.opgaver is None
+    assert list(snapshot.fejl) == ["opgaver"]
+    assert isinstance(snapshot.fejl["opgaver"], ValueError)
+
+    kald = [url for url in mock_nexus_client.kald if url.startswith(MOCK_BASE_URL)]
+    assert kald.count(f"{MOCK_BASE_URL}patientPreferences") == 1
+    assert max_samtidige > 1
+
+
+def test_run_graph_springer_afhængige_over_ved_fejl():
+    """Test that run_graph passes results along and skips tasks after a failure."""
+    fejl = RuntimeError("nede")
+    kaldt = []
+
+    def fejler():
+        raise fejl
+
+    def afhængig(værdi):
+        kaldt.append(værdi)
+        return værdi
+
+    resultater = run_graph(
+        {
+            "a": (lambda: 1, ()),
+            "b": (lambda a: a + 1, ("a",)),
+            "c": (fejler, ()),
+            "d": (afhængig, ("c",)),
+            "e": (afhængig, ("d",)),
+        },
+        max_workers=1,
+    )
+
+    assert resultater == {"a": 1, "b": 2, "c": fejl, "d": fejl, "e": fejl}
+    assert kaldt == []
+
+
+def test_expand_results_kopierer_dubletter_og_bevarer_fejl():
+    """Test that expand_results copies repeated results and keeps errors in place."""
+    ugyldig = ValueError("ugyldig")
+    nede = RuntimeError("nede")
+    hentede = {"a": {"id": 1}, "b": nede}
+
+    resultater = expand_results(["a", ugyldig, "a", "b"], hentede)
+
+    assert resultater == [{"id": 1}, ugyldig, {"id": 1}, nede]
+    assert resultater[0] is hentede["a"]
+    assert resultater[2] is not resultater[0]
+
+    with pytest.raises(ValueError):
+        expand_results(["a", ugyldig, "b"], hentede, return_exceptions=False)
@@ -1,5 +1,15 @@
 # Fixtures are automatically loaded from conftest.py
 
+import json
+import logging
+import threading
+import time
+
+import httpx
+import pytest
+
+from tests.conftest import MOCK_BASE_URL
+
 
 def test_nexus_client_initialization(base_client):
     # Example test to verify initialization
@@ -8,3 +18,201 @@ def test_nexus_client_initialization(base_client):
 
     assert base_client.api is not None
     assert "activeAssignments" in base_client.api
+
+
+def test_hent_fra_referencer_mange(mock_nexus_client):
+    kald = []
+    lås = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        with lås:
+            kald.append(request.url.path)
+        if request.url.path.endswith("/fejl"):
+            return httpx.Response(500, json={})
+        return httpx.Response(200, json={"sti": request.url.path})
+
+    client = mock_nexus_client(handler)
+
+    def reference(sti: str) -> dict:
+        return {"_links": {"self": {"href": f"https://test.nexus.kmd.dk{sti}"}}}
+
+    referencer = [
+        reference("/a"),
+        {"_links": {"referencedObject": {"href": "https://test.nexus.kmd.dk/b"}}},
+        reference("/a"),
+        reference("/fejl"),
+        {"_links": {}},
+    ]
+
+    resultater = client.hent_fra_referencer_mange(referencer, max_samtidige=4)
+
+    assert resultater[0] == {"sti": "/a"}
+    assert resultater[1] == {"sti": "/b"}
+    assert resultater[2] == {"sti": "/a"}
+    assert resultater[2] is not resultater[0]
+    assert isinstance(resultater[3], httpx.HTTPStatusError)
+    assert isinstance(resultater[4], ValueError)
+
+    # Dubletter hentes kun én gang
+    assert sorted(kald) == ["/a", "/b", "/fejl"]
+
+    with pytest.raises(httpx.HTTPStatusError):
+        client.hent_fra_referencer_mange(referencer, returner_fejl=False)
+
+
+def test_api_hentes_dovent_og_gemmes(mock_nexus_client, tmp_path):
+    client = mock_nexus_client(lambda request: httpx.Response(404), api_cache_dir=tmp_path)
+
+    # Ingen netværkskald før api bruges
+    assert mock_nexus_client.kald == []
+
+    assert client.api == {"self": MOCK_BASE_URL}
+    assert MOCK_BASE_URL in mock_nexus_client.kald
+    assert (tmp_path / "kmd-nexus-api-test.json").exists()
+
+    # En ny klient læser links fra cachen uden netværkskald
+    mock_nexus_client.kald.clear()
+    ny_client = mock_nexus_client(lambda request: httpx.Response(404), api_cache_dir=tmp_path)
+    assert ny_client.api == {"self": MOCK_BASE_URL}
+    assert mock_nexus_client.kald == []
+
+
+def test_api_cache_udløber(mock_nexus_client, tmp_path):
+    mock_nexus_client(lambda request: httpx.Response(404), api_cache_dir=tmp_path).api
+
+    mock_nexus_client.kald.clear()
+    client = mock_nexus_client(
+        lambda request: httpx.Response(404), api_cache_dir=tmp_path, api_cache_ttl=-1
+    )
+    assert client.api == {"self": MOCK_BASE_URL}
+    assert MOCK_BASE_URL in mock_nexus_client.kald
+
+
+def _samtidige_get(client, antal: int, sti: str = "preferences"):
+    start = threading.Barrier(antal)
+    resultater = [None] * antal
+
+    def kør(i: int) -> None:
+        start.wait()
+        try:
+            resultater[i] = client.get(sti)
+        except Exception as e:
+            resultater[i] = e
+
+    tråde = [threading.Thread(target=kør, args=(i,)) for i in range(antal)]
+    for tråd in tråde:
+        tråd.start()
+    for tråd in tråde:
+        tråd.join()
+    return resultater
+
+
+def _langsom_handler(status: int):
+    def handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(0.2)
+        return httpx.Response(status, json={"id": 1})
+
+    return handler
+
+
+def test_samtidige_ens_get_deler_kald(mock_nexus_client):
+    client = mock_nexus_client(_langsom_handler(200))
+
+    resultater = _samtidige_get(client, 8)
+
+    assert [r.json() for r in resultater] == [{"id": 1}] * 8
+    assert mock_nexus_client.kald.count(MOCK_BASE_URL + "preferences") == 1
+
+    # Afsluttede kald deles ikke
+    client.get("preferences")
+    assert mock_nexus_client.kald.count(MOCK_BASE_URL + "preferences") == 2
+
+
+def test_samtidige_ens_get_deler_fejl(mock_nexus_client):
+    client = mock_nexus_client(_langsom_handler(404))
+
+    resultater = _samtidige_get(client, 4)
+
+    assert all(isinstance(r, httpx.HTTPStatusError) for r in resultater)
+    assert mock_nexus_client.kald.count(MOCK_BASE_URL + "preferences") == 1
+
+
+def test_get_uden_sammenlægning(mock_nexus_client):
+    client = mock_nexus_client(_langsom_handler(200), coalesce_requests=False)
+
+    _samtidige_get(client, 4)
+
+    assert mock_nexus_client.kald.count(MOCK_BASE_URL + "preferences") == 4
+
+
+def test_get_efter_skrivning_deler_ikke_ældre_kald(mock_nexus_client):
+    tilstand = {"version": 1}
+    get_startet = threading.Event()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "PUT":
+            tilstand.update(json.loads(request.content))
+            return httpx.Response(200, json=tilstand)
+        svar = dict(tilstand)
+        get_startet.set()
+        time.sleep(0.2)
+        return httpx.Response(200, json=svar)
+
+    client = mock_nexus_client(handler)
+    client.get("preferences/x")  # Hent token og API først
+    get_startet.clear()
+
+    ældre = threading.Thread(target=client.get, args=("preferences",))
+    ældre.start()
+    get_startet.wait()
+
+    client.put("preferences", {"version": 2})
+    assert client.get("preferences").json() == {"version": 2}
+    ældre.join()
+
+
+def _chunket_liste(antal: int, læste: list):
+    """A JSON array sent one item per chunk, recording how many chunks were read."""
+
+    def chunks():
+        yield b"["
+        for i in range(antal):
+            læste.append(i)
+            yield (b"," if i else b"") + json.dumps({"id": i}).encode()
+        yield b"]"
+
+    return chunks()
+
+
+def test_stream_items_stopper_ved_første_match(mock_nexus_client, caplog):
+    læste = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=_chunket_liste(1000, læste))
+
+    client = mock_nexus_client(handler)
+
+    with caplog.at_level(logging.DEBUG, logger="kmd.nexus"):
+        match = next(i for i in client.stream_items("organizations") if i["id"] == 3)
+
+    assert match == {"id": 3}
+    assert len(læste) < 10
+    # The logging hook must not read the streamed body
+    (record,) = [r for r in caplog.records if hasattr(r, "http")]
+    assert record.http["response_body_streamed"] is True
+    assert "response_body" not in record.http
+
+
+def test_stream_items_hele_listen_og_fejl(mock_nexus_client):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/mangler"):
+            return httpx.Response(404, json={"fejl": "findes ikke"})
+        return httpx.Response(200, content=_chunket_liste(50, []))
+
+    client = mock_nexus_client(handler)
+
+    assert [i["id"] for i in client.stream_items("liste")] == list(range(50))
+
+    with pytest.raises(httpx.HTTPStatusError) as fejl:
+        list(client.stream_items("mangler"))
+    assert fejl.value.response.json() == {"fejl": "findes ikke"}
@@ -0,0 +1,225 @@
+"""
+Tests for the reference data cache and its use in the functionality clients.
+"""
+
+import threading
+import time
+
+import httpx
+import pytest
+
+from kmd_nexus_client.concurrency import map_bounded
+from kmd_nexus_client.functionality.indsatser import IndsatsClient
+from kmd_nexus_client.functionality.organisationer import OrganisationerClient
+from kmd_nexus_client.reference_data import ReferenceDataCache
+from tests.conftest import MOCK_BASE_URL
+
+
+ORGANISATIONER = [
+    {"id": 1, "name": "Sygeplejen"},
+    {"id": 2, "name": "Hjemmeplejen"},
+    {"id": 3, "name": "Sygeplejen"},
+]
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    path = request.url.path
+    if path.endswith("/organizations"):
+        return httpx.Response(200, json=ORGANISATIONER)
+    if path.endswith("/professionals"):
+        initialer = request.url.params["query"]
+        return httpx.Response(200, json=[{"primaryIdentifier": initialer}])
+    if path.endswith("/shifts"):
+        return httpx.Response(200, json=[{"title": "Morgen"}, {"title": "Aften"}])
+    return httpx.Response(404, json={})
+
+
+def _klient(mock_nexus_client):
+    klient = mock_nexus_client(_handler)
+    klient.api = {
+        rel: MOCK_BASE_URL + rel for rel in ("organizations", "professionals", "shifts")
+    }
+    return klient
+
+
+def _kald_til(kald, endelse):
+    return [url for url in kald if endelse in url]
+
+
+class TestReferenceDataCache:
+    """Test the cache on its own."""
+
+    def test_get_genbruger_vaerdi(self):
+        cache = ReferenceDataCache()
+        kald = []
+
+        def loader():
+            kald.append(1)
+            return ["a"]
+
+        assert cache.get("vagter", None, loader) == ["a"]
+        assert cache.get("vagter", None, loader) == ["a"]
+        assert len(kald) == 1
+
+    def test_ttl_udloeber(self):
+        cache = ReferenceDataCache(ttls={"vagter": 0.01})
+        kald = []
+
+        def loader():
+            kald.append(1)
+            return []
+
+        cache.get("vagter", None, loader)
+        time.sleep(0.02)
+        cache.get("vagter", None, loader)
+
+        assert len(kald) == 2
+
+    def test_index_bruger_foerste_forekomst(self):
+        cache = ReferenceDataCache()
+        index = cache.index("organisationer", "name", lambda: ORGANISATIONER)
+
+        assert index["Sygeplejen"]["id"] == 1
+        assert cache.index("organisationer", "name", lambda: []) is index
+
+    def test_opslag_returnerer_kopier(self):
+        cache = ReferenceDataCache()
+
+        organisation = cache.find("organisationer", "id", 2, lambda: ORGANISATIONER)
+        organisation["name"] = "Ændret"
+        medarbejder = cache.get("medarbejdere", "abc", lambda: {"initialer": "abc"})
+        medarbejder["initialer"] = "ændret"
+
+        assert cache.find("organisationer", "id", 2, lambda: [])["name"] == "Hjemmeplejen"
+        assert cache.get("medarbejdere", "abc", lambda: None) == {"initialer": "abc"}
+        assert ORGANISATIONER[1]["name"] == "Hjemmeplejen"
+        assert cache.find("organisationer", "id", 99, lambda: []) is None
+        with pytest.raises(TypeError):
+            cache.index("organisationer", "id", lambda: [])[2] = {}
+
+    def test_none_gemmes_ikke(self):
+        cache = ReferenceDataCache()
+
+        assert cache.get("medarbejdere", "abc", lambda: None) is None
+        assert cache.get("medarbejdere", "abc", lambda: {"id": 1}) == {"id": 1}
+        assert cache._load_locks == {}
+
+    def test_invalidate(self):
+        cache = ReferenceDataCache()
+        cache.get("medarbejdere", "abc", lambda: 1)
+        cache.get("medarbejdere", "def", lambda: 2)
+        cache.get("vagter", None, lambda: 3)
+
+        cache.invalidate("medarbejdere", "abc")
+        assert cache.get("medarbejdere", "abc", lambda: 10) == 10
+        assert cache.get("medarbejdere", "def", lambda: 20) == 2
+
+        cache.invalidate("medarbejdere")
+        assert cache.get("medarbejdere", "def", lambda: 20) == 20
+        assert cache.get("vagter", None, lambda: 30) == 3
+
+        cache.invalidate()
+        assert cache.get("vagter", None, lambda: 30) == 30
+
+    def test_samtidige_opslag_henter_en_gang(self):
+        cache = ReferenceDataCache()
+        kald = []
+        start = threading.Barrier(8)
+
+        def loader():
+            kald.append(1)
+            time.sleep(0.02)
+            return ORGANISATIONER
+
+        def opslag(_):
+            start.wait()
+            return cache.index("organisationer", "id", loader)[2]["name"]
+
+        assert map_bounded(opslag, range(8), max_workers=8) == ["Hjemmeplejen"] * 8
+        assert len(kald) == 1
+
+
+class TestKlienterMedReferencedata:
+    """Test the functionality clients using the cache."""
+
+    def test_organisation_ved_navn_og_id(self, mock_nexus_client):
+        organisationer = OrganisationerClient(
+            _klient(mock_nexus_client), referencedata=ReferenceDataCache()
+        )
+
+        assert organisationer.hent_organisation_ved_navn("Hjemmeplejen")["id"] == 2
+        assert organisationer.hent_organisation_ved_navn("Sygeplejen")["id"] == 1
+        assert organisationer.hent_organisation_ved_id(3)["name"] == "Sygeplejen"
+        assert organisationer.hent_organisation_ved_navn("Findes ikke") is None
+        assert len(_kald_til(mock_nexus_client.kald, "/organizations")) == 1
+
+    def test_uden_cache_hentes_hver_gang(self, mock_nexus_client):
+        organisationer = OrganisationerClient(_klient(mock_nexus_client))
+
+        organisationer.hent_organisation_ved_navn("Hjemmeplejen")
+        organisationer.hent_organisation_ved_id(1)
+
+        assert len(_kald_til(mock_nexus_client.kald, "/organizations")) == 2
+
+    def test_medarbejder_caches_per_initialer(self, mock_nexus_client):
+        organisationer = OrganisationerClient(
+            _klient(mock_nexus_client), referencedata=ReferenceDataCache()
+        )
+
+        for _ in range(3):
+            assert organisationer.hent_medarbejder_ved_initialer("abc")
+        organisationer.hent_medarbejder_ved_initialer("def")
+
+        assert len(_kald_til(mock_nexus_client.kald, "/professionals")) == 2
+
+    def test_skrivning_rydder_referencedata(self, mock_nexus_client):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.method != "GET":
+                return httpx.Response(200, json={"id": 7})
+            return _handler(request)
+
+        klient = mock_nexus_client(handler)
+        klient.api = {"professionals": MOCK_BASE_URL + "professionals"}
+        referencedata = ReferenceDataCache()
+        organisationer = OrganisationerClient(klient, referencedata=referencedata)
+        referencedata.get("leverandører", "url", lambda: [{"name": "Gammel"}])
+
+        organisationer.opdater_leverandør(
+            {"_links": {"update": {"href": MOCK_BASE_URL + "suppliers/7"}}}
+        )
+        assert referencedata.get("leverandører", "url", lambda: []) == []
+
+        organisationer.hent_medarbejder_ved_initialer("abc")
+        organisationer.tilføj_organisation_til_medarbejder(
+            {
+                "_links": {
+                    "organizations": {"href": MOCK_BASE_URL + "org"},
+                    "updateOrganizations": {"href": MOCK_BASE_URL + "opdater"},
+                }
+            },
+            {"id": 1},
+        )
+        organisationer.hent_medarbejder_ved_initialer("abc")
+        assert len(_kald_til(mock_nexus_client.kald, "/professionals")) == 2
+
+    def test_vagter_hentes_en_gang(self, mock_nexus_client):
+        indsatser = IndsatsClient(
+            _klient(mock_nexus_client), referencedata=ReferenceDataCache()
+        )
+
+        for _ in range(3):
+            element = {"type": "schedule", "next": {"next": {}}}
+            indsatser._fill_grant_elements(
+                [element],
+                {
+                    "schedule": {
+                        "pattern": "DAY",
+                        "count": 1,
+                        "shifts": [{"title": "Aften"}, {"title": "Ukendt"}],
+                    }
+                },
+            )
+            assert element["next"]["next"]["shifts"] == [{"title": "Aften"}]
+            assert element["next"]["next"]["visits"] == 2
+
+        assert len(_kald_til(mock_nexus_client.kald, "/shifts")) == 1
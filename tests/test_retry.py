@@ -0,0 +1,104 @@
+"""
+Tests for RetryPolicy, RateLimiter and their use in NexusClient.
+"""
+
+import time
+
+import httpx
+import pytest
+
+from kmd_nexus_client.retry import RateLimiter, RetryPolicy
+
+
+class TestRetryPolicy:
+    """Test retry decisions and backoff."""
+
+    def test_idempotente_kald_gentages(self):
+        policy = RetryPolicy(max_retries=2)
+        response = httpx.Response(503)
+
+        assert policy.should_retry_response("GET", response, 0)
+        assert policy.should_retry_response("PUT", response, 1)
+        assert not policy.should_retry_response("GET", response, 2)
+
+    def test_post_gentages_kun_ved_429(self):
+        policy = RetryPolicy()
+
+        assert not policy.should_retry_response("POST", httpx.Response(503), 0)
+        assert policy.should_retry_response("POST", httpx.Response(429), 0)
+        assert not policy.should_retry_exception("POST", httpx.ReadTimeout("x"), 0)
+        assert policy.should_retry_exception("POST", httpx.ConnectError("x"), 0)
+
+    def test_andre_statuskoder_gentages_ikke(self):
+        policy = RetryPolicy()
+
+        assert not policy.should_retry_response("GET", httpx.Response(404), 0)
+        assert not policy.should_retry_response("GET", httpx.Response(500), 0)
+
+    def test_backoff_respekterer_retry_after(self):
+        policy = RetryPolicy(max_retry_after=10)
+
+        assert policy.backoff(0, httpx.Response(429, headers={"Retry-After": "3"})) == 3
+        assert policy.backoff(0, httpx.Response(429, headers={"Retry-After": "60"})) == 10
+
+    def test_backoff_er_begrænset(self):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=4)
+
+        for attempt in range(10):
+            assert 0 <= policy.backoff(attempt) <= 4
+
+
+class TestRateLimiter:
+    """Test the token bucket."""
+
+    def test_burst_og_ventetid(self):
+        limiter = RateLimiter(requests_per_second=10, burst=2)
+
+        assert limiter.reserve() == 0
+        assert limiter.reserve() == 0
+        assert limiter.reserve() == pytest.approx(0.1, abs=0.02)
+
+    def test_throttling_sænker_og_genopretter_hastighed(self):
+        limiter = RateLimiter(requests_per_second=10, recovery_step=5)
+
+        limiter.on_throttled()
+        assert limiter.rate == 5
+
+        limiter.on_success()
+        limiter.on_success()
+        assert limiter.rate == 10
+
+
+def test_nexus_client_gentager_midlertidige_fejl(mock_nexus_client):
+    svar = iter(
+        [
+            httpx.Response(503),
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(200, json={"ok": True}),
+        ]
+    )
+
+    client = mock_nexus_client(
+        lambda request: next(svar),
+        retry_policy=RetryPolicy(backoff_factor=0),
+        rate_limiter=RateLimiter(requests_per_second=1000),
+    )
+
+    start = time.monotonic()
+    assert client.get("noget").json() == {"ok": True}
+    assert time.monotonic() - start < 1
+
+
+def test_nexus_client_gentager_ikke_post(mock_nexus_client):
+    kald = []
+
+    def handler(request):
+        kald.append(request.method)
+        return httpx.Response(503)
+
+    client = mock_nexus_client(handler, retry_policy=RetryPolicy(backoff_factor=0))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        client.post("noget", json={})
+
+    assert kald == ["POST"]
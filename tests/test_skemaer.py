@@ -1,9 +1,12 @@
+import copy
+import json
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 import pytest
 
 # Fixtures are automatically loaded from conftest.py
+from kmd_nexus_client.functionality.skemaer import SkemaerClient
 from kmd_nexus_client.manager import NexusClientManager
 from kmd_nexus_client.tree_helpers import filter_by_predicate
 
@@ -234,4 +237,57 @@ def test_skema_med_diagnose(nexus_manager: NexusClientManager, test_borger: dict
         handling_navn=handling
     )
 
-    assert skema is not None
\ No newline at end of file
+    assert skema is not None
+
+
+class _Borgere:
+    def __init__(self, referencer):
+        self.referencer = referencer
+
+    def hent_visning(self, borger, visnings_navn):
+        return {}
+
+    def hent_referencer(self, visning):
+        return self.referencer
+
+
+class _Manager:
+    def __init__(self, referencer):
+        self.borgere = _Borgere(referencer)
+
+
+def test_hent_skemareferencer_ændrer_ikke_referencer():
+    """Test at skemareferencer findes med forløb uden at referencetræet ændres."""
+    skema = {
+        "type": "formDataV2Reference",
+        "formDataId": "7",
+        "name": "Sagsnotat",
+        "date": "2025-01-02T10:00:00Z",
+        "workflowState": {"name": "Låst"},
+        "_links": {"self": {"href": "x"}},
+    }
+    referencer = [
+        {
+            "type": "patientPathwayReference",
+            "name": "Sundhedsfagligt grundforløb",
+            "children": [
+                {
+                    "type": "patientPathwayReference",
+                    "name": "FSIII",
+                    "children": [{"type": "folder", "children": [skema]}],
+                }
+            ],
+        },
+        {"type": "formDataV2Reference", "formDataId": "8", "name": "Løst"},
+    ]
+    original = copy.deepcopy(referencer)
+
+    skemaer = SkemaerClient(None, manager=_Manager(referencer)).hent_skemareferencer({})
+
+    assert referencer == original
+    json.dumps(referencer)
+    assert [(s["Skemaid"], s["Grundforløb"], s["Forløb"], s["Status"]) for s in skemaer] == [
+        (7, "Sundhedsfagligt grundforløb", "FSIII", "Låst"),
+        (8, "", "", ""),
+    ]
+    assert skemaer[0]["Dato"] == datetime(2025, 1, 2, 10, tzinfo=ZoneInfo("UTC"))
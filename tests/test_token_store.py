@@ -0,0 +1,142 @@
+"""
+Tests for the shared token stores and their use in NexusClient.
+"""
+
+import os
+import stat
+import threading
+import time
+
+import httpx
+import pytest
+
+from kmd_nexus_client.concurrency import map_bounded
+from kmd_nexus_client.token_store import (
+    FileTokenStore,
+    MemoryTokenStore,
+    TokenStore,
+    token_is_fresh,
+    token_key,
+)
+
+
+def _ok(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"id": 1})
+
+
+def _token_kald(kald):
+    return [url for url in kald if url.endswith("/protocol/openid-connect/token")]
+
+
+class TestTokenStores:
+    """Test the stores on their own."""
+
+    def test_token_is_fresh(self):
+        assert not token_is_fresh(None, 60)
+        assert not token_is_fresh({"access_token": "a", "expires_at": time.time() + 30}, 60)
+        assert token_is_fresh({"access_token": "a", "expires_at": time.time() + 300}, 60)
+        assert token_is_fresh({"access_token": "a"}, 60)
+
+    def test_token_key_skjuler_client_id(self):
+        key = token_key("test", "hemmeligt-id")
+
+        assert key.startswith("test-")
+        assert "hemmeligt-id" not in key
+        assert key != token_key("test", "andet-id")
+
+    def test_file_store_gemmer_privat_fil(self, tmp_path):
+        store = FileTokenStore(tmp_path)
+        store.save("k", {"access_token": "a", "expires_at": 1})
+
+        assert store.load("k") == {"access_token": "a", "expires_at": 1}
+        assert store.load("ukendt") is None
+        if os.name == "posix":
+            mode = stat.S_IMODE((tmp_path / "k.token.json").stat().st_mode)
+            assert mode == 0o600
+
+    def test_file_store_fjerner_efterladt_laas(self, tmp_path):
+        store = FileTokenStore(tmp_path, lock_timeout=1, stale_lock_after=0.1)
+        lock_file = tmp_path / "k.lock"
+        lock_file.touch()
+        os.utime(lock_file, (time.time() - 10, time.time() - 10))
+
+        with store.lock("k"):
+            assert lock_file.exists()
+        assert not lock_file.exists()
+
+    def test_file_store_timeout(self, tmp_path):
+        store = FileTokenStore(tmp_path, lock_timeout=0.1)
+        (tmp_path / "k.lock").touch()
+
+        with pytest.raises(TimeoutError):
+            store.acquire("k")
+
+        # The thread lock must have been released again
+        (tmp_path / "k.lock").unlink()
+        with store.lock("k"):
+            pass
+
+    def test_ufuldstændigt_lager_kan_ikke_oprettes(self):
+        class UdenLås(TokenStore):
+            def load(self, key):
+                return None
+
+            def save(self, key, token):
+                pass
+
+        with pytest.raises(TypeError):
+            UdenLås()
+
+
+class TestDeltToken:
+    """Test that clients sharing a store fetch the token only once."""
+
+    def test_klienter_deler_token_i_hukommelsen(self, mock_nexus_client):
+        store = MemoryTokenStore()
+        klienter = [mock_nexus_client(_ok, token_store=store) for _ in range(3)]
+
+        for klient in klienter:
+            klient.get("patients/1")
+
+        assert len(_token_kald(mock_nexus_client.kald)) == 1
+
+    def test_samtidige_klienter_deler_token_paa_disk(self, mock_nexus_client, tmp_path):
+        store = FileTokenStore(tmp_path)
+        klienter = [mock_nexus_client(_ok, token_store=store) for _ in range(8)]
+
+        start = threading.Barrier(len(klienter))
+
+        def kald(klient):
+            start.wait()
+            return klient.get("patients/1").status_code
+
+        assert map_bounded(kald, klienter, max_workers=8, return_exceptions=False) == [
+            200
+        ] * 8
+        assert len(_token_kald(mock_nexus_client.kald)) == 1
+
+    def test_token_fornyes_foer_udloeb(self, mock_nexus_client):
+        store = MemoryTokenStore()
+        klient = mock_nexus_client(_ok, token_store=store)
+        store.save(
+            klient._token_key,
+            {"access_token": "gammel", "token_type": "Bearer", "expires_at": time.time() + 30},
+        )
+
+        klient.get("patients/1")
+
+        assert len(_token_kald(mock_nexus_client.kald)) == 1
+        assert store.load(klient._token_key)["access_token"] == "token"
+
+    def test_gemt_token_genbruges(self, mock_nexus_client):
+        store = MemoryTokenStore()
+        klient = mock_nexus_client(_ok, token_store=store)
+        store.save(
+            klient._token_key,
+            {"access_token": "delt", "token_type": "Bearer", "expires_at": time.time() + 300},
+        )
+
+        klient.get("patients/1")
+
+        assert _token_kald(mock_nexus_client.kald) == []
+        assert klient.client.token["access_token"] == "delt"
@@ -2,6 +2,8 @@
 Tests for tree_helpers module.
 """
 
+import warnings
+
 import pytest
 
 from kmd_nexus_client.manager import NexusClientManager
@@ -11,10 +13,18 @@ from kmd_nexus_client.tree_helpers import (
     find_first_node,
     find_node_by_id,
     filter_by_path,
+    compile_path,
+    PathPattern,
     filter_by_predicate,
+    filter_by_queries,
     map_tree,
     get_node_path,
     flatten_tree,
+    TreeIndex,
+    iter_find_nodes,
+    iter_filter_by_path,
+    iter_filter_by_predicate,
+    iter_flatten_tree,
 )
 
 
@@ -301,6 +311,121 @@ class TestFilterByPath:
         with pytest.raises(ValueError, match="Can't match empty path"):
             filter_by_path([], "")
 
+    def test_compile_path_is_reused(self, pathway_tree):
+        """Test filtering with a compiled pattern."""
+        pattern = compile_path("/Sundhedsfagligt grundforløb/*/Medicin%")
+
+        assert isinstance(pattern, PathPattern)
+        assert compile_path("/Sundhedsfagligt grundforløb/*/Medicin%") is pattern
+        assert filter_by_path([pathway_tree], pattern) == filter_by_path(
+            [pathway_tree], "/Sundhedsfagligt grundforløb/*/Medicin%"
+        )
+
+    def test_compile_path_segment_matching(self, pathway_tree):
+        """Test name, type and inner wildcard matching of single segments."""
+        pattern = compile_path("/patientPathwayReference/F%II/Medicin%ring")
+        course = pathway_tree["children"][0]
+
+        assert pattern.matches_segment(0, pathway_tree)
+        assert pattern.matches_segment(1, course)
+        assert not pattern.matches_segment(2, course["children"][0])
+        assert pattern.matches([pathway_tree, course, course["children"][1]])
+        assert filter_by_path([pathway_tree], pattern) == [course["children"][1]]
+
+    def test_filter_by_path_prunes_non_matching_subtrees(self, pathway_tree):
+        """Test that children of non-matching nodes are never visited."""
+        pathway_tree["children"][0]["children"] = _ExplodingList()
+
+        assert filter_by_path([pathway_tree], "/Sundhedsfagligt grundforløb/Andet/*") == []
+
+
+    def test_filter_by_path_none_name_and_type(self):
+        """Test that nodes with None name and type do not match literal segments."""
+        roots = [{"name": None, "type": None, "children": [{"name": "Indsatser"}]}]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            assert filter_by_path(roots, "/FSIII/Indsatser") == []
+            assert filter_by_path(roots, "/*/Indsatser") == [roots[0]["children"][0]]
+
+
+class TestFilterByQueries:
+    """Test filtering with several queries in one pass."""
+
+    def test_buckets_match_single_queries(self, pathway_tree):
+        pathway_tree["children"].append(
+            {
+                "id": "inactive",
+                "name": "Medicin pause",
+                "type": "patientPathwayReference",
+                "pathwayStatus": "INACTIVE",
+                "children": [],
+            }
+        )
+        roots = [pathway_tree]
+        queries = {
+            "medicin": "/Sundhedsfagligt grundforløb/FSIII/Medicin%",
+            "forløb": compile_path("/*/*"),
+            "bestilt": lambda node: node.get("workflowState", {}).get("name")
+            == "Bestilt",
+        }
+
+        buckets = filter_by_queries(roots, queries, active_pathways_only=True)
+
+        assert buckets["medicin"] == filter_by_path(roots, queries["medicin"], True)
+        assert buckets["forløb"] == filter_by_path(roots, queries["forløb"], True)
+        assert buckets["bestilt"] == filter_by_predicate(roots, queries["bestilt"])
+        assert [node["id"] for node in buckets["forløb"]] == ["course1"]
+
+    def test_prunes_when_no_pattern_can_match(self, pathway_tree):
+        pathway_tree["children"][0]["children"] = _ExplodingList()
+
+        buckets = filter_by_queries(
+            [pathway_tree], {"a": "/Sundhedsfagligt grundforløb/Andet/*", "b": "/*"}
+        )
+
+        assert buckets == {"a": [], "b": [pathway_tree]}
+
+
+class TestTreeIndex:
+    """Test the tree index."""
+
+    def test_lookups(self, sample_tree):
+        index = TreeIndex(sample_tree)
+
+        assert len(index) == 6
+        assert index.by_id("grandchild3") is find_node_by_id(sample_tree, "grandchild3")
+        assert index.by_id("missing") is None
+        assert [n["id"] for n in index.by_type("leaf")] == ["grandchild1", "grandchild2"]
+        assert index.by_name("Child 2") == [sample_tree["children"][1]]
+        assert index.by_type("missing") == []
+
+    def test_parents_and_paths(self, sample_tree):
+        index = TreeIndex([sample_tree])
+        grandchild = sample_tree["children"][1]["children"][0]
+
+        assert index.parent(sample_tree) is None
+        assert index.parent(grandchild) is sample_tree["children"][1]
+        assert [n["id"] for n in index.ancestors(grandchild)] == ["child2", "root"]
+        assert index.path(grandchild) == get_node_path(sample_tree, grandchild)
+        assert grandchild in index
+        assert {"id": "grandchild3"} not in index
+        assert "_parent" not in grandchild
+
+    def test_unknown_node_raises(self, sample_tree):
+        with pytest.raises(KeyError):
+            TreeIndex(sample_tree).parent({"id": "root"})
+
+
+class _ExplodingList(list):
+    """A children list that fails if anything iterates over it."""
+
+    def __bool__(self):
+        return True
+
+    def __reversed__(self):
+        raise AssertionError("subtree should have been pruned")
+
 
 class TestFilterByPredicate:
     """Test predicate-based filtering."""
@@ -483,3 +608,97 @@ class TestFlattenTree:
         assert len(flattened) == 3
         names = [node["name"] for node in flattened]
         assert names == ["root", "sub1", "sub2"]
+
+
+class TestDeepTrees:
+    """Test that traversal does not depend on the recursion limit."""
+
+    @pytest.fixture
+    def deep_tree(self):
+        depth = 5000
+        root = {"id": 0, "children": []}
+        node = root
+        for i in range(1, depth):
+            child = {"id": i, "children": []}
+            node["children"].append(child)
+            node = child
+        return root
+
+    def test_deep_tree_helpers(self, deep_tree):
+        assert find_node_by_id(deep_tree, 4999)["id"] == 4999
+        assert len(get_node_path(deep_tree, find_node_by_id(deep_tree, 4999))) == 5000
+        assert len(flatten_tree(deep_tree)) == 5000
+        assert len(filter_by_predicate([deep_tree], lambda n: n["id"] % 2 == 0)) == 2500
+
+        mapped = map_tree(deep_tree, lambda n: {**n, "id": n["id"] + 1})
+        assert find_node_by_id(mapped, 5000) is not None
+
+    def test_traverse_tree_path_is_own_list(self, sample_tree):
+        paths = []
+        traverse_tree(sample_tree, lambda node, path: paths.append(path))
+
+        assert [n["id"] for n in paths[2]] == ["root", "child1", "grandchild1"]
+        assert [n["id"] for n in paths[-1]] == ["root", "child2", "grandchild3"]
+
+    def test_get_node_path_is_own_list(self, sample_tree):
+        first = get_node_path(sample_tree, sample_tree["children"][0])
+        second = get_node_path(sample_tree, sample_tree["children"][1])
+
+        assert first is not second
+        assert [n["id"] for n in first] == ["root", "child1"]
+
+    def test_map_tree_calls_transform_in_pre_order(self, sample_tree):
+        order = []
+
+        def transform(node):
+            order.append(node["id"])
+            return node
+
+        map_tree(sample_tree, transform)
+
+        assert order == [n["id"] for n in flatten_tree(sample_tree)]
+
+
+class TestIterHelpers:
+    """Test the generator variants of the query helpers."""
+
+    def test_iter_find_nodes_is_lazy(self, sample_tree):
+        visited = []
+
+        def is_leaf(node):
+            visited.append(node["id"])
+            return node["type"] == "leaf"
+
+        matches = iter_find_nodes(sample_tree, is_leaf)
+        assert visited == []
+
+        assert next(matches)["id"] == "grandchild1"
+        assert visited == ["root", "child1", "grandchild1"]
+
+    def test_iter_variants_match_list_variants(self, sample_tree, pathway_tree):
+        def is_leaf(node):
+            return node.get("type") == "leaf"
+
+        assert list(iter_find_nodes(sample_tree, is_leaf)) == find_nodes(
+            sample_tree, is_leaf
+        )
+        assert list(iter_filter_by_predicate([sample_tree], is_leaf)) == (
+            filter_by_predicate([sample_tree], is_leaf)
+        )
+        assert list(iter_filter_by_path([pathway_tree], "/*/*/*", True)) == (
+            filter_by_path([pathway_tree], "/*/*/*", True)
+        )
+
+    def test_iter_filter_by_path_validates_eagerly(self):
+        with pytest.raises(ValueError):
+            iter_filter_by_path([], "")
+
+    def test_iter_flatten_tree_copies_only_when_asked(self, sample_tree):
+        nodes = list(iter_flatten_tree(sample_tree))
+        assert nodes[0] is sample_tree
+        assert len(nodes) == 6
+
+        copies = list(iter_flatten_tree(sample_tree, copy_nodes=True))
+        assert copies[0] is not sample_tree
+        assert "children" not in copies[0]
+        assert copies == flatten_tree(sample_tree)